@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+from tabulate import tabulate
+from otterai.analytics import TranscriptArchive, write_report
+from otterai.catalog import SpeechCatalog, CATALOG_FILENAME
+
+# Where the CSV tables and report.json are written
+OUTPUT_DIR = os.getenv('OTTER_ANALYTICS_DIR', 'analytics')
+
+def main():
+    base_dir = sys.argv[1] if len(sys.argv) > 1 else 'downloads'
+    if not os.path.isdir(base_dir):
+        print(f"Error: {base_dir} not found!")
+        print("Please run a download script first")
+        sys.exit(1)
+
+    # The catalog has typed metadata for every listed speech; without it
+    # each speech's metadata.json is read
+    catalog = SpeechCatalog(CATALOG_FILENAME) if os.path.exists(CATALOG_FILENAME) else None
+
+    started = time.perf_counter()
+    archive = TranscriptArchive.load(base_dir, catalog=catalog)
+    loaded = time.perf_counter() - started
+    report = archive.report()
+    write_report(report, OUTPUT_DIR)
+
+    summary = report['summary']
+    print(f"\n{summary['meetings']} meetings, {summary['hours']} hours, {summary['segments']} segments "
+          f"loaded in {loaded:.1f}s")
+    print(f"Words: {summary['words']} ({summary['words_per_minute']} per minute)")
+    print(f"Meeting length: median {summary['median_minutes']} min, p90 {summary['p90_minutes']} min, "
+          f"p99 {summary['p99_minutes']} min")
+
+    speakers = report['speakers']
+    print("\nTop Speakers:")
+    print(tabulate(
+        list(zip(*(values[:15].tolist() for values in speakers.values()))),
+        headers=['Speaker', 'Talk (min)', 'Share', 'Words', 'WPM', 'Meetings'],
+        tablefmt='grid'
+    ))
+
+    lengths = report['lengths']
+    print("\nMeeting Lengths:")
+    print(tabulate(list(zip(lengths['minutes'].tolist(), lengths['meetings'].tolist())),
+                   headers=['Minutes', 'Meetings'], tablefmt='grid'))
+
+    print(f"\nTables and report.json saved to {OUTPUT_DIR}/")
+
+if __name__ == "__main__":
+    main()
@@ -4,28 +4,26 @@ import json
 import os
 from datetime import datetime
 from tabulate import tabulate
+from otterai.state import StateStore, DOWNLOADED, FAILED
+from otterai.catalog import SpeechCatalog, CATALOG_FILENAME, LEGACY_JSON
 
 def main():
-    # Load progress file
-    try:
-        with open('download_progress.json') as f:
-            progress = json.load(f)
-    except FileNotFoundError:
-        print("Error: download_progress.json not found!")
+    # Load progress store
+    if os.path.exists('download_progress.db') or os.path.exists('download_progress.json'):
+        store = StateStore.open('download_progress.db', legacy_json='download_progress.json')
+    else:
+        print("Error: download_progress.db not found!")
         print("Please run the download script first")
         return
         
-    # Load original speeches list for metadata
-    try:
-        with open('speeches_list.json') as f:
-            data = json.load(f)
-            speeches = {s['speech_id']: s for s in data.get('speeches', [])}
-    except FileNotFoundError:
-        print("Error: speeches_list.json not found!")
+    # Load speech catalog for metadata
+    if not os.path.exists(CATALOG_FILENAME) and not os.path.exists(LEGACY_JSON):
+        print(f"Error: {CATALOG_FILENAME} not found!")
         print("Please run list_all_speeches.py first")
         return
+    catalog = SpeechCatalog.open(CATALOG_FILENAME, legacy_json=LEGACY_JSON)
 
-    failed = progress.get('failed', [])
+    failed = store.ids(FAILED)
     if not failed:
         print("\nNo failed downloads found!")
         return
@@ -33,14 +31,15 @@ def main():
     print(f"\nFound {len(failed)} failed downloads:")
     
     # Collect info about failed downloads
+    speeches = {row['speech_id']: row for row in catalog.rows(ids=failed)}
     failed_info = []
     for speech_id in failed:
         speech = speeches.get(speech_id, {})
         failed_info.append([
             speech_id,
-            speech.get('title', 'Unknown'),
-            datetime.fromtimestamp(speech.get('created_at', 0)).strftime('%Y-%m-%d'),
-            speech.get('otid', 'Unknown')
+            speech.get('title') or 'Unknown',
+            datetime.fromtimestamp(speech.get('created_at') or 0).strftime('%Y-%m-%d'),
+            speech.get('otid') or 'Unknown'
         ])
     
     # Print table of failed downloads
@@ -54,15 +53,15 @@ def main():
     # Save detailed report
     report = {
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'total_speeches': len(speeches),
-        'downloaded': len(progress.get('downloaded', [])),
+        'total_speeches': len(catalog),
+        'downloaded': store.counts().get(DOWNLOADED, 0),
         'failed': len(failed),
         'failed_details': [
             {
                 'speech_id': speech_id,
-                'title': speeches.get(speech_id, {}).get('title', 'Unknown'),
-                'created_at': speeches.get(speech_id, {}).get('created_at', 0),
-                'otid': speeches.get(speech_id, {}).get('otid', 'Unknown')
+                'title': speeches.get(speech_id, {}).get('title') or 'Unknown',
+                'created_at': speeches.get(speech_id, {}).get('created_at') or 0,
+                'otid': speeches.get(speech_id, {}).get('otid') or 'Unknown'
             }
             for speech_id in failed
         ]
@@ -72,9 +71,7 @@ def main():
         json.dump(report, f, indent=2)
     
     print(f"\nDetailed report saved to download_report.json")
-    print("\nTo retry failed downloads:")
-    print("1. Remove failed IDs from download_progress.json")
-    print("2. Run download_from_list.py again")
+    print("\nTo retry failed downloads, run retry_failed.py")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Otter API endpoints OtterAI uses
+
+Serves login, user, speakers, speeches (last_load_ts paging and
+modified_after), speech, advanced_search, bulk_export (zips of configurable
+size), the speech_upload_params -> S3 -> finish_speech_upload flow,
+move_to_trash_bin, create_speaker, folders, list_groups and notification
+settings. Latency, 5xx errors and 429s can be injected.
+
+    python -m benchmarks.fake_server --port 8080 --speeches 5000 --latency 0.02
+"""
+
+import argparse
+import base64
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+import zipfile
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+API_PREFIX = '/forward/api/v1/'
+S3_PREFIX = '/s3/'
+USERID = 1000
+CSRF_TOKEN = 'fake-csrf-token'
+WORDS = ('the', 'meeting', 'project', 'budget', 'timeline', 'customer', 'review', 'next', 'quarter',
+         'launch', 'design', 'team', 'update', 'question', 'follow', 'plan', 'agree', 'data')
+
+def make_speech(i, now):
+    created = now - i * 3600
+    return {
+        'speech_id': f'speech{i:08d}',
+        'otid': f'otid{i:08d}',
+        'title': f'Meeting {i}',
+        'created_at': created,
+        'modified_time': created + 60,
+        'duration': 600 + (i % 50) * 60,
+        'folder_id': i % 7 or None,
+        'summary': f'Summary of meeting {i}',
+    }
+
+def make_transcripts(speech, segments):
+    # Deterministic per speech; offsets are in milliseconds
+    rng = random.Random(speech['otid'])
+    transcripts = []
+    offset = 0
+    for n in range(segments):
+        length = rng.randint(2000, 20000)
+        words = ' '.join(rng.choice(WORDS) for _ in range(length // 400 + 1))
+        speaker = rng.randint(1, 3)
+        transcripts.append({'transcript': words.capitalize() + '.', 'start_offset': offset,
+                            'end_offset': offset + length, 'speaker_id': speaker,
+                            'speaker_model_label': f'Speaker {speaker}', 'uuid': f'{speech["otid"]}-{n}'})
+        offset += length
+    return transcripts
+
+def _timestamp(ms, srt=False):
+    seconds, ms = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    if srt:
+        return f'{hours:02d}:{minutes:02d}:{seconds:02d},{ms:03d}'
+    return f'{hours}:{minutes:02d}:{seconds:02d}' if hours else f'{minutes}:{seconds:02d}'
+
+def export_files(speech, transcripts, formats, audio_bytes):
+    """``{extension: bytes}`` for one speech in the requested formats"""
+    txt = ''.join(f"{t['speaker_model_label']}  {_timestamp(t['start_offset'])}\n{t['transcript']}\n\n"
+                  for t in transcripts)
+    srt = ''.join(f"{n}\n{_timestamp(t['start_offset'], True)} --> {_timestamp(t['end_offset'], True)}\n"
+                  f"{t['speaker_model_label']}: {t['transcript']}\n\n" for n, t in enumerate(transcripts, 1))
+    files = {'txt': txt.encode(), 'srt': srt.encode(), 'pdf': b'%PDF-1.4 fake\n' + txt.encode(),
+             'docx': b'PK fake docx ' + txt.encode(), 'mp3': audio_bytes}
+    return {fmt: files[fmt] for fmt in formats if fmt in files}
+
+class _Unseekable:
+    # zipfile writes data descriptors when it cannot seek back to a header
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+    def flush(self):
+        pass
+
+class FakeOtter:
+    """In-memory account state and fault injection shared by request handlers"""
+
+    def __init__(self, speeches=500, export_size=1024 * 1024, segments=200, latency=0.0,
+                 error_rate=0.0, throttle_rate=0.0, retry_after=0, seed=0, descriptors=False):
+        now = int(time.time())
+        self.speeches = [make_speech(i, now) for i in range(speeches)]
+        self.by_otid = {s['otid']: s for s in self.speeches}
+        self.speakers = [{'id': n, 'speaker_name': f'Speaker {n}'} for n in range(1, 4)]
+        self.segments = segments
+        self.export_size = export_size
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        # Write exports like a streaming server: sizes and CRCs in data descriptors
+        self.descriptors = descriptors
+        self.uploads = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.audio = bytes(random.Random(seed).getrandbits(8) for _ in range(min(export_size, 65536)))
+
+    def audio_bytes(self):
+        repeats, rest = divmod(self.export_size, len(self.audio) or 1)
+        return self.audio * repeats + self.audio[:rest]
+
+    def fault(self):
+        """None, 429 or 503 for the next request"""
+        with self.lock:
+            self.requests += 1
+            roll = self.random.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 503
+        return None
+
+    def page(self, page_size, last_load_ts=None, modified_after=None):
+        with self.lock:
+            speeches = [s for s in self.speeches
+                        if (last_load_ts is None or s['created_at'] < last_load_ts)
+                        and (modified_after is None or s['modified_time'] > modified_after)]
+        page = speeches[:page_size]
+        return {'status': 'OK', 'speeches': page, 'end_of_list': len(speeches) <= page_size,
+                'last_load_ts': page[-1]['created_at'] if page else None}
+
+    def speech(self, otid):
+        speech = self.by_otid.get(otid)
+        if speech is None:
+            return None
+        return dict(speech, transcripts=make_transcripts(speech, self.segments), speakers=self.speakers)
+
+    def export(self, otids, formats):
+        buffer = io.BytesIO()
+        audio = self.audio_bytes() if 'mp3' in formats else b''
+        with zipfile.ZipFile(_Unseekable(buffer) if self.descriptors else buffer, 'w', zipfile.ZIP_STORED) as archive:
+            for otid in otids:
+                speech = self.by_otid[otid]
+                files = export_files(speech, make_transcripts(speech, self.segments), formats, audio)
+                prefix = f"{speech['title']}/" if len(otids) > 1 else ''
+                for fmt, data in files.items():
+                    archive.writestr(f"{prefix}{speech['title']}.{fmt}", data)
+        return buffer.getvalue()
+
+    def add_upload(self, key):
+        with self.lock:
+            self.uploads += 1
+            speech = make_speech(len(self.speeches), int(time.time()) + self.uploads)
+            speech['title'] = key
+            self.speeches.insert(0, speech)
+            self.by_otid[speech['otid']] = speech
+        return speech
+
+    def trash(self, otid):
+        with self.lock:
+            speech = self.by_otid.pop(otid, None)
+            if speech is not None:
+                self.speeches.remove(speech)
+        return speech is not None
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes on kept-alive connections
+    disable_nagle_algorithm = True
+    otter = None
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body=b'', content_type='application/json', headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+        headers = dict(headers or {})
+        if status == 200 and self.command == 'GET':
+            # Lets clients revalidate cached responses
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            headers['ETag'] = etag
+            if self.headers.get('If-None-Match') == etag:
+                status, body = 304, b''
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_form(self):
+        # Always consumes the body so the connection can be reused
+        length = int(self.headers.get('Content-Length') or 0)
+        if self.headers.get('Content-Type', '').startswith('application/x-www-form-urlencoded'):
+            return parse_qs(self.rfile.read(length).decode())
+        while length:
+            length -= len(self.rfile.read(min(length, 1024 * 1024)))
+        return {}
+
+    def handle_request(self, method):
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        form = self.read_form() if method == 'POST' else {}
+        if self.otter.latency:
+            time.sleep(self.otter.latency)
+        fault = self.otter.fault()
+        if fault == 429:
+            return self.reply(429, {'status': 'throttled'}, headers={'Retry-After': str(self.otter.retry_after)})
+        if fault:
+            return self.reply(fault, {'status': 'error'})
+        if url.path.startswith(S3_PREFIX):
+            return self.s3(method, url.path[len(S3_PREFIX):])
+        if not url.path.startswith(API_PREFIX):
+            return self.reply(404, {'status': 'not found'})
+        handler = getattr(self, f'api_{url.path[len(API_PREFIX):]}', None)
+        if handler is None:
+            return self.reply(404, {'status': 'not found'})
+        if handler.__name__ != 'api_login' and not self.authorized():
+            return self.reply(401, {'status': 'unauthorized'})
+        return handler(query, form)
+
+    def authorized(self):
+        return bool(self.headers.get('Authorization')) or f'csrftoken={CSRF_TOKEN}' in self.headers.get('Cookie', '')
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def do_OPTIONS(self):
+        self.handle_request('OPTIONS')
+
+    def api_login(self, query, form):
+        auth = self.headers.get('Authorization', '')
+        if not auth.startswith('Basic ') or ':' not in base64.b64decode(auth[6:]).decode():
+            return self.reply(401, {'status': 'unauthorized'})
+        return self.reply(200, {'userid': USERID, 'email': query.get('username')},
+                          headers={'Set-Cookie': f'csrftoken={CSRF_TOKEN}; Path=/'})
+
+    def api_user(self, query, form):
+        return self.reply(200, {'user': {'id': USERID, 'name': 'Fake User'}})
+
+    def api_speakers(self, query, form):
+        return self.reply(200, {'speakers': self.otter.speakers})
+
+    def api_speeches(self, query, form):
+        last_load_ts = query.get('last_load_ts')
+        modified_after = query.get('modified_after')
+        return self.reply(200, self.otter.page(int(query.get('page_size', 45)),
+                                               float(last_load_ts) if last_load_ts else None,
+                                               float(modified_after) if modified_after else None))
+
+    def api_speech(self, query, form):
+        speech = self.otter.speech(query.get('otid'))
+        if speech is None:
+            return self.reply(404, {'status': 'not found'})
+        return self.reply(200, {'status': 'OK', 'speech': speech})
+
+    def api_advanced_search(self, query, form):
+        speech = self.otter.speech(query.get('otid'))
+        needle = (query.get('query') or '').lower()
+        hits = [{'transcript': t['transcript'], 'start_offset': t['start_offset'], 'end_offset': t['end_offset']}
+                for t in (speech['transcripts'] if speech else []) if needle in t['transcript'].lower()]
+        return self.reply(200, {'status': 'OK', 'hits': hits[:int(query.get('size', 500))]})
+
+    def api_bulk_export(self, query, form):
+        if self.headers.get('x-csrftoken') != CSRF_TOKEN:
+            return self.reply(403, {'status': 'csrf'})
+        otids = form.get('speech_otid_list', [])
+        formats = form.get('formats', ['txt,pdf,mp3,docx,srt'])[0].split(',')
+        if not otids or any(otid not in self.otter.by_otid for otid in otids):
+            return self.reply(404, {'status': 'not found'})
+        return self.reply(200, self.otter.export(otids, formats), 'application/zip')
+
+    def api_speech_upload_params(self, query, form):
+        return self.reply(200, {'status': 'OK', 'data': {
+            'key': f'{USERID}/upload-${{filename}}', 'acl': 'private', 'policy': 'fake-policy',
+            'signature': 'fake-signature', 'success_action_status': 201,
+            'form_action': 'https://s3.us-west-2.amazonaws.com/speech-upload-prod'}})
+
+    def api_finish_speech_upload(self, query, form):
+        speech = self.otter.add_upload(query.get('key'))
+        return self.reply(200, {'status': 'OK', 'otid': speech['otid']})
+
+    def api_move_to_trash_bin(self, query, form):
+        if not self.otter.trash(form.get('otid', [None])[0]):
+            return self.reply(404, {'status': 'not found'})
+        return self.reply(200, {'status': 'OK'})
+
+    def api_create_speaker(self, query, form):
+        name = form.get('speaker_name', ['Unnamed'])[0]
+        with self.otter.lock:
+            speaker = {'id': len(self.otter.speakers) + 1, 'speaker_name': name}
+            self.otter.speakers.append(speaker)
+        return self.reply(200, {'status': 'OK', 'speaker': speaker})
+
+    def api_folders(self, query, form):
+        return self.reply(200, {'folders': [{'id': n, 'folder_name': f'Folder {n}'} for n in range(1, 7)]})
+
+    def api_list_groups(self, query, form):
+        return self.reply(200, {'groups': [{'id': 1, 'name': 'Team'}]})
+
+    def api_get_notification_settings(self, query, form):
+        return self.reply(200, {'email': True})
+
+    def s3(self, method, bucket):
+        if method == 'OPTIONS':
+            return self.reply(200, headers={'Access-Control-Allow-Origin': 'https://otter.ai',
+                                            'Access-Control-Allow-Methods': 'POST'})
+        if method != 'POST':
+            return self.reply(405)
+        length = int(self.headers.get('Content-Length') or 0)
+        key = f'{USERID}/upload-{length}-{time.time_ns()}'
+        body = (f'<PostResponse><Location>http://{self.headers.get("Host")}/s3/{bucket}/{key}</Location>'
+                f'<Bucket>{bucket}</Bucket><Key>{key}</Key><ETag>"fake"</ETag></PostResponse>').encode()
+        return self.reply(201, body, 'application/xml')
+
+class FakeOtterServer:
+    """Runs the fake API on a background thread
+
+        with FakeOtterServer(speeches=1000) as server:
+            otter = OtterAI()
+            server.configure(otter)
+            otter.login('user', 'pass')
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, **options):
+        self.otter = FakeOtter(**options)
+        handler = type('BoundHandler', (Handler,), {'otter': self.otter})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def api_base_url(self):
+        return self.url + API_PREFIX
+
+    @property
+    def s3_base_url(self):
+        return self.url + S3_PREFIX
+
+    def configure(self, client):
+        """Point an OtterAI/AsyncOtterAI instance at this server"""
+        client.API_BASE_URL = self.api_base_url
+        client.S3_BASE_URL = self.s3_base_url
+        return client
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--speeches', type=int, default=500)
+    parser.add_argument('--export-size', type=int, default=1024 * 1024, help='mp3 bytes per speech export')
+    parser.add_argument('--segments', type=int, default=200, help='transcript segments per speech')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of requests answered with 429')
+    parser.add_argument('--retry-after', type=int, default=0)
+    args = parser.parse_args()
+    server = FakeOtterServer(args.host, args.port, speeches=args.speeches, export_size=args.export_size,
+                             segments=args.segments, latency=args.latency, error_rate=args.error_rate,
+                             throttle_rate=args.throttle_rate, retry_after=args.retry_after)
+    print(f"Fake Otter API on {server.api_base_url} (S3 at {server.s3_base_url})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""End-to-end throughput benchmarks against the local fake Otter API
+
+Each scenario runs in its own process against a fake server running in
+another process, and reports throughput, peak RSS of the client process and
+per-operation latency percentiles.
+
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --scenario download --export-size 20000000 --latency 0.05
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_server import FakeOtterServer
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def latency_summary(latencies):
+    return {'p50_ms': percentile(latencies, 0.50) * 1000, 'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000, 'max_ms': max(latencies, default=0) * 1000,
+            'mean_ms': statistics.fmean(latencies) * 1000 if latencies else 0.0}
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+def make_client(api_base_url, s3_base_url):
+    from otterai import OtterAI
+    from otterai.ratelimit import RetryPolicy
+    otter = OtterAI(retry_policy=RetryPolicy(backoff_base=0.05), rate_limiter=False)
+    otter.API_BASE_URL = api_base_url
+    otter.S3_BASE_URL = s3_base_url
+    otter.login('bench@example.com', 'password')
+    return otter
+
+def timed(fn, latencies):
+    started = time.perf_counter()
+    try:
+        return fn()
+    finally:
+        latencies.append(time.perf_counter() - started)
+
+def bench_listing(otter, options, workdir):
+    latencies = []
+    pages = speeches = 0
+    started = time.perf_counter()
+    iterator = otter.iter_speech_pages(page_size=options['page_size'], source='all')
+    while True:
+        data = timed(lambda: next(iterator, None), latencies)
+        if data is None:
+            latencies.pop()
+            break
+        pages += 1
+        speeches += len(data.get('speeches', []))
+    elapsed = time.perf_counter() - started
+    return {'pages': pages, 'speeches': speeches, 'seconds': elapsed,
+            'pages_per_sec': pages / elapsed, 'speeches_per_sec': speeches / elapsed,
+            'latency': latency_summary(latencies)}
+
+def _speeches(otter, count):
+    speeches = []
+    for speech in otter.iter_speeches(source='all'):
+        speeches.append(speech)
+        if len(speeches) >= count:
+            break
+    return speeches
+
+def _download_result(downloaded, elapsed, workdir, latencies):
+    total_bytes = sum(os.path.getsize(os.path.join(root, name))
+                      for root, _, names in os.walk(workdir) for name in names if name.endswith('.zip'))
+    return {'downloads': downloaded, 'seconds': elapsed, 'downloads_per_sec': downloaded / elapsed,
+            'mb_per_sec': total_bytes / elapsed / (1024 * 1024), 'bytes': total_bytes,
+            'latency': latency_summary(latencies)}
+
+def bench_download(otter, options, workdir):
+    from otterai.downloader import BulkDownloader, DownloadTracker
+    speeches = _speeches(otter, options['downloads'])
+    tracker = DownloadTracker.load(os.path.join(workdir, 'state.db'))
+    latencies = []
+
+    def task(speech):
+        name = os.path.join(workdir, speech['otid'])
+        return timed(lambda: otter.download_speech(speech['otid'], name=name), latencies)
+
+    started = time.perf_counter()
+    BulkDownloader(otter, workers=options['workers']).run(speeches, task, tracker)
+    return _download_result(tracker.count('downloaded'), time.perf_counter() - started, workdir, latencies)
+
+def bench_batch_download(otter, options, workdir):
+    speeches = _speeches(otter, options['downloads'])
+    latencies = []
+    started = time.perf_counter()
+    result = timed(lambda: otter.download_speeches(speeches, base_dir=workdir, batch_size=options['batch_size']),
+                   latencies)
+    return _download_result(len(result['data']['downloaded']), time.perf_counter() - started, workdir, latencies)
+
+def bench_bulk_script(otter, options, workdir):
+    # The per-speech path of download_from_list.py / retry_failed.py
+    import contextlib
+    import io
+    with contextlib.redirect_stdout(io.StringIO()):
+        import download_from_list
+    from otterai.downloader import BulkDownloader, DownloadTracker
+    speeches = _speeches(otter, options['downloads'])
+    tracker = DownloadTracker.load(os.path.join(workdir, 'state.db'))
+    latencies = []
+
+    def task(speech):
+        directory = download_from_list.create_speech_dir(speech, base_dir=workdir)
+        return timed(lambda: download_from_list.download_speech(otter, speech, directory), latencies)
+
+    started = time.perf_counter()
+    # redirect_stdout swaps a global, so silence the script once for all workers
+    with contextlib.redirect_stdout(io.StringIO()):
+        BulkDownloader(otter, workers=options['workers']).run(speeches, task, tracker)
+    return _download_result(tracker.count('downloaded'), time.perf_counter() - started, workdir, latencies)
+
+def bench_upload(otter, options, workdir):
+    paths = []
+    for n in range(options['uploads']):
+        path = os.path.join(workdir, f'recording{n}.m4a')
+        with open(path, 'wb') as f:
+            f.write(os.urandom(options['upload_size']))
+        paths.append(path)
+    started = time.perf_counter()
+    result = otter.upload_speeches(paths, concurrency=options['workers'])
+    elapsed = time.perf_counter() - started
+    ok = sum(1 for r in result['data'] if r['status'] == 200)
+    return {'uploads': ok, 'seconds': elapsed, 'uploads_per_sec': ok / elapsed,
+            'mb_per_sec': ok * options['upload_size'] / elapsed / (1024 * 1024)}
+
+SCENARIOS = {
+    'listing': bench_listing,
+    'download': bench_download,
+    'batch_download': bench_batch_download,
+    'bulk_script': bench_bulk_script,
+    'upload': bench_upload,
+}
+
+def _serve(options, ready, stop):
+    server = FakeOtterServer(speeches=options['speeches'], export_size=options['export_size'],
+                             segments=options['segments'], latency=options['latency'],
+                             error_rate=options['error_rate'], throttle_rate=options['throttle_rate'])
+    server.start()
+    ready.send((server.api_base_url, server.s3_base_url))
+    stop.wait()
+    server.stop()
+
+def _run_scenario(name, options, urls, results):
+    workdir = tempfile.mkdtemp(prefix=f'otter-bench-{name}-')
+    try:
+        otter = make_client(*urls)
+        result = SCENARIOS[name](otter, options, workdir)
+        result['peak_rss_mb'] = peak_rss_mb()
+        result['request_stats'] = otter.request_stats()
+        results.put((name, result))
+    except BaseException as e:
+        results.put((name, {'error': f'{type(e).__name__}: {e}'}))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def run(options, scenarios):
+    ctx = multiprocessing.get_context('spawn')
+    ready_recv, ready_send = ctx.Pipe(duplex=False)
+    stop = ctx.Event()
+    server = ctx.Process(target=_serve, args=(options, ready_send, stop), daemon=True)
+    server.start()
+    urls = ready_recv.recv()
+    results = {}
+    try:
+        for name in scenarios:
+            queue = ctx.Queue()
+            worker = ctx.Process(target=_run_scenario, args=(name, options, urls, queue))
+            worker.start()
+            results[name] = queue.get()[1]
+            worker.join()
+    finally:
+        stop.set()
+        server.join(timeout=5)
+    return results
+
+def print_results(results):
+    print(f"{'scenario':<16}{'ops/s':>10}{'MB/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'RSS MB':>10}")
+    for name, result in results.items():
+        if 'error' in result:
+            print(f"{name:<16}  error: {result['error']}")
+            continue
+        ops = next(v for k, v in result.items() if k.endswith('_per_sec') and k != 'mb_per_sec')
+        latency = result.get('latency')
+        percentiles = ''.join(f"{latency[k]:>10.1f}" if latency else f"{'-':>10}" for k in ('p50_ms', 'p95_ms', 'p99_ms'))
+        print(f"{name:<16}{ops:>10.1f}{result.get('mb_per_sec', 0):>10.1f}{percentiles}{result['peak_rss_mb']:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='scenario to run (repeatable, default all)')
+    parser.add_argument('--speeches', type=int, default=2000)
+    parser.add_argument('--page-size', type=int, default=45)
+    parser.add_argument('--downloads', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=10)
+    parser.add_argument('--uploads', type=int, default=20)
+    parser.add_argument('--upload-size', type=int, default=4 * 1024 * 1024)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--export-size', type=int, default=2 * 1024 * 1024)
+    parser.add_argument('--segments', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--json', help='write full results to this file')
+    args = parser.parse_args()
+    options = {k: v for k, v in vars(args).items() if k not in ('scenario', 'json')}
+
+    results = run(options, args.scenario or list(SCENARIOS))
+    print_results(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'options': options, 'results': results}, f, indent=2)
+        print(f"\nFull results saved to {args.json}")
+
+if __name__ == '__main__':
+    main()
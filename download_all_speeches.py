@@ -7,6 +7,10 @@ import requests
 from datetime import datetime
 from tqdm import tqdm  # Add this import
 from login_script import main as login
+from otterai.downloader import BulkDownloader, DownloadTracker, DEFAULT_WORKERS
+from otterai.state import DOWNLOADED, FAILED
+from otterai.manifest import DownloadIndex
+from otterai.metrics import MetricsCollector
 
 def create_speech_directory(speech, base_dir="downloads"):
     """Create a directory for each speech using title and date"""
@@ -36,7 +40,7 @@ def download_speech_content(otter, speech, output_dir):
         # Save metadata
         metadata_file = os.path.join(output_dir, "metadata.json")
         with open(metadata_file, 'w') as f:
-            json.dump(speech, f, indent=2)
+            json.dump(speech.to_dict(), f, indent=2)
         print(f"✓ Saved metadata to {metadata_file}")
         
         # Download content
@@ -61,82 +65,17 @@ def download_speech_content(otter, speech, output_dir):
         print(f"✗ Error: {e}")
         return False
 
-def load_download_tracker(base_dir):
-    """Load the download tracker file"""
-    tracker_file = os.path.join(base_dir, ".download_tracker.json")
-    if os.path.exists(tracker_file):
-        with open(tracker_file, 'r') as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                print("Warning: Corrupt tracker file, starting fresh")
-                return {'downloaded': [], 'failed': []}
-    return {'downloaded': [], 'failed': []}
-
-def save_download_tracker(base_dir, tracker_data):
-    """Save the download tracker file"""
-    tracker_file = os.path.join(base_dir, ".download_tracker.json")
-    with open(tracker_file, 'w') as f:
-        json.dump(tracker_data, f, indent=2)
-
 def get_all_speeches(otter):
     """Fetch all speeches using pagination"""
     all_speeches = []
-    folder = 0
-    page_size = 45
-    source = "all"
-    seen_ids = set()
-    last_ts = None
-    page = 1
     
-    with tqdm(desc="Fetching speeches", unit="page", ncols=100) as pbar:
-        while True:
-            print(f"\nFetching page {page} (timestamp: {last_ts})")
-            response = otter.get_speeches(
-                folder=folder,
-                page_size=page_size,
-                source=source,
-                last_load_ts=last_ts
-            )
-            
-            data = response['data']
-            speeches = data.get('speeches', [])
-            
-            if not speeches:
-                print("\nNo more speeches found")
-                break
-                
-            # Add new speeches
-            new_speeches = []
-            for speech in speeches:
-                speech_id = speech.get('speech_id')
-                if speech_id not in seen_ids:
-                    seen_ids.add(speech_id)
-                    new_speeches.append(speech)
-            
-            if new_speeches:
-                print(f"\nFetched {len(new_speeches)} new speeches:")
-                for s in new_speeches[:5]:
-                    print(f"- {s.get('title')} (ID: {s.get('speech_id')})")
-                if len(new_speeches) > 5:
-                    print(f"  ... and {len(new_speeches)-5} more")
-                    
-                all_speeches.extend(new_speeches)
-                pbar.set_postfix({'total_unique': len(all_speeches), 
-                                'new_this_page': len(new_speeches)})
-            else:
-                print("\nNo new speeches in this page")
-                
+    # Compact Speech models keep a large account's listing small in memory
+    with tqdm(desc="Fetching speeches", unit="speech", ncols=100) as pbar:
+        for speech in otter.iter_speeches(folder=0, page_size=45, source="all", models=True):
+            all_speeches.append(speech)
             pbar.update(1)
-            
-            # Get next page timestamp
-            last_ts = data.get('last_load_ts')
-            if not last_ts or data.get('end_of_list', True):
-                print(f"\nReached end of list")
-                break
-                
-            page += 1
     
+    print(f"\nFetched {len(all_speeches)} unique speeches")
     return all_speeches
 
 def main():
@@ -148,8 +87,9 @@ def main():
         base_dir = "downloads"
         os.makedirs(base_dir, exist_ok=True)
         
-        # Load download tracker
-        tracker = load_download_tracker(base_dir)
+        # Load download state, importing the old JSON tracker on first run
+        tracker = DownloadTracker.load(os.path.join(base_dir, ".download_state.db"),
+                                       legacy_json=os.path.join(base_dir, ".download_tracker.json"))
         
         print("\nFetching all speeches...")
         speeches = get_all_speeches(otter)
@@ -162,55 +102,55 @@ def main():
         
         # Check existing downloads
         print("\nChecking existing downloads...")
-        for dirpath, dirnames, filenames in os.walk(base_dir):
-            if 'metadata.json' in filenames:
-                try:
-                    with open(os.path.join(dirpath, 'metadata.json')) as f:
-                        metadata = json.load(f)
-                        if 'speech_id' in metadata:
-                            tracker['downloaded'].append(metadata['speech_id'])
-                except:
-                    continue
-        
-        print(f"Found {len(tracker['downloaded'])} existing downloads")
-        
-        # Filter out already downloaded speeches
-        speeches_to_process = [
-            s for s in speeches 
-            if s['speech_id'] not in tracker['downloaded'] 
-            and s['speech_id'] not in tracker['failed']
-        ]
+        index = DownloadIndex(base_dir)
+        index.refresh()
+        for speech_id, modified in index.speeches().items():
+            if not tracker.is_downloaded(speech_id):
+                tracker.record(speech_id, True, modified=modified)
+        
+        print(f"Found {tracker.count(DOWNLOADED)} existing downloads")
+        
+        # Filter out already downloaded or failed speeches
+        speeches_to_process = [s for s in speeches if tracker.is_pending(s['speech_id'])]
         
         print(f"Remaining to download: {len(speeches_to_process)}")
-        print(f"Previously downloaded: {len(tracker['downloaded'])}")
-        print(f"Previously failed: {len(tracker['failed'])}")
+        print(f"Previously downloaded: {tracker.count(DOWNLOADED)}")
+        print(f"Previously failed: {tracker.count(FAILED)}")
         
         if not speeches_to_process:
             print("No new speeches to download!")
             return
         
-        # Process each speech with progress bar
+        # Download speeches in parallel with progress bar
+        workers = int(os.getenv('OTTER_DOWNLOAD_WORKERS', DEFAULT_WORKERS))
+        downloader = BulkDownloader(otter, workers=workers)
+        
+        def task(speech):
+            speech_dir = create_speech_directory(speech, base_dir)
+            ok = download_speech_content(otter, speech, speech_dir)
+            index.update(speech_dir)
+            return ok
+        
+        metrics = MetricsCollector()
+        otter.add_hook(metrics)
+        
         with tqdm(total=len(speeches_to_process), desc="Downloading speeches") as pbar:
-            for speech in speeches_to_process:
-                speech_dir = create_speech_directory(speech, base_dir)
-                
-                if download_speech_content(otter, speech, speech_dir):
-                    tracker['downloaded'].append(speech['speech_id'])
-                    pbar.set_postfix(successful=len(tracker['downloaded']))
-                else:
-                    tracker['failed'].append(speech['speech_id'])
-                    pbar.set_postfix(failed=len(tracker['failed']))
-                
-                # Save progress after each speech
-                save_download_tracker(base_dir, tracker)
-                pbar.update(1)
+            tracker.pbar = pbar
+            tracker.metrics = metrics
+            downloader.run(speeches_to_process, task, tracker)
+        
+        metrics_file = os.getenv('OTTER_METRICS_FILE')
+        if metrics_file:
+            metrics.write_prometheus(metrics_file)
+            print(f"Request metrics written to {metrics_file}")
         
         print(f"\nDownload complete!")
-        print(f"Total successful: {len(tracker['downloaded'])}")
-        print(f"Total failed: {len(tracker['failed'])}")
+        print(f"Total successful: {tracker.count(DOWNLOADED)}")
+        print(f"Total failed: {tracker.count(FAILED)}")
         
-        if tracker['failed']:
-            print("\nTo retry failed downloads, delete their IDs from .download_tracker.json")
+        if tracker.count(FAILED):
+            print("\nTo retry failed downloads, delete their rows from .download_state.db:")
+            print("  sqlite3 downloads/.download_state.db \"DELETE FROM speeches WHERE status = 'failed'\"")
             
     except Exception as e:
         print(f"Error: {str(e)}", file=sys.stderr)
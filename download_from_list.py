@@ -6,6 +6,17 @@ import json
 from datetime import datetime
 from tqdm import tqdm
 from login_script import main as login
+from otterai.downloader import BulkDownloader, DownloadTracker, DEFAULT_WORKERS
+from otterai.state import DOWNLOADED, FAILED
+from otterai.manifest import DownloadIndex
+from otterai.metrics import MetricsCollector
+from otterai.catalog import SpeechCatalog, CATALOG_FILENAME, LEGACY_JSON
+
+# Download state store, and the JSON tracker it replaces
+PROGRESS_DB = 'download_progress.db'
+PROGRESS_JSON = 'download_progress.json'
+# Set OTTER_EXTRACT=1 to unpack exports into the speech directory as they stream in
+EXTRACT = os.getenv('OTTER_EXTRACT', '') not in ('', '0')
 
 def get_speech_id(speech):
     """Get the correct ID for downloading a speech"""
@@ -71,6 +82,19 @@ def download_speech(otter, speech, directory):
         
         # Download content
         base_name = os.path.join(directory, speech_id)
+        if EXTRACT:
+            print(f"Extracting content to: {base_name}.*")
+            result = otter.download_speech(
+                speech_id=speech_id,
+                name=base_name,
+                fileformat="txt,pdf,mp3,docx,srt",
+                extract=True
+            )
+            files = result['data']['files']
+            size = sum(os.path.getsize(path) for path in files) / (1024*1024)
+            print(f"✓ Extracted {len(files)} files ({size:.1f}MB)")
+            return True
+        
         print(f"Downloading content to: {base_name}.zip")
         
         result = otter.download_speech(
@@ -93,37 +117,49 @@ def download_speech(otter, speech, directory):
         print(f"✗ Error downloading speech: {e}")
         return False
 
+def download_speech_batch(otter, speeches, base_dir="downloads"):
+    """Download several speeches through combined bulk_export requests"""
+    for speech in speeches:
+        with open(os.path.join(create_speech_dir(speech, base_dir), "metadata.json"), 'w') as f:
+            json.dump(speech, f, indent=2)
+    
+    # The combined export is staged under base_dir, not the working directory
+    result = otter.download_speeches(
+        speeches,
+        base_dir=base_dir,
+        batch_size=len(speeches),
+        speech_dir=lambda speech: create_speech_dir(speech, base_dir),
+        fileformat="txt,pdf,mp3,docx,srt"
+    )
+    downloaded = result['data']['downloaded']
+    for speech_id, error in result['data']['failed'].items():
+        print(f"✗ Error downloading speech {speech_id}: {error}")
+    return {s['speech_id']: get_speech_id(s) in downloaded for s in speeches}
+
 def main():
-    # Load speech list
-    if not os.path.exists('speeches_list.json'):
-        print("speeches_list.json not found! Run list_all_speeches.py first")
+    # Load speech catalog, importing the old JSON list on first run
+    if not os.path.exists(CATALOG_FILENAME) and not os.path.exists(LEGACY_JSON):
+        print(f"{CATALOG_FILENAME} not found! Run list_all_speeches.py first")
         sys.exit(1)
         
-    with open('speeches_list.json') as f:
-        data = json.load(f)
-        speeches = data.get('speeches', [])
+    catalog = SpeechCatalog.open(CATALOG_FILENAME, legacy_json=LEGACY_JSON)
+    total = len(catalog)
 
-    if not speeches:
-        print("No speeches found in speeches_list.json")
+    if not total:
+        print(f"No speeches found in {CATALOG_FILENAME}")
         sys.exit(1)
 
-    print(f"Found {len(speeches)} speeches to process")
-    
-    # Load progress tracker
-    progress_file = 'download_progress.json'
-    if os.path.exists(progress_file):
-        with open(progress_file) as f:
-            progress = json.load(f)
-    else:
-        progress = {'downloaded': [], 'failed': []}
-    
-    # Filter already processed
-    to_download = [s for s in speeches 
-                  if s['speech_id'] not in progress['downloaded']
-                  and s['speech_id'] not in progress['failed']]
-    
-    print(f"Already downloaded: {len(progress['downloaded'])}")
-    print(f"Previously failed: {len(progress['failed'])}")
+    print(f"Found {total} speeches to process")
+    
+    # Load progress tracker, importing the old JSON file on first run
+    tracker = DownloadTracker.load(PROGRESS_DB, legacy_json=PROGRESS_JSON)
+    
+    # Filter already processed; only pending speeches are decoded in full
+    processed = set(tracker.store.ids(DOWNLOADED)) | set(tracker.store.ids(FAILED))
+    to_download = list(catalog.speeches(ids=[sid for sid in catalog.ids() if sid not in processed]))
+    
+    print(f"Already downloaded: {tracker.count(DOWNLOADED)}")
+    print(f"Previously failed: {tracker.count(FAILED)}")
     print(f"Remaining to download: {len(to_download)}")
     
     if not to_download:
@@ -145,29 +181,44 @@ def main():
     if input("\nContinue? [Y/n]: ").lower().startswith('n'):
         return
     
+    workers = int(os.getenv('OTTER_DOWNLOAD_WORKERS', DEFAULT_WORKERS))
+    downloader = BulkDownloader(otter, workers=workers)
+    
+    batch_size = int(os.getenv('OTTER_DOWNLOAD_BATCH_SIZE', 1))
+    
+    index = DownloadIndex("downloads")
+    
+    def task(speech):
+        directory = create_speech_dir(speech)
+        ok = download_speech(otter, speech, directory)
+        index.update(directory)
+        return ok
+    
+    def batch_task(batch):
+        results = download_speech_batch(otter, batch)
+        for speech in batch:
+            index.update(create_speech_dir(speech))
+        return results
+    
+    metrics = MetricsCollector()
+    otter.add_hook(metrics)
+    
     with tqdm(total=len(to_download), desc="Downloading") as pbar:
-        for speech in to_download:
-            speech_id = speech['speech_id']
-            directory = create_speech_dir(speech)
-            
-            pbar.set_description(f"Downloading {speech_id}")
-            
-            if download_speech(otter, speech, directory):
-                progress['downloaded'].append(speech_id)
-                pbar.set_postfix(success=len(progress['downloaded']))
-            else:
-                progress['failed'].append(speech_id)
-                pbar.set_postfix(failed=len(progress['failed']))
-            
-            # Save progress after each download
-            with open(progress_file, 'w') as f:
-                json.dump(progress, f, indent=2)
-                
-            pbar.update(1)
+        tracker.pbar = pbar
+        tracker.metrics = metrics
+        if batch_size > 1:
+            downloader.run_batches(to_download, batch_task, tracker, batch_size)
+        else:
+            downloader.run(to_download, task, tracker)
+    
+    metrics_file = os.getenv('OTTER_METRICS_FILE')
+    if metrics_file:
+        metrics.write_prometheus(metrics_file)
+        print(f"Request metrics written to {metrics_file}")
     
     print("\nDownload complete!")
-    print(f"Successfully downloaded: {len(progress['downloaded'])}")
-    print(f"Failed downloads: {len(progress['failed'])}")
+    print(f"Successfully downloaded: {tracker.count(DOWNLOADED)}")
+    print(f"Failed downloads: {tracker.count(FAILED)}")
     
 if __name__ == "__main__":
     try:
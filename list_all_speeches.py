@@ -2,52 +2,37 @@
 
 import sys
 import json
-from datetime import datetime, timezone
+import time
+from datetime import datetime
 from login_script import main as login
+from otterai.catalog import SpeechCatalog, CATALOG_FILENAME
 
-def inspect_api_call(otter, last_ts=None):
+# Query parameters and headers the web interface sends when listing
+WEB_PARAMS = {'speech_metadata': 'true', 'funnel': 'home_feed'}
+WEB_HEADERS = {'x-client-version': 'Otter v3.68.1', 'referer': 'https://otter.ai/'}
+
+def inspect_api_call(otter, last_ts=None, modified_after=None):
     """Make API call and inspect details"""
-    speeches_url = f"{otter.API_BASE_URL}speeches"
-    
-    # Match web interface query parameters exactly
-    params = {
-        'userid': otter._userid,
-        'folder': 0,
-        'page_size': 45,
-        'source': 'home',
-        'speech_metadata': 'true',
-        'funnel': 'home_feed'
-    }
+    # Match web interface query parameters exactly; the request goes through
+    # the client, so it is rate limited, retried and re-logged in on 401
+    params = {'folder': 0, 'page_size': 45, 'source': 'home', 'last_load_ts': last_ts,
+              'modified_after': modified_after}
 
-    # Add pagination parameters exactly as web interface does
-    if last_ts:
-        params['last_load_ts'] = last_ts
-        # Get current time in seconds since epoch
-        current_ts = int(datetime.now(timezone.utc).timestamp())
-        params['modified_after'] = current_ts
-    
-    headers = {
-        'x-client-version': 'Otter v3.68.1',
-        'x-csrftoken': otter._cookies['csrftoken'],
-        'referer': 'https://otter.ai/'
-    }
-    
     print("\nMaking request:")
-    print(f"URL: {speeches_url}")
-    print(f"Parameters: {json.dumps(params, indent=2)}")
-    
-    response = otter._session.get(speeches_url, params=params, headers=headers)
-    print(f"\nResponse Status: {response.status_code}")
-    print(f"Response Headers: {json.dumps(dict(response.headers), indent=2)}")
-    
-    try:
-        data = response.json()
-        print("\nResponse Data:")
-        print(json.dumps({k:v for k,v in data.items() if k != 'speeches'}, indent=2))
-        return data
-    except Exception as e:
-        print(f"Error parsing response: {e}")
+    print(f"URL: {otter.API_BASE_URL}speeches")
+    sent = {k: v for k, v in dict(params, **WEB_PARAMS).items() if v is not None}
+    print(f"Parameters: {json.dumps(sent, indent=2)}")
+
+    response = otter.get_speeches(extra_params=WEB_PARAMS, headers=WEB_HEADERS, **params)
+    print(f"\nResponse Status: {response['status']}")
+
+    data = response['data']
+    if response['status'] != 200 or not isinstance(data, dict):
+        print(f"Error response: {data}")
         return None
+    print("\nResponse Data:")
+    print(json.dumps({k:v for k,v in data.items() if k != 'speeches'}, indent=2))
+    return data
 
 def main():
     print("Logging in to OtterAI...")
@@ -57,6 +42,9 @@ def main():
     seen_ids = set()
     page = 1
     last_ts = None
+    # Only a listing that reached the end shows which speeches are gone
+    started = time.time()
+    complete = False
     
     try:
         while True:
@@ -70,6 +58,7 @@ def main():
             speeches = data.get('speeches', [])
             if not speeches:
                 print("No speeches found")
+                complete = True
                 break
                 
             # Process speeches
@@ -98,6 +87,7 @@ def main():
             
             if data.get('end_of_list'):
                 print("Reached end of list")
+                complete = True
                 break
                 
             if not last_ts:
@@ -114,16 +104,16 @@ def main():
         print("\nOperation cancelled")
 
     # Save results
-    if all_speeches:
-        with open('speeches_list.json', 'w') as f:
-            json.dump({
-                'total_count': len(all_speeches),
-                'speeches': all_speeches,
-                'unique_ids': list(seen_ids)
-            }, f, indent=2)
-        print(f"\nSaved {len(all_speeches)} speeches to speeches_list.json")
-    else:
-        print("\nNo speeches were collected")
+    with SpeechCatalog(CATALOG_FILENAME) as catalog:
+        if all_speeches:
+            catalog.add(all_speeches)
+            print(f"\nSaved {len(all_speeches)} speeches to {CATALOG_FILENAME}")
+        else:
+            print("\nNo speeches were collected")
+        if complete:
+            removed = catalog.prune(started)
+            if removed:
+                print(f"Removed {removed} speeches no longer listed")
 
 if __name__ == "__main__":
     main()
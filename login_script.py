@@ -1,35 +1,16 @@
 #!/usr/bin/env python3
 
-# Immediate test output at start of script
 import sys
-print("Script is running...", flush=True)
-
-try:
-    print("Testing stdout...", flush=True)
-    sys.stdout.flush()
-except Exception as e:
-    sys.stderr.write(f"Error writing to stdout: {e}\n")
-    sys.exit(1)
-
 import os
-from dotenv import load_dotenv
 
-# Initialize these before imports to catch early errors
-print("=== OtterAI Login Script ===")
-print("Initializing...")
+# Saved session reused by later runs; delete it to force a fresh login
+SESSION_FILE = os.getenv('OTTER_SESSION_FILE', '.otter_session.json')
 
-try:
+def main():
+    # Imported here so scripts importing this module start quickly
+    from dotenv import load_dotenv
     from otterai import OtterAI
-    print("✓ OtterAI package imported successfully")
-    print("Debug: OtterAI init signature:", OtterAI.__init__.__code__.co_varnames)
-except ImportError as e:
-    print("✗ Failed to import OtterAI package")
-    print(f"Error details: {e}")
-    print("\nPlease install the package using: pip install otterai")
-    sys.exit(1)
 
-def main():
-    print("\nLoading environment variables...")
     load_dotenv()
 
     email = os.getenv('OTTER_USERNAME')
@@ -40,28 +21,31 @@ def main():
         print("Please ensure OTTER_USERNAME and OTTER_PASSWORD are set")
         sys.exit(1)
 
-    print("✓ Credentials found in .env file")
-    
-    try:
-        print("\nInitializing OtterAI client...")
-        print(f"Attempting login for user: {email}")
-        # Create instance first, then login
-        otter = OtterAI()
-        otter.login(email, password)  # Call login as a separate method
-        print("✓ Successfully logged in to OtterAI")
+    otter = OtterAI()
+    # Reuse the saved session; the client logs in again by itself on a 401
+    if otter.load_session(SESSION_FILE, email, password):
         return otter
+
+    try:
+        response = otter.login(email, password)
     except Exception as e:
-        print("\n✗ Login failed!")
+        print("✗ Login failed!")
         print(f"Error details: {str(e)}")
-        print("\nDebug information:")
-        print(f"- Username configured: {'Yes' if email else 'No'}")
-        print(f"- Password configured: {'Yes' if password else 'No'}")
         sys.exit(1)
+    if response['status'] != 200:
+        print(f"✗ Login failed with status {response['status']}")
+        sys.exit(1)
+    print(f"✓ Logged in to OtterAI as {email}")
+    try:
+        otter.save_session(SESSION_FILE)
+    except OSError as e:
+        print(f"✗ Could not save session to {SESSION_FILE}: {e}")
+    return otter
 
 if __name__ == "__main__":
     try:
         otter = main()
-        print("\n=== Login Successful ===")
+        print("=== Login Successful ===")
         sys.exit(0)
     except KeyboardInterrupt:
         print("\n\nOperation cancelled by user")
@@ -1 +1,8 @@
-from otterai.otterai import OtterAI, OtterAIException
\ No newline at end of file
+from otterai.otterai import OtterAI, OtterAIException
+
+def __getattr__(name):
+    # aiohttp is slow to import; only load the async client when it is used
+    if name == 'AsyncOtterAI':
+        from otterai.async_otterai import AsyncOtterAI
+        return AsyncOtterAI
+    raise AttributeError(f"module 'otterai' has no attribute {name!r}")
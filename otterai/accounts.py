@@ -0,0 +1,198 @@
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+import threading
+import json
+import re
+import os
+from otterai.otterai import OtterAI, OtterAIException
+from otterai.ratelimit import TokenBucket
+from otterai.downloader import DownloadTracker, DEFAULT_WORKERS
+from otterai.sync import IncrementalSync, speech_modified_ts
+
+# Jobs one account may have running at once
+DEFAULT_PER_ACCOUNT = 4
+# State store kept in each account's directory
+STATE_FILENAME = '.download_state.db'
+
+def load_accounts(path):
+    """Read ``[{"username": ..., "password": ..., "name": optional}, ...]`` from a JSON file"""
+    with open(path) as f:
+        accounts = json.load(f)
+    for n, account in enumerate(accounts):
+        if not account.get('username') or not account.get('password'):
+            raise OtterAIException(f"Account {n} in {path} needs a username and password")
+    return accounts
+
+def account_name(username):
+    """Filesystem-safe name for an account"""
+    return re.sub(r'[^A-Za-z0-9@._-]', '_', username)
+
+class FairScheduler:
+    """Job queues per account, served round-robin to a shared set of workers
+
+    An account never has more than ``per_account`` jobs running, so one
+    account with a long backlog cannot starve the others. ``get`` returns
+    None once every queue is empty and no job is running (running jobs may
+    still submit more).
+    """
+
+    def __init__(self, per_account=DEFAULT_PER_ACCOUNT):
+        self.per_account = max(1, per_account)
+        self._cond = threading.Condition()
+        self._queues = OrderedDict()
+        self._running = {}
+        self._order = deque()
+        self._queued = 0
+        self._busy = 0
+
+    def submit(self, key, job):
+        with self._cond:
+            if key not in self._queues:
+                self._queues[key] = deque()
+                self._running[key] = 0
+                self._order.append(key)
+            self._queues[key].append(job)
+            self._queued += 1
+            self._cond.notify()
+
+    def get(self):
+        """Block for the next ``(key, job)``, or None when all work is done"""
+        with self._cond:
+            while True:
+                if not self._queued and not self._busy:
+                    return None
+                for _ in range(len(self._order)):
+                    key = self._order[0]
+                    self._order.rotate(-1)
+                    if self._queues[key] and self._running[key] < self.per_account:
+                        self._running[key] += 1
+                        self._busy += 1
+                        self._queued -= 1
+                        return key, self._queues[key].popleft()
+                self._cond.wait()
+
+    def done(self, key):
+        with self._cond:
+            self._running[key] -= 1
+            self._busy -= 1
+            self._cond.notify_all()
+
+class Account:
+    """One account's client, download state and output directory"""
+
+    def __init__(self, name, otter, directory):
+        self.name = name
+        self.otter = otter
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.tracker = DownloadTracker.load(os.path.join(directory, STATE_FILENAME))
+        self.sync = IncrementalSync(otter, self.tracker.store, account=name)
+
+class AccountOrchestrator:
+    """Syncs many accounts from one process over a shared worker budget
+
+    Every account gets its own OtterAI session with its own adaptive rate
+    limiter, a connection pool capped at ``per_account``, and its own state
+    store under ``base_dir/<account>``. Listing and download jobs from all
+    accounts go through a FairScheduler, so ``workers`` threads stay busy
+    across accounts while each account stays within its limits.
+    """
+
+    def __init__(self, base_dir='downloads', workers=DEFAULT_WORKERS, per_account=DEFAULT_PER_ACCOUNT,
+                 rate=None, client_factory=None):
+        self.base_dir = base_dir
+        self.workers = max(1, int(workers))
+        self.per_account = max(1, int(per_account))
+        self.rate = rate
+        self.client_factory = client_factory or self._default_client
+        self.accounts = []
+
+    def _default_client(self):
+        return OtterAI(rate_limiter=TokenBucket(rate=self.rate) if self.rate else None)
+
+    def login(self, credentials):
+        """Log every account in concurrently, returns ``{name: error}`` for the ones that failed"""
+        def login_one(account):
+            name = account.get('name') or account_name(account['username'])
+            otter = self.client_factory()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.per_account, pool_block=True)
+            otter._session.mount('https://', adapter)
+            otter._session.mount('http://', adapter)
+            response = otter.login(account['username'], account['password'])
+            if response['status'] != 200:
+                raise OtterAIException(f"login returned status {response['status']}")
+            return Account(name, otter, os.path.join(self.base_dir, name))
+
+        failed = {}
+        with ThreadPoolExecutor(max_workers=min(self.workers, max(1, len(credentials)))) as pool:
+            futures = [(account, pool.submit(login_one, account)) for account in credentials]
+            for account, future in futures:
+                try:
+                    self.accounts.append(future.result())
+                except Exception as e:
+                    failed[account.get('name') or account_name(account['username'])] = str(e)
+        return failed
+
+    def run(self, task, pbar=None):
+        """Sync every account with ``task(account, speech) -> bool``
+
+        Returns ``{account name: {'downloaded': n, 'failed': n, 'high_water_mark': mark}}``.
+        The high-water mark only advances for accounts whose listing finished.
+        """
+        scheduler = FairScheduler(self.per_account)
+        lock = threading.Lock()
+        results = {account.name: {'downloaded': 0, 'failed': 0, 'high_water_mark': None}
+                   for account in self.accounts}
+        listed = set()
+
+        def download(account, speech):
+            try:
+                ok = bool(task(account, speech))
+            except Exception as e:
+                print(f"✗ [{account.name}] Error downloading {speech.get('speech_id')}: {e}")
+                ok = False
+            account.tracker.record(speech['speech_id'], ok, modified=speech_modified_ts(speech))
+            with lock:
+                results[account.name]['downloaded' if ok else 'failed'] += 1
+                if pbar is not None:
+                    pbar.update(1)
+
+        def listing(account):
+            # Downloads are queued as pages arrive, so they start before listing ends
+            for speech in account.sync.changed_speeches():
+                scheduler.submit(account, lambda speech=speech: download(account, speech))
+                if pbar is not None:
+                    with lock:
+                        pbar.total = (pbar.total or 0) + 1
+                        pbar.refresh()
+            listed.add(account.name)
+
+        def worker():
+            while True:
+                item = scheduler.get()
+                if item is None:
+                    return
+                account, job = item
+                try:
+                    job()
+                except Exception as e:
+                    print(f"✗ [{account.name}] {e}")
+                finally:
+                    scheduler.done(account)
+
+        for account in self.accounts:
+            scheduler.submit(account, lambda account=account: listing(account))
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for account in self.accounts:
+            # A listing that stopped early may not have reached older changes
+            if account.name in listed:
+                results[account.name]['high_water_mark'] = account.sync.finish()
+            else:
+                results[account.name]['high_water_mark'] = account.sync.high_water_mark
+        return results
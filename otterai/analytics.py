@@ -0,0 +1,240 @@
+from datetime import datetime, timezone
+import json
+import csv
+import os
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from otterai.otterai import OtterAIException
+from otterai.search import TranscriptIndex
+from otterai.catalog import columns
+
+# Weeks start on Monday; the epoch was a Thursday
+WEEK = 7 * 24 * 3600
+_FIRST_MONDAY = 4 * 24 * 3600
+# Meeting length buckets in minutes, for length_distribution
+LENGTH_BINS = (0, 5, 15, 30, 45, 60, 90, 120)
+# Segment columns cached inside the downloads tree, next to the search index
+CACHE_FILENAME = '.analytics.npz'
+_SEGMENT_COLUMNS = ('source', 'speaker', 'start', 'end', 'words')
+_SEGMENT_DTYPE = [('source', np.int64), ('speaker', np.int32), ('start', np.int64),
+                  ('end', np.int64), ('words', np.int32)] if np is not None else None
+
+def _ratio(numerator, denominator):
+    return np.divide(numerator, denominator, out=np.zeros(len(numerator)), where=denominator > 0)
+
+def _pairs(first, second, second_count):
+    # Distinct (first, second) pairs as two arrays
+    pairs = np.unique(first.astype(np.int64) * second_count + second)
+    return pairs // second_count, pairs % second_count
+
+class TranscriptArchive:
+    """Transcript segments of a downloads tree as NumPy columns
+
+    Meetings (one per transcript) have ``speech_ids``, ``created_at``,
+    ``duration`` (seconds) and ``folder_id`` (-1 when none). Segments have
+    ``meeting`` (index into the meetings), ``speaker`` (index into
+    ``speakers``, -1 when unlabelled), ``start``/``end`` (ms) and ``words``.
+    Every aggregate is computed with bincount/unique over these arrays.
+    Speakers are grouped by name, so generic labels such as "Speaker 1"
+    are merged across meetings.
+    """
+
+    def __init__(self, speech_ids, created_at, duration, folder_id, speakers, meeting, speaker, start, end, words):
+        self.speech_ids = speech_ids
+        self.created_at = created_at
+        self.duration = duration
+        self.folder_id = folder_id
+        self.speakers = speakers
+        self.meeting = meeting
+        self.speaker = speaker
+        self.start = start
+        self.end = end
+        self.words = words
+
+    @classmethod
+    def load(cls, base_dir='downloads', catalog=None, index=None):
+        """Load every transcript under ``base_dir``
+
+        Segments come from the transcript search index (refreshed first, so
+        only new or changed exports are parsed) and are cached as arrays in
+        .analytics.npz until the index changes. Meeting metadata comes from
+        ``catalog`` (a SpeechCatalog) when given, else from each speech's
+        metadata.json.
+        """
+        if np is None:
+            raise OtterAIException('Archive analytics require numpy (pip install otterai[analytics])')
+        own_index = index is None
+        index = index or TranscriptIndex(base_dir)
+        try:
+            index.refresh()
+            sources = index.sources()
+            cache_path = os.path.join(index.base_dir, CACHE_FILENAME)
+            version = np.array(index.version(), dtype=np.float64)
+            cached = _read_cache(cache_path, version)
+            if cached is None:
+                speakers, rows = index.segment_table()
+                segments = np.fromiter(rows, dtype=_SEGMENT_DTYPE)
+                _write_cache(cache_path, version, speakers, segments)
+            else:
+                speakers, segments = cached
+        finally:
+            if own_index:
+                index.close()
+
+        speech_ids = [speech_id or otid for _, _, speech_id, otid in sources]
+        known = {}
+        if catalog is not None:
+            known = {row['speech_id']: row for row in catalog.rows(ids=[s for s in speech_ids if s])}
+        metadata = []
+        for (_, path, _, _), speech_id in zip(sources, speech_ids):
+            row = known.get(speech_id)
+            metadata.append((row['created_at'], row['duration'], row['folder_id']) if row
+                            else _read_metadata(os.path.dirname(path)))
+
+        count = len(sources)
+        meeting = np.searchsorted(np.array([source[0] for source in sources], dtype=np.int64), segments['source'])
+        created_at = np.array([m[0] or 0 for m in metadata], dtype=np.int64)
+        duration = np.array([m[1] or 0 for m in metadata], dtype=np.float64)
+        folder_id = np.array([-1 if m[2] is None else m[2] for m in metadata], dtype=np.int64)
+        # Without a listed duration, a meeting lasts until its last segment ends
+        last_end = np.zeros(count, dtype=np.int64)
+        np.maximum.at(last_end, meeting, segments['end'])
+        duration = np.where(duration > 0, duration, last_end / 1000.0)
+        end = np.maximum(segments['end'], segments['start'])
+        return cls(np.array(speech_ids, dtype=object), created_at, duration, folder_id,
+                   np.array(speakers, dtype=object), meeting.astype(np.int64), segments['speaker'],
+                   segments['start'], end, segments['words'])
+
+    def talk_time(self):
+        """Per speaker: talk time, words, words per minute, meetings and share of all talk"""
+        labelled = self.speaker >= 0
+        speaker = self.speaker[labelled]
+        count = len(self.speakers)
+        talk_ms = np.bincount(speaker, weights=(self.end - self.start)[labelled], minlength=count)
+        words = np.bincount(speaker, weights=self.words[labelled], minlength=count)
+        speaker_of_pair, _ = _pairs(speaker, self.meeting[labelled], max(len(self.speech_ids), 1))
+        meetings = np.bincount(speaker_of_pair, minlength=count)
+        order = np.argsort(-talk_ms, kind='stable')
+        return {'speaker': self.speakers[order],
+                'talk_minutes': np.round(talk_ms[order] / 60000, 2),
+                'share': np.round(_ratio(talk_ms, np.full(count, talk_ms.sum()))[order], 4),
+                'words': words[order].astype(np.int64),
+                'words_per_minute': np.round(_ratio(words, talk_ms / 60000)[order], 1),
+                'meetings': meetings[order]}
+
+    def meetings(self):
+        """Per meeting: length, segments, words, talk time, speakers and words per minute"""
+        count = len(self.speech_ids)
+        talk_ms = np.bincount(self.meeting, weights=self.end - self.start, minlength=count)
+        words = np.bincount(self.meeting, weights=self.words, minlength=count)
+        labelled = self.speaker >= 0
+        _, meeting_of_pair = _pairs(self.speaker[labelled], self.meeting[labelled], max(count, 1))
+        return {'speech_id': self.speech_ids,
+                'created': _dates(self.created_at),
+                'duration_minutes': np.round(self.duration / 60, 2),
+                'segments': np.bincount(self.meeting, minlength=count),
+                'words': words.astype(np.int64),
+                'talk_minutes': np.round(talk_ms / 60000, 2),
+                'speakers': np.bincount(meeting_of_pair, minlength=count),
+                'words_per_minute': np.round(_ratio(words, talk_ms / 60000), 1)}
+
+    def length_distribution(self, bins=LENGTH_BINS):
+        """Number of meetings per length bucket, in minutes"""
+        edges = np.append(np.asarray(bins, dtype=np.float64), np.inf)
+        counts, _ = np.histogram(self.duration / 60, bins=edges)
+        labels = [f"{int(low)}-{int(high)}" if np.isfinite(high) else f"{int(low)}+"
+                  for low, high in zip(edges[:-1], edges[1:])]
+        return {'minutes': np.array(labels, dtype=object), 'meetings': counts}
+
+    def volume_by_week(self):
+        """Meetings and hours recorded per week (weeks start on Monday, UTC)"""
+        dated = self.created_at > 0
+        weeks = (self.created_at[dated] - _FIRST_MONDAY) // WEEK * WEEK + _FIRST_MONDAY
+        week, position = np.unique(weeks, return_inverse=True)
+        return {'week': _dates(week),
+                'meetings': np.bincount(position, minlength=len(week)),
+                'hours': np.round(np.bincount(position, weights=self.duration[dated], minlength=len(week)) / 3600, 2)}
+
+    def volume_by_folder(self):
+        """Meetings and hours recorded per folder id (-1 for none)"""
+        folder, position = np.unique(self.folder_id, return_inverse=True)
+        return {'folder_id': folder,
+                'meetings': np.bincount(position, minlength=len(folder)),
+                'hours': np.round(np.bincount(position, weights=self.duration, minlength=len(folder)) / 3600, 2)}
+
+    def summary(self):
+        """Archive totals and meeting length percentiles"""
+        minutes = self.duration / 60
+        percentiles = np.percentile(minutes, [50, 90, 99]) if len(minutes) else np.zeros(3)
+        talk_minutes = float((self.end - self.start).sum()) / 60000
+        return {'meetings': len(self.speech_ids), 'segments': len(self.meeting), 'speakers': len(self.speakers),
+                'hours': round(float(self.duration.sum()) / 3600, 2), 'words': int(self.words.sum()),
+                'words_per_minute': round(float(self.words.sum()) / talk_minutes, 1) if talk_minutes else 0.0,
+                'median_minutes': round(float(percentiles[0]), 1), 'p90_minutes': round(float(percentiles[1]), 1),
+                'p99_minutes': round(float(percentiles[2]), 1)}
+
+    def report(self):
+        """Every aggregate: ``{'summary': {...}, table name: {column: array}}``"""
+        return {'summary': self.summary(), 'speakers': self.talk_time(), 'meetings': self.meetings(),
+                'lengths': self.length_distribution(), 'weeks': self.volume_by_week(),
+                'folders': self.volume_by_folder()}
+
+def _dates(timestamps):
+    return np.array([datetime.fromtimestamp(int(ts), timezone.utc).strftime('%Y-%m-%d') if ts else ''
+                     for ts in timestamps], dtype=object)
+
+def _read_cache(path, version):
+    # (speakers, segments) if the cache was written for this index version
+    try:
+        with np.load(path) as cache:
+            if not np.array_equal(cache['version'], version):
+                return None
+            segments = np.empty(len(cache['source']), dtype=_SEGMENT_DTYPE)
+            for column in _SEGMENT_COLUMNS:
+                segments[column] = cache[column]
+            return cache['speakers'].tolist(), segments
+    except (OSError, KeyError, ValueError):
+        return None
+
+def _write_cache(path, version, speakers, segments):
+    # Plain arrays only (speakers as unicode), so loading needs no pickle
+    tmp = path + '.tmp'
+    try:
+        with open(tmp, 'wb') as f:
+            np.savez(f, version=version, speakers=np.array(speakers, dtype=str),
+                     **{column: segments[column] for column in _SEGMENT_COLUMNS})
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"✗ Could not cache segments in {path}: {e}")
+
+def _read_metadata(directory):
+    # (created_at, duration, folder_id) from a speech's metadata.json
+    try:
+        with open(os.path.join(directory, 'metadata.json')) as f:
+            speech = json.load(f)
+    except (OSError, ValueError):
+        return None, None, None
+    _, _, _, created_at, _, duration, folder_id, _ = columns(speech)
+    return created_at, duration, folder_id
+
+def write_csv(path, table):
+    """Write a ``{column: array}`` table as CSV"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(table)
+        writer.writerows(zip(*(values.tolist() for values in table.values())))
+
+def write_report(report, directory):
+    """Write each table of ``report`` as ``<name>.csv`` and everything as report.json"""
+    os.makedirs(directory, exist_ok=True)
+    tables = {name: table for name, table in report.items() if name != 'summary'}
+    for name, table in tables.items():
+        write_csv(os.path.join(directory, f"{name}.csv"), table)
+    with open(os.path.join(directory, 'report.json'), 'w') as f:
+        json.dump(dict({name: {column: values.tolist() for column, values in table.items()}
+                        for name, table in tables.items()}, summary=report['summary']), f, indent=2)
+    return directory
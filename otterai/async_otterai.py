@@ -0,0 +1,346 @@
+import xml.etree.ElementTree as ET
+import tempfile
+import asyncio
+import time
+import os
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from otterai.otterai import OtterAI, OtterAIException, DOWNLOAD_CHUNK_SIZE, _default_mode
+from otterai.models import Speech
+
+# Connection pool limits for the shared aiohttp connector
+DEFAULT_CONNECTION_LIMIT = 100
+DEFAULT_LIMIT_PER_HOST = 0
+DEFAULT_KEEPALIVE_TIMEOUT = 30
+
+async def _prefetch(pages):
+    # Request the next page while the current one is consumed
+    pending = asyncio.ensure_future(pages.__anext__())
+    try:
+        while True:
+            try:
+                page = await pending
+            except StopAsyncIteration:
+                return
+            pending = asyncio.ensure_future(pages.__anext__())
+            yield page
+    finally:
+        if not pending.done():
+            pending.cancel()
+        elif not pending.cancelled():
+            # Retrieve it so an unused failure is not logged
+            pending.exception()
+
+class AsyncOtterAI:
+    API_BASE_URL = OtterAI.API_BASE_URL
+    S3_BASE_URL = OtterAI.S3_BASE_URL
+
+    def __init__(self, limit=DEFAULT_CONNECTION_LIMIT, limit_per_host=DEFAULT_LIMIT_PER_HOST,
+                 keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT):
+        if aiohttp is None:
+            raise OtterAIException('AsyncOtterAI requires aiohttp (pip install otterai[async])')
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._session = None
+        self._auth = None
+        self._userid = None
+        self._cookies = None
+
+    async def __aenter__(self):
+        self._get_session()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        # The session must be created inside a running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._limit, limit_per_host=self._limit_per_host,
+                                             keepalive_timeout=self._keepalive_timeout)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def _is_userid_invalid(self):
+        if not self._userid:
+            return True
+        return False
+
+    @staticmethod
+    def _params(payload):
+        # aiohttp only accepts str/int/float query values
+        return {k: str(v).lower() if isinstance(v, bool) else v for k, v in payload.items() if v is not None}
+
+    async def _handle_response(self, response, data=None):
+        if data:
+            return {'status': response.status, 'data': data}
+        try:
+            return {'status': response.status, 'data': await response.json(content_type=None)}
+        except ValueError:
+            return {'status': response.status, 'data': {}}
+
+    async def _get(self, url, payload=None, **kwargs):
+        session = self._get_session()
+        async with session.get(url, params=self._params(payload or {}), auth=self._auth, **kwargs) as response:
+            return await self._handle_response(response)
+
+    async def _post(self, url, payload=None, data=None, **kwargs):
+        session = self._get_session()
+        headers = {'x-csrftoken': self._cookies['csrftoken']}
+        headers.update(kwargs.pop('headers', {}))
+        async with session.post(url, params=self._params(payload or {}), data=data, headers=headers,
+                                auth=self._auth, **kwargs) as response:
+            return await self._handle_response(response)
+
+    async def login(self, username, password):
+        # API URL
+        auth_url = self.API_BASE_URL + 'login'
+        # Query Parameters
+        payload = {'username': username}
+        # Basic Authentication
+        self._auth = aiohttp.BasicAuth(username, password)
+        # GET
+        session = self._get_session()
+        async with session.get(auth_url, params=payload, auth=self._auth) as response:
+            result = await self._handle_response(response)
+            # Check
+            if response.status != 200:
+                return result
+            # Set userid & cookies
+            self._userid = result['data']['userid']
+            self._cookies = {name: morsel.value for name, morsel in session.cookie_jar.filter_cookies(response.url).items()}
+            self._cookies.update({name: morsel.value for name, morsel in response.cookies.items()})
+
+        return result
+
+    async def get_user(self):
+        # API URL
+        user_url = self.API_BASE_URL + 'user'
+        # GET
+        return await self._get(user_url)
+
+    async def get_speakers(self):
+        # API URL
+        speakers_url = self.API_BASE_URL + 'speakers'
+        if self._is_userid_invalid():
+            raise OtterAIException('userid is invalid')
+        # Query Parameters
+        payload = {'userid': self._userid}
+        # GET
+        return await self._get(speakers_url, payload)
+
+    async def get_speeches(self, folder=0, page_size=45, source="owned", last_load_ts=None, modified_after=None,
+                           extra_params=None, headers=None):
+        # API URL
+        speeches_url = self.API_BASE_URL + 'speeches'
+        if self._is_userid_invalid():
+            raise OtterAIException('userid is invalid')
+        # Query Parameters
+        payload = {'userid': self._userid,
+                'folder': folder,
+                'page_size': page_size,
+                'source': source,
+                # Pagination cursor from the previous page
+                'last_load_ts': last_load_ts,
+                # Only speeches changed since this epoch timestamp
+                'modified_after': modified_after}
+        payload.update(extra_params or {})
+        # GET
+        return await self._get(speeches_url, payload, headers=headers)
+
+    async def iter_speech_pages(self, folder=0, page_size=45, source="owned", last_load_ts=None, modified_after=None,
+                                extra_params=None, headers=None):
+        # Follow the last_load_ts cursor until end_of_list
+        while True:
+            response = await self.get_speeches(folder=folder, page_size=page_size, source=source,
+                                               last_load_ts=last_load_ts, modified_after=modified_after,
+                                               extra_params=extra_params, headers=headers)
+            if response['status'] != 200:
+                raise OtterAIException(f"Got response status {response['status']} when listing speeches")
+            data = response['data']
+            yield data
+            last_load_ts = data.get('last_load_ts')
+            if not data.get('speeches') or not last_load_ts or data.get('end_of_list', True):
+                return
+
+    async def iter_speeches(self, folder=0, page_size=45, source="owned", last_load_ts=None, modified_after=None,
+                            prefetch=True, models=False, extra_params=None, headers=None):
+        # Yield unique speeches page by page (async for), optionally
+        # requesting the next page while the current one is consumed; with
+        # models, each speech is a compact otterai.models.Speech
+        pages = self.iter_speech_pages(folder=folder, page_size=page_size, source=source,
+                                       last_load_ts=last_load_ts, modified_after=modified_after,
+                                       extra_params=extra_params, headers=headers)
+        if prefetch:
+            pages = _prefetch(pages)
+        seen_ids = set()
+        async for data in pages:
+            for speech in data.get('speeches', []):
+                speech_id = speech.get('speech_id')
+                if speech_id in seen_ids:
+                    continue
+                seen_ids.add(speech_id)
+                yield Speech(speech) if models else speech
+
+    async def get_speech(self, speech_id):
+        # API URL
+        speech_url = self.API_BASE_URL + 'speech'
+        if self._is_userid_invalid():
+            raise OtterAIException('userid is invalid')
+        # Query Params
+        payload = {'userid': self._userid, 'otid': speech_id}
+        # GET
+        return await self._get(speech_url, payload)
+
+    async def query_speech(self, query, speech_id, size=500):
+        # API URL
+        query_speech_url = self.API_BASE_URL + 'advanced_search'
+        # Query Params
+        payload = {'query': query, "size": size, "otid": speech_id}
+        # GET
+        return await self._get(query_speech_url, payload)
+
+    async def upload_speech(self, file_name, content_type='audio/mp4'):
+        # API URL
+        speech_upload_params_url = self.API_BASE_URL + 'speech_upload_params'
+        speech_upload_prod_url = self.S3_BASE_URL + 'speech-upload-prod'
+        finish_speech_upload = self.API_BASE_URL + 'finish_speech_upload'
+
+        if self._is_userid_invalid():
+            raise OtterAIException('userid is invalid')
+
+        session = self._get_session()
+
+        # First grab upload params (aws data)
+        result = await self._get(speech_upload_params_url, {'userid': self._userid})
+        if result['status'] != 200:
+            return result
+        params_data = result['data']['data']
+
+        # Send options (precondition) request
+        headers = {'Accept': '*/*',
+                   'Origin': 'https://otter.ai',
+                   'Referer': 'https://otter.ai/',
+                   'Access-Control-Request-Method': 'POST'}
+        async with session.options(speech_upload_prod_url, headers=headers) as response:
+            if response.status != 200:
+                return await self._handle_response(response)
+
+        # Post file to bucket, aiohttp streams the file object
+        params_data['success_action_status'] = str(params_data['success_action_status'])
+        del params_data['form_action']
+        form = aiohttp.FormData()
+        for key, value in params_data.items():
+            form.add_field(key, value)
+        with open(file_name, mode='rb') as f:
+            form.add_field('file', f, filename=os.path.basename(file_name), content_type=content_type)
+            async with session.post(speech_upload_prod_url, data=form) as response:
+                if response.status != 201:
+                    return await self._handle_response(response)
+                text = await response.text()
+
+        # Pase xml response
+        xmlroot = ET.fromstring(text)
+        bucket = xmlroot[1].text
+        key = xmlroot[2].text
+
+        # Call finish api
+        payload = {'bucket': bucket, 'key': key, 'language': 'en', 'country': 'us', 'userid': self._userid}
+        return await self._get(finish_speech_upload, payload)
+
+    async def download_speech(self, speech_id, name=None, fileformat="txt,pdf,mp3,docx,srt",
+                              chunk_size=DOWNLOAD_CHUNK_SIZE, progress=None):
+        # API URL
+        download_speech_url = self.API_BASE_URL + 'bulk_export'
+        if self._is_userid_invalid():
+            raise OtterAIException('userid is invalid')
+        # Query Params
+        payload = {'userid': self._userid}
+        # POST
+        data = [('formats', fileformat), ('speech_otid_list', speech_id)]
+        headers = {'x-csrftoken': self._cookies['csrftoken'], "referer": "https://otter.ai/"}
+        #filename
+        filename = (name if not name==None else speech_id) + "." + ("zip" if "," in fileformat else fileformat)
+        session = self._get_session()
+        async with session.post(download_speech_url, params=payload, headers=headers, data=data,
+                                auth=self._auth) as response:
+            if response.status >= 400:
+                raise OtterAIException(f"Got response status {response.status} when attempting to download {speech_id}")
+            # Same temp file + rename scheme as OtterAI.download_speech
+            total = response.content_length
+            directory = os.path.dirname(os.path.abspath(filename))
+            fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(filename) + '.', suffix='.part', dir=directory)
+            started = time.monotonic()
+            done = 0
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        f.write(chunk)
+                        done += len(chunk)
+                        if progress:
+                            elapsed = time.monotonic() - started
+                            progress(done, total, done / elapsed if elapsed > 0 else 0.0)
+                _default_mode(tmp_path)
+                os.replace(tmp_path, filename)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            return await self._handle_response(response, data={"filename": filename})
+
+    async def move_to_trash_bin(self, speech_id):
+        # API URL
+        move_to_trash_bin_url = self.API_BASE_URL + 'move_to_trash_bin'
+        if self._is_userid_invalid():
+            raise OtterAIException('userid is invalid')
+        # Query Params
+        payload = {'userid': self._userid}
+        # POST
+        data = {'otid': speech_id}
+        return await self._post(move_to_trash_bin_url, payload, data)
+
+    async def create_speaker(self, speaker_name):
+        # API URL
+        create_speaker_url = self.API_BASE_URL + 'create_speaker'
+        if self._is_userid_invalid():
+            raise OtterAIException('userid is invalid')
+        # Query Parameters
+        payload = {'userid': self._userid}
+        # POST
+        data = {'speaker_name': speaker_name}
+        return await self._post(create_speaker_url, payload, data)
+
+    async def get_notification_settings(self):
+        # API URL
+        notification_settings_url = self.API_BASE_URL + 'get_notification_settings'
+        return await self._get(notification_settings_url)
+
+    async def list_groups(self):
+        # API URL
+        list_groups_url = self.API_BASE_URL + 'list_groups'
+        if self._is_userid_invalid():
+            raise OtterAIException('userid is invalid')
+        # Query Parameters
+        payload = {'userid': self._userid}
+        # GET
+        return await self._get(list_groups_url, payload)
+
+    async def get_folders(self):
+        # API URL
+        folders_url = self.API_BASE_URL + 'folders'
+        if self._is_userid_invalid():
+            raise OtterAIException('userid is invalid')
+        # Query Parameters
+        payload = {'userid': self._userid}
+        # GET
+        return await self._get(folders_url, payload)
@@ -0,0 +1,134 @@
+from collections import OrderedDict
+from urllib.parse import urlencode
+import json
+import time
+from otterai import jsonlib
+from otterai.db import SQLiteStore
+
+# Seconds a cached response is served without asking the server
+DEFAULT_TTL = 300
+# Responses kept in the in-memory tier
+DEFAULT_MAX_ENTRIES = 1024
+
+class ResponseCache(SQLiteStore):
+    """Two-tier cache for metadata GET responses
+
+    Entries live in an LRU dict in memory and, given a ``path``, in a SQLite
+    table that survives restarts. Within ``ttl`` an entry is returned without
+    a request; after that it is revalidated with If-None-Match /
+    If-Modified-Since when the server sent an ETag or Last-Modified, and
+    refetched otherwise. Bodies are kept as the encoded JSON the server
+    sent and decoded on every hit, which is cheaper than copying a decoded
+    response and leaves nothing a caller could modify.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, path=None):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.path = path
+        self._memory = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stores': 0, 'invalidations': 0}
+        super().__init__(path, '''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_endpoint ON responses (endpoint);
+        ''')
+
+    @staticmethod
+    def key(endpoint, params=None):
+        return endpoint + '?' + urlencode(sorted((params or {}).items()))
+
+    def lookup(self, key, drop=()):
+        """Return ``(entry, fresh)``, entry is None on a miss
+
+        The entry's data is freshly decoded, with the keys in ``drop``
+        pruned (see ``jsonlib.loads``), so callers may modify it.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            elif self._conn is not None:
+                row = self._conn.execute('SELECT endpoint, status, data, etag, last_modified, stored '
+                                         'FROM responses WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    entry = {'endpoint': row[0], 'status': row[1], 'body': row[2],
+                             'etag': row[3], 'last_modified': row[4], 'stored': row[5]}
+                    self._remember(key, entry)
+            fresh = entry is not None and now - entry['stored'] < self.ttl
+            self._stats['hits' if fresh else 'misses'] += 1
+        if entry is None:
+            return None, fresh
+        try:
+            data = jsonlib.loads(entry['body'], drop)
+        except ValueError:
+            data = {}
+        return dict(entry, data=data), fresh
+
+    def store(self, key, endpoint, status, body, etag=None, last_modified=None):
+        """Cache a response; ``body`` is its JSON as sent (bytes or str) or decoded data"""
+        if not isinstance(body, (bytes, str)):
+            body = json.dumps(body, separators=(',', ':'))
+        entry = {'endpoint': endpoint, 'status': status, 'body': body, 'etag': etag,
+                 'last_modified': last_modified, 'stored': time.time()}
+        with self._lock:
+            self._remember(key, entry)
+            self._stats['stores'] += 1
+            if self._conn is not None:
+                self._conn.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                   (key, endpoint, status, body, etag, last_modified, entry['stored']))
+
+    def touch(self, key):
+        """Mark an entry fresh again after a 304 Not Modified"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                entry['stored'] = now
+            if self._conn is not None:
+                self._conn.execute('UPDATE responses SET stored = ? WHERE key = ?', (now, key))
+            self._stats['revalidated'] += 1
+
+    def invalidate(self, endpoint, params=None):
+        """Drop one response, or every response from ``endpoint`` when params is None"""
+        with self._lock:
+            if params is not None:
+                keys = [self.key(endpoint, params)]
+            else:
+                keys = [key for key, entry in self._memory.items() if entry['endpoint'] == endpoint]
+            for key in keys:
+                self._memory.pop(key, None)
+            if self._conn is not None:
+                if params is not None:
+                    self._conn.execute('DELETE FROM responses WHERE key = ?', (keys[0],))
+                else:
+                    self._conn.execute('DELETE FROM responses WHERE endpoint = ?', (endpoint,))
+            self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute('DELETE FROM responses')
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._memory)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
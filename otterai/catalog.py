@@ -0,0 +1,200 @@
+import json
+import zlib
+import time
+import os
+from otterai import jsonlib
+from otterai.db import SQLiteStore
+
+# Catalog written by list_all_speeches.py, and the JSON list it replaces
+CATALOG_FILENAME = 'speeches_catalog.db'
+LEGACY_JSON = 'speeches_list.json'
+# Typed columns kept for every speech; the full speech is stored compressed
+COLUMNS = ('speech_id', 'otid', 'title', 'created_at', 'modified_time', 'duration', 'folder_id', 'download_url')
+# SQLite's default limit on bound parameters is 999
+_ID_CHUNK = 500
+# Rows fetched from the cursor at a time while iterating
+_FETCH_SIZE = 1000
+
+def _folder_id(speech):
+    folder = speech.get('folder')
+    if isinstance(folder, dict):
+        folder = folder.get('id')
+    if folder is None:
+        folder = speech.get('folder_id')
+    try:
+        return int(folder) if folder is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def _int(value):
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def columns(speech):
+    """Values of ``COLUMNS`` for a speech dict, with numbers as ints"""
+    return (speech.get('speech_id'), speech.get('otid'), speech.get('title'), _int(speech.get('created_at')),
+            _int(speech.get('modified_time')), _int(speech.get('duration')), _folder_id(speech),
+            speech.get('download_url'))
+
+class SpeechCatalog(SQLiteStore):
+    """Speech list in SQLite with typed columns, indexed by speech_id and otid
+
+    ``rows`` and ``ids`` read only the small typed columns and iterate the
+    cursor, so filtering a large catalog never loads the full speeches.
+    The complete speech dict is kept as compressed JSON and only decoded by
+    ``get`` and ``speeches``.
+    """
+
+    def __init__(self, path=CATALOG_FILENAME):
+        self.path = path
+        super().__init__(path, '''
+            CREATE TABLE IF NOT EXISTS speeches (
+                speech_id TEXT PRIMARY KEY,
+                otid TEXT,
+                title TEXT,
+                created_at INTEGER,
+                modified_time INTEGER,
+                duration INTEGER,
+                folder_id INTEGER,
+                download_url TEXT,
+                listed REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS speeches_otid ON speeches (otid);
+            CREATE INDEX IF NOT EXISTS speeches_created_at ON speeches (created_at, speech_id);
+            -- Full speeches live apart so scans of the columns stay small
+            CREATE TABLE IF NOT EXISTS raw (
+                speech_id TEXT PRIMARY KEY,
+                data BLOB NOT NULL
+            ) WITHOUT ROWID;
+        ''')
+
+    @classmethod
+    def open(cls, path=CATALOG_FILENAME, legacy_json=LEGACY_JSON):
+        """Open a catalog, importing a legacy speeches_list.json the first time"""
+        is_new = not os.path.exists(path)
+        catalog = cls(path)
+        if is_new and legacy_json and os.path.exists(legacy_json):
+            catalog.import_json(legacy_json)
+        return catalog
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM speeches').fetchone()[0]
+
+    def __contains__(self, speech_id):
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM speeches WHERE speech_id = ?', (speech_id,)).fetchone() is not None
+
+    def add(self, speeches):
+        """Insert or update speeches in one transaction, returns how many were written"""
+        now = time.time()
+        speeches = [speech for speech in speeches if speech.get('speech_id')]
+        rows = [columns(speech) + (now,) for speech in speeches]
+        raw = [(speech['speech_id'], zlib.compress(json.dumps(speech, separators=(',', ':')).encode()))
+               for speech in speeches]
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.executemany(f'INSERT OR REPLACE INTO speeches ({", ".join(COLUMNS)}, listed) '
+                                   f'VALUES ({", ".join("?" * (len(COLUMNS) + 1))})', rows)
+            self._conn.executemany('INSERT OR REPLACE INTO raw (speech_id, data) VALUES (?, ?)', raw)
+            self._conn.execute('COMMIT')
+        return len(rows)
+
+    def prune(self, listed_before):
+        """Delete speeches last listed before an epoch timestamp, returns how many
+
+        Called after a complete listing with the time it started, this drops
+        speeches that were deleted or trashed since the previous listing.
+        """
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.execute('DELETE FROM raw WHERE speech_id IN '
+                               '(SELECT speech_id FROM speeches WHERE listed < ?)', (listed_before,))
+            removed = self._conn.execute('DELETE FROM speeches WHERE listed < ?', (listed_before,)).rowcount
+            self._conn.execute('COMMIT')
+        return removed
+
+    def import_json(self, path):
+        """Import a ``{'speeches': [...]}`` file written by older list_all_speeches.py"""
+        with open(path) as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError:
+                print(f"Warning: Corrupt speech list {path}, not importing")
+                return 0
+        return self.add(data.get('speeches', []))
+
+    def row(self, speech_id):
+        """Typed columns of one speech, looked up by speech_id or otid"""
+        with self._lock:
+            cursor = self._conn.execute(f'SELECT {", ".join(COLUMNS)} FROM speeches WHERE speech_id = ?',
+                                        (speech_id,))
+            values = cursor.fetchone()
+            if values is None:
+                values = self._conn.execute(f'SELECT {", ".join(COLUMNS)} FROM speeches WHERE otid = ?',
+                                            (speech_id,)).fetchone()
+        return dict(zip(COLUMNS, values)) if values else None
+
+    def get(self, speech_id):
+        """The full speech dict as listed, or None"""
+        with self._lock:
+            row = self._conn.execute('SELECT data FROM raw WHERE speech_id = ?', (speech_id,)).fetchone()
+        return jsonlib.loads(zlib.decompress(row[0])) if row else None
+
+    def _select(self, columns, ids=None, created_after=None, created_before=None, folder_id=None, title=None):
+        # Yields rows of ``columns`` matching every given filter, ordered by
+        # created_at; ids are matched in chunks to stay under the parameter limit
+        where, params = [], []
+        if created_after is not None:
+            where.append('created_at >= ?')
+            params.append(created_after)
+        if created_before is not None:
+            where.append('created_at < ?')
+            params.append(created_before)
+        if folder_id is not None:
+            where.append('folder_id = ?')
+            params.append(folder_id)
+        if title is not None:
+            where.append("title LIKE ? ESCAPE '\\'")
+            params.append('%' + title.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        sql = f'SELECT {columns} FROM speeches'
+        if ids is None:
+            chunks = [None]
+        else:
+            ids = list(ids)
+            chunks = [ids[i:i + _ID_CHUNK] for i in range(0, len(ids), _ID_CHUNK)]
+        for chunk in chunks:
+            clauses, values = list(where), list(params)
+            if chunk is not None:
+                clauses.append(f'speech_id IN ({", ".join("?" * len(chunk))})')
+                values += chunk
+            query = sql + (' WHERE ' + ' AND '.join(clauses) if clauses else '') + ' ORDER BY created_at, speech_id'
+            with self._lock:
+                cursor = self._conn.execute(query, values)
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(_FETCH_SIZE)
+                if not rows:
+                    break
+                yield from rows
+
+    def ids(self, **filters):
+        """speech_ids matching the filters (see ``rows``)"""
+        return [row[0] for row in self._select('speech_id', **filters)]
+
+    def rows(self, **filters):
+        """Typed columns of the speeches matching every filter given
+
+        Filters: ``ids``, ``created_after``/``created_before`` (epoch
+        seconds), ``folder_id`` and ``title`` (substring, case-insensitive).
+        """
+        for values in self._select(', '.join(COLUMNS), **filters):
+            yield dict(zip(COLUMNS, values))
+
+    def speeches(self, ids=None, **filters):
+        """Full speech dicts matching the filters, decoded one at a time"""
+        for (raw,) in self._select('(SELECT data FROM raw WHERE raw.speech_id = speeches.speech_id)',
+                                   ids=ids, **filters):
+            yield jsonlib.loads(zlib.decompress(raw))
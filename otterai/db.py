@@ -0,0 +1,43 @@
+import threading
+import sqlite3
+
+def connect(path, schema=None):
+    """Open a SQLite connection in WAL mode that threads can share
+
+    Transactions are explicit (``isolation_level=None``, callers issue
+    BEGIN/COMMIT), and ``schema`` is run as a script once connected. The
+    connection is closed again if the schema fails.
+    """
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        if schema:
+            conn.executescript(schema)
+    except BaseException:
+        conn.close()
+        raise
+    return conn
+
+class SQLiteStore:
+    """Base for the SQLite-backed stores: one connection behind one lock
+
+    Subclasses hold ``self._lock`` around every use of ``self._conn``.
+    Without a ``path`` there is no connection and ``self._conn`` is None.
+    """
+
+    def __init__(self, path=None, schema=None):
+        self._lock = threading.Lock()
+        self._conn = connect(path, schema) if path else None
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
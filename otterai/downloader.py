@@ -0,0 +1,105 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from otterai.state import StateStore, DOWNLOADED, FAILED
+from otterai.sync import speech_modified_ts
+
+# Number of speeches downloaded at once
+DEFAULT_WORKERS = 8
+
+class DownloadTracker:
+    """Thread-safe downloaded/failed tracker backed by a StateStore
+
+    With a ``metrics`` collector the progress bar also shows live throughput
+    and p95 request latency.
+    """
+
+    def __init__(self, store, pbar=None, metrics=None):
+        self.store = store
+        self.pbar = pbar
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._counts = store.counts()
+
+    @classmethod
+    def load(cls, path, legacy_json=None, pbar=None):
+        return cls(StateStore.open(path, legacy_json=legacy_json), pbar)
+
+    def is_downloaded(self, speech_id):
+        return self.store.status(speech_id) == DOWNLOADED
+
+    def is_pending(self, speech_id):
+        return self.store.status(speech_id) is None
+
+    def count(self, status):
+        return self._counts.get(status, 0)
+
+    def record(self, speech_id, ok, size=None, checksum=None, modified=None):
+        status = DOWNLOADED if ok else FAILED
+        with self._lock:
+            previous = self.store.status(speech_id)
+            self.store.record(speech_id, status, size=size, checksum=checksum, modified=modified)
+            if previous is not None:
+                self._counts[previous] -= 1
+            self._counts[status] = self._counts.get(status, 0) + 1
+            if self.pbar is not None:
+                postfix = {'success': self.count(DOWNLOADED), 'failed': self.count(FAILED)}
+                if self.metrics is not None:
+                    postfix.update(self.metrics.postfix())
+                self.pbar.set_postfix(postfix)
+                self.pbar.update(1)
+
+class BulkDownloader:
+    """Runs a per-speech download task across a bounded worker pool
+
+    All workers share the client's session; its connection pool is sized to
+    ``per_host`` and blocks when exhausted, which caps concurrent connections
+    to any single host.
+    """
+
+    def __init__(self, otter, workers=DEFAULT_WORKERS, per_host=None):
+        self.otter = otter
+        self.workers = max(1, int(workers))
+        self.per_host = max(1, int(per_host or self.workers))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.per_host, pool_block=True)
+        otter._session.mount('https://', adapter)
+        otter._session.mount('http://', adapter)
+
+    def run(self, speeches, task, tracker):
+        """Call ``task(speech)`` for every speech and record its bool result"""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._run_task, task, speech): speech for speech in speeches}
+            for future in as_completed(futures):
+                speech = futures[future]
+                tracker.record(speech['speech_id'], future.result(), modified=speech_modified_ts(speech))
+        return tracker
+
+    def run_batches(self, speeches, batch_task, tracker, batch_size):
+        """Call ``batch_task(batch)`` for groups of speeches
+
+        ``batch_task`` returns a ``{speech_id: bool}`` dict; speeches missing
+        from it are recorded as failed.
+        """
+        batches = [speeches[i:i + batch_size] for i in range(0, len(speeches), batch_size)]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._run_batch, batch_task, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                results = future.result()
+                for speech in futures[future]:
+                    tracker.record(speech['speech_id'], results.get(speech['speech_id'], False),
+                                   modified=speech_modified_ts(speech))
+        return tracker
+
+    def _run_batch(self, batch_task, batch):
+        try:
+            return batch_task(batch)
+        except Exception as e:
+            print(f"✗ Error downloading batch of {len(batch)} speeches: {e}")
+            return {}
+
+    def _run_task(self, task, speech):
+        try:
+            return bool(task(speech))
+        except Exception as e:
+            print(f"✗ Error downloading {speech.get('speech_id')}: {e}")
+            return False
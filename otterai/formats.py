@@ -0,0 +1,178 @@
+import tempfile
+import zipfile
+import shutil
+import os
+from otterai.otterai import OtterAIException, DOWNLOAD_CHUNK_SIZE, _default_mode
+from otterai.sync import speech_modified_ts
+from otterai.verify import file_checksum
+
+# Every format bulk_export produces
+ALL_FORMATS = ('txt', 'pdf', 'mp3', 'docx', 'srt')
+# Formats that only change when the audio does
+AUDIO_FORMATS = ('mp3',)
+# Blob store location inside the downloads tree
+BLOBS_DIRNAME = '.blobs'
+
+def formats_from_env(default=ALL_FORMATS):
+    """Formats listed in OTTER_FORMATS (comma separated), else ``default``"""
+    value = os.getenv('OTTER_FORMATS')
+    if not value:
+        return tuple(default)
+    formats = tuple(fmt.strip().lower() for fmt in value.split(',') if fmt.strip())
+    unknown = [fmt for fmt in formats if fmt not in ALL_FORMATS]
+    if unknown:
+        raise OtterAIException(f"Unknown formats in OTTER_FORMATS: {', '.join(unknown)}")
+    return formats
+
+def format_version(speech, fmt):
+    """Version of one format of a speech
+
+    Transcript formats change whenever the speech is modified; the audio is
+    fixed once uploaded, so an edited transcript does not make it stale.
+    """
+    if fmt in AUDIO_FORMATS:
+        return f"{speech.get('created_at') or 0}:{speech.get('duration') or 0}"
+    return str(speech_modified_ts(speech))
+
+class BlobStore:
+    """Content-addressed file store, ``<root>/<sha256[:2]>/<sha256>``
+
+    Identical content is stored once and hard-linked into speech directories
+    (copied where the filesystem does not support links).
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put(self, source):
+        """Move a file into the store, returns ``(digest, size)``"""
+        digest = file_checksum(source)
+        size = os.path.getsize(source)
+        target = self.path(digest)
+        if os.path.exists(target):
+            os.remove(source)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(source, target)
+        return digest, size
+
+    def put_stream(self, src, directory):
+        """Store the contents of a readable stream, returns ``(digest, size)``"""
+        fd, tmp_path = tempfile.mkstemp(prefix='.blob.', suffix='.part', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as dst:
+                shutil.copyfileobj(src, dst, DOWNLOAD_CHUNK_SIZE)
+            # Every hard link shares this mode, so set it before linking
+            _default_mode(tmp_path)
+            return self.put(tmp_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def prune(self):
+        """Delete blobs no speech directory links to any more, returns bytes freed"""
+        freed = 0
+        for prefix in os.scandir(self.root):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                stat = entry.stat()
+                if stat.st_nlink == 1:
+                    os.remove(entry.path)
+                    freed += stat.st_size
+        return freed
+
+    def link(self, digest, target):
+        """Place a stored blob at ``target``, replacing what is there"""
+        if os.path.exists(target) and os.path.samefile(self.path(digest), target):
+            # Renaming over another link to the same file would be a no-op
+            return
+        tmp_path = target + '.part'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(self.path(digest), tmp_path)
+        except OSError:
+            shutil.copyfile(self.path(digest), tmp_path)
+        os.replace(tmp_path, target)
+
+class FormatDownloader:
+    """Downloads only the formats a speech is missing or has stale
+
+    Each format is stored once in a BlobStore and linked into the speech
+    directory as ``<otid>.<format>``; the version and checksum of every
+    format a speech has are kept in the StateStore.
+    """
+
+    def __init__(self, otter, store, blobs, formats=ALL_FORMATS):
+        self.otter = otter
+        self.store = store
+        self.blobs = blobs
+        self.formats = tuple(formats)
+
+    def plan(self, speech, directory):
+        """Formats to request: never stored, stored at an older version, or missing on disk"""
+        stored = self.store.formats(speech['speech_id'])
+        otid = speech.get('otid') or speech.get('speech_otid')
+        wanted = []
+        for fmt in self.formats:
+            current = stored.get(fmt)
+            if (current is None or current['version'] != format_version(speech, fmt) or
+                    not os.path.exists(os.path.join(directory, f"{otid}.{fmt}"))):
+                wanted.append(fmt)
+        return wanted
+
+    def import_zip(self, speech, directory, zip_path, version_of=None):
+        """Take formats from an existing export zip instead of downloading them
+
+        ``version_of(fmt)`` gives the version the zip holds, by default the
+        speech's current versions. Returns the formats imported.
+        """
+        otid = speech.get('otid') or speech.get('speech_otid')
+        version_of = version_of or (lambda fmt: format_version(speech, fmt))
+        imported = []
+        with zipfile.ZipFile(zip_path) as archive:
+            for info in archive.infolist():
+                fmt = os.path.splitext(info.filename)[1].lstrip('.').lower()
+                if info.is_dir() or fmt not in self.formats or fmt in imported:
+                    continue
+                with archive.open(info) as src:
+                    digest, size = self.blobs.put_stream(src, directory)
+                self.blobs.link(digest, os.path.join(directory, f"{otid}.{fmt}"))
+                self.store.record_format(speech['speech_id'], fmt, version_of(fmt), digest, size)
+                imported.append(fmt)
+        return imported
+
+    def download(self, speech, directory):
+        """Fetch the planned formats for a speech, returns the formats downloaded"""
+        wanted = self.plan(speech, directory)
+        if not wanted:
+            return []
+        otid = speech.get('otid') or speech.get('speech_otid')
+        name = os.path.join(directory, f".{otid}.export")
+        # Multi-format exports are unpacked as they stream in, one file per format
+        response = self.otter.download_speech(otid, name=name, fileformat=','.join(wanted), extract=True)
+        files = response['data'].get('files') or [response['data']['filename']]
+        stored = []
+        try:
+            for filename in files:
+                fmt = os.path.splitext(filename)[1].lstrip('.').lower()
+                if fmt not in wanted or fmt in stored:
+                    continue
+                digest, size = self.blobs.put(filename)
+                self.blobs.link(digest, os.path.join(directory, f"{otid}.{fmt}"))
+                self.store.record_format(speech['speech_id'], fmt, format_version(speech, fmt), digest, size)
+                stored.append(fmt)
+        finally:
+            for filename in files:
+                if os.path.exists(filename):
+                    os.remove(filename)
+        missing = [fmt for fmt in wanted if fmt not in stored]
+        if missing:
+            raise OtterAIException(f"Export of {otid} is missing formats: {', '.join(missing)}")
+        return wanted
@@ -0,0 +1,145 @@
+import importlib
+import warnings
+import codecs
+import json
+import os
+
+# Decoders tried in order; OTTER_JSON picks one explicitly
+BACKENDS = ('orjson', 'ujson', 'json')
+_WHITESPACE = ' \t\n\r'
+
+def set_backend(name=None):
+    """Select the decoder by name, or the first one installed; returns its name"""
+    global _backend, _loads
+    for candidate in (name,) if name else BACKENDS:
+        if candidate not in BACKENDS:
+            raise ValueError(f"Unknown JSON backend {candidate!r}, expected one of {', '.join(BACKENDS)}")
+        try:
+            module = importlib.import_module(candidate)
+        except ImportError:
+            if name:
+                raise
+            continue
+        _backend, _loads = candidate, module.loads
+        return candidate
+
+def backend():
+    return _backend
+
+def loads(data, drop=()):
+    """Decode JSON bytes or text with the selected backend
+
+    Object members whose key is in ``drop`` are then pruned at any depth.
+    The whole document is still decoded, so this saves neither decode time
+    nor peak memory; it only keeps large values that are not needed (such
+    as word-level timings) from being held on to or copied by callers.
+    """
+    return prune(_loads(data), drop)
+
+def prune(data, keys):
+    """Remove members named in ``keys`` from decoded data, in place"""
+    if not keys:
+        return data
+    if isinstance(data, dict):
+        for key in keys:
+            data.pop(key, None)
+        for value in data.values():
+            if isinstance(value, (dict, list)):
+                prune(value, keys)
+    elif isinstance(data, list):
+        for value in data:
+            if isinstance(value, (dict, list)):
+                prune(value, keys)
+    return data
+
+class _StreamReader:
+    # JSON values decoded one at a time from an iterator of byte chunks.
+    # Only the unread part of the stream is buffered.
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.done = False
+
+    def _fill(self, need):
+        # Read until ``need`` characters are unread or the stream ends
+        while not self.done and len(self.buffer) - self.pos < need:
+            chunk = next(self._chunks, None)
+            self.buffer = self.buffer[self.pos:] + self._text.decode(chunk or b'', final=chunk is None)
+            self.pos = 0
+            self.done = chunk is None
+
+    def peek(self):
+        """Next non-whitespace character, '' at the end of the stream"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.done:
+                return self.buffer[self.pos:self.pos + 1]
+            self._fill(1)
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}, got {found!r}", self.buffer, self.pos)
+        self.pos += 1
+
+    def value(self):
+        """Decode the next value, reading as much of the stream as it needs"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.done:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.done:
+                    raise
+            # Double what is buffered so a large value is decoded O(log n) times
+            self._fill(2 * (len(self.buffer) - self.pos) + 1)
+
+def iter_items(chunks, path):
+    """Yield the items of the array at ``path`` in a JSON document arriving as chunks
+
+    ``path`` is a sequence of object keys, e.g. ``('speech', 'transcripts')``.
+    Each item is yielded as soon as it has been received, and values before
+    it are decoded and dropped, so memory stays bounded by the largest item.
+    Yields nothing if a key is missing; raises json.JSONDecodeError (a
+    ValueError) on malformed input.
+    """
+    reader = _StreamReader(chunks)
+    for key in path:
+        reader.expect('{')
+        while True:
+            if reader.peek() == '}':
+                return
+            name = reader.value()
+            reader.expect(':')
+            if name == key:
+                break
+            reader.value()
+            if reader.peek() == ',':
+                reader.expect(',')
+    if reader.peek() == 'n':
+        return
+    reader.expect('[')
+    if reader.peek() == ']':
+        return
+    while True:
+        yield reader.value()
+        if reader.peek() == ']':
+            return
+        reader.expect(',')
+
+_backend, _loads = 'json', json.loads
+try:
+    set_backend(os.getenv('OTTER_JSON') or None)
+except (ImportError, ValueError) as e:
+    # OTTER_JSON names a decoder that is unknown or not installed
+    warnings.warn(f"Ignoring OTTER_JSON: {e}", RuntimeWarning)
+    set_backend()
@@ -0,0 +1,180 @@
+import json
+import os
+from otterai.sync import speech_modified_ts
+from otterai.accounts import STATE_FILENAME
+from otterai.db import SQLiteStore
+
+# Default location of the index inside the downloads tree
+INDEX_FILENAME = '.index.db'
+
+class DownloadIndex(SQLiteStore):
+    """Persistent speech_id -> directory/files index of a downloads tree
+
+    ``refresh`` walks the tree with one ``os.scandir`` pass and stats the
+    files already indexed, re-listing only directories whose mtime changed
+    or whose files were rewritten in place, and re-reading ``metadata.json``
+    only when its size or mtime changed. Account directories written by
+    sync_accounts.py (marked by their state store) are scanned one level
+    down. ``update`` re-indexes one directory as a download lands.
+    """
+
+    def __init__(self, base_dir='downloads', path=None):
+        self.base_dir = base_dir
+        self.path = path or os.path.join(base_dir, INDEX_FILENAME)
+        super().__init__(self.path, '''
+            CREATE TABLE IF NOT EXISTS dirs (
+                directory TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                speech_id TEXT,
+                otid TEXT,
+                modified REAL
+            );
+            CREATE INDEX IF NOT EXISTS dirs_speech_id ON dirs (speech_id);
+            CREATE INDEX IF NOT EXISTS dirs_otid ON dirs (otid);
+            CREATE TABLE IF NOT EXISTS files (
+                directory TEXT NOT NULL,
+                name TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                checksum TEXT,
+                verified INTEGER,
+                PRIMARY KEY (directory, name)
+            );
+        ''')
+        # Indexes created before verification results were tracked
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(files)')}
+        for column, kind in (('checksum', 'TEXT'), ('verified', 'INTEGER')):
+            if column not in columns:
+                self._conn.execute(f'ALTER TABLE files ADD COLUMN {column} {kind}')
+
+    def refresh(self):
+        """Bring the index in line with the tree, returns number of directories re-listed"""
+        if not os.path.isdir(self.base_dir):
+            return 0
+        with self._lock:
+            known = dict(self._conn.execute('SELECT directory, mtime_ns FROM dirs').fetchall())
+            indexed = {}
+            for directory, name, size, mtime_ns in self._conn.execute(
+                    'SELECT directory, name, size, mtime_ns FROM files'):
+                indexed.setdefault(directory, {})[name] = (size, mtime_ns)
+        present = set()
+        changed = self._scan(self.base_dir, known, indexed, present, accounts=True)
+        with self._lock:
+            self._conn.execute('BEGIN')
+            for directory in set(known) - present:
+                self._conn.execute('DELETE FROM dirs WHERE directory = ?', (directory,))
+                self._conn.execute('DELETE FROM files WHERE directory = ?', (directory,))
+            self._conn.execute('COMMIT')
+        return changed
+
+    def _scan(self, parent, known, indexed, present, accounts=False):
+        changed = 0
+        with os.scandir(parent) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or not entry.is_dir(follow_symlinks=False):
+                    continue
+                if accounts and os.path.exists(os.path.join(entry.path, STATE_FILENAME)):
+                    # downloads/<account>/<speech> from sync_accounts.py
+                    changed += self._scan(entry.path, known, indexed, present)
+                    continue
+                present.add(entry.path)
+                # Rewriting a file in place leaves the directory mtime alone
+                if (known.get(entry.path) != entry.stat().st_mtime_ns
+                        or _files_changed(entry.path, indexed.get(entry.path, {}))):
+                    self._index_directory(entry.path)
+                    changed += 1
+        return changed
+
+    def update(self, directory):
+        """Re-index a single speech directory"""
+        if os.path.isdir(directory):
+            self._index_directory(directory)
+
+    def _index_directory(self, directory):
+        mtime_ns = os.stat(directory).st_mtime_ns
+        files = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False) and not entry.name.endswith(('.part', '.tmp')):
+                    stat = entry.stat()
+                    files.append((directory, entry.name, stat.st_size, stat.st_mtime_ns))
+        with self._lock:
+            previous = {row[0]: row[1:] for row in self._conn.execute(
+                'SELECT name, size, mtime_ns, checksum, verified FROM files WHERE directory = ?', (directory,))}
+            row = self._conn.execute('SELECT speech_id, otid, modified FROM dirs WHERE directory = ?',
+                                     (directory,)).fetchone()
+        speech_id, otid, modified = row if row else (None, None, None)
+        metadata = next((f for f in files if f[1] == 'metadata.json'), None)
+        if metadata and (row is None or previous.get('metadata.json', ())[:2] != metadata[2:]):
+            speech_id, otid, modified = _read_ids(os.path.join(directory, 'metadata.json'))
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.execute('INSERT OR REPLACE INTO dirs (directory, mtime_ns, speech_id, otid, modified) '
+                               'VALUES (?, ?, ?, ?, ?)', (directory, mtime_ns, speech_id, otid, modified))
+            self._conn.execute('DELETE FROM files WHERE directory = ?', (directory,))
+            # Keep verification results of files that have not changed
+            self._conn.executemany(
+                'INSERT INTO files (directory, name, size, mtime_ns, checksum, verified) VALUES (?, ?, ?, ?, ?, ?)',
+                [f + (previous[f[1]][2:] if previous.get(f[1], ())[:2] == f[2:] else (None, None)) for f in files])
+            self._conn.execute('COMMIT')
+
+    def lookup(self, speech_id):
+        """Directory and ``{name: (size, mtime_ns)}`` files for a speech_id or otid"""
+        with self._lock:
+            row = self._conn.execute('SELECT directory FROM dirs WHERE speech_id = ? OR otid = ? LIMIT 1',
+                                     (speech_id, speech_id)).fetchone()
+            if row is None:
+                return None
+            files = self._conn.execute('SELECT name, size, mtime_ns FROM files WHERE directory = ?', (row[0],)).fetchall()
+        return {'directory': row[0], 'files': {name: (size, mtime_ns) for name, size, mtime_ns in files}}
+
+    def directories(self):
+        """``(directory, speech_id, otid, {name: (size, mtime_ns)})`` for every indexed directory"""
+        with self._lock:
+            dirs = self._conn.execute('SELECT directory, speech_id, otid FROM dirs').fetchall()
+            files = self._conn.execute('SELECT directory, name, size, mtime_ns FROM files').fetchall()
+        by_directory = {}
+        for directory, name, size, mtime_ns in files:
+            by_directory.setdefault(directory, {})[name] = (size, mtime_ns)
+        return [(directory, speech_id, otid, by_directory.get(directory, {})) for directory, speech_id, otid in dirs]
+
+    def verification(self, path):
+        """Recorded ``(size, mtime_ns, checksum, verified)`` for a file, or None"""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT size, mtime_ns, checksum, verified FROM files WHERE directory = ? AND name = ?',
+                (os.path.dirname(path), os.path.basename(path))).fetchone()
+
+    def record_verification(self, path, size, mtime_ns, checksum, ok):
+        with self._lock:
+            self._conn.execute('''
+                INSERT INTO files (directory, name, size, mtime_ns, checksum, verified) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (directory, name) DO UPDATE SET
+                    size = excluded.size, mtime_ns = excluded.mtime_ns,
+                    checksum = excluded.checksum, verified = excluded.verified
+            ''', (os.path.dirname(path), os.path.basename(path), size, mtime_ns, checksum, int(ok)))
+
+    def speeches(self):
+        """``{speech_id: modified timestamp}`` for every indexed speech"""
+        with self._lock:
+            rows = self._conn.execute('SELECT speech_id, modified FROM dirs WHERE speech_id IS NOT NULL').fetchall()
+        return dict(rows)
+
+def _files_changed(directory, files):
+    for name, recorded in files.items():
+        try:
+            stat = os.stat(os.path.join(directory, name))
+        except OSError:
+            return True
+        if (stat.st_size, stat.st_mtime_ns) != recorded:
+            return True
+    return False
+
+def _read_ids(metadata_file):
+    try:
+        with open(metadata_file) as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return None, None, None
+    return (metadata.get('speech_id'), metadata.get('otid') or metadata.get('speech_otid'),
+            speech_modified_ts(metadata))
@@ -0,0 +1,215 @@
+from collections import deque
+import threading
+import bisect
+import json
+import time
+import os
+
+# Upper bounds (seconds) of the latency histogram buckets, Prometheus style
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Seconds of history used for the live throughput figure
+THROUGHPUT_WINDOW = 10.0
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One count per bucket plus the +Inf overflow
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+class MetricsCollector:
+    """In-process aggregator for OtterAI request events
+
+    Register it with ``otter.add_hook(collector)``. Keeps per-endpoint
+    request, status, retry and byte counters and latency histograms for
+    time to first byte and total request time. For streamed downloads,
+    request_end arrives once the body has been read, with the bytes read.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS, window=THROUGHPUT_WINDOW):
+        self.buckets = tuple(buckets)
+        self.window = window
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._recent = deque()
+        # When the first observed request started, so early throughput is
+        # not averaged over a window that has not elapsed yet
+        self._first = None
+
+    def __call__(self, event):
+        if event['event'] == 'request_end':
+            self._observe(event)
+        elif event['event'] == 'retry':
+            with self._lock:
+                self._endpoint(event['endpoint'])['retries'] += 1
+
+    def _endpoint(self, endpoint):
+        stats = self._endpoints.get(endpoint)
+        if stats is None:
+            stats = self._endpoints[endpoint] = {
+                'requests': 0, 'errors': 0, 'retries': 0, 'statuses': {},
+                'bytes_sent': 0, 'bytes_received': 0,
+                'ttfb': Histogram(self.buckets), 'total': Histogram(self.buckets)}
+        return stats
+
+    def _observe(self, event):
+        now = time.monotonic()
+        received = event.get('bytes_received') or 0
+        with self._lock:
+            stats = self._endpoint(event['endpoint'])
+            stats['requests'] += 1
+            if event.get('error'):
+                stats['errors'] += 1
+            else:
+                status = str(event['status'])
+                stats['statuses'][status] = stats['statuses'].get(status, 0) + 1
+            stats['bytes_sent'] += event.get('bytes_sent') or 0
+            stats['bytes_received'] += received
+            if event.get('ttfb') is not None:
+                stats['ttfb'].observe(event['ttfb'])
+            stats['total'].observe(event['total'])
+            self._recent.append((now, received, event['total']))
+            if self._first is None:
+                self._first = now - event['total']
+            self._trim(now)
+
+    def _trim(self, now):
+        while self._recent and now - self._recent[0][0] > self.window:
+            self._recent.popleft()
+
+    def throughput(self):
+        """Bytes per second received over the last ``window`` seconds
+
+        A finished request's bytes are spread evenly over the time it took,
+        so a long download counts towards every second it was running
+        rather than all at once when it ends.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            if not self._recent:
+                return 0.0
+            span = max(min(self.window, now - self._first), 1.0)
+            since = now - span
+            received = 0.0
+            for end, size, total in self._recent:
+                if total <= 0 or end - total >= since:
+                    received += size
+                else:
+                    received += size * max(end - since, 0.0) / total
+            return received / span
+
+    def recent_latency(self, q=0.95):
+        """Quantile of total request time over the last ``window`` seconds"""
+        with self._lock:
+            self._trim(time.monotonic())
+            latencies = sorted(total for _, _, total in self._recent)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def postfix(self):
+        """Live figures for ``tqdm.set_postfix``"""
+        return {'MB/s': f"{self.throughput() / (1024 * 1024):.1f}",
+                'p95': f"{self.recent_latency(0.95) * 1000:.0f}ms"}
+
+    def snapshot(self):
+        """Per-endpoint counters and p50/p95/p99 latencies in seconds"""
+        with self._lock:
+            result = {}
+            for endpoint, stats in self._endpoints.items():
+                entry = {k: v for k, v in stats.items() if k not in ('ttfb', 'total', 'statuses')}
+                entry['statuses'] = dict(stats['statuses'])
+                for name in ('ttfb', 'total'):
+                    histogram = stats[name]
+                    entry[name] = {'count': histogram.count, 'sum': histogram.sum,
+                                   'p50': histogram.quantile(0.50), 'p95': histogram.quantile(0.95),
+                                   'p99': histogram.quantile(0.99)}
+                result[endpoint] = entry
+            return result
+
+    def prometheus(self, prefix='otterai'):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            for name, kind, help_text in (
+                    ('requests_total', 'counter', 'Requests sent, including retries'),
+                    ('errors_total', 'counter', 'Requests that failed without a response'),
+                    ('retries_total', 'counter', 'Requests retried'),
+                    ('bytes_sent_total', 'counter', 'Request body bytes sent'),
+                    ('bytes_received_total', 'counter', 'Response body bytes received')):
+                key = name[:-len('_total')]
+                lines += [f"# HELP {prefix}_{name} {help_text}", f"# TYPE {prefix}_{name} {kind}"]
+                lines += [f'{prefix}_{name}{{endpoint="{endpoint}"}} {stats[key]}' for endpoint, stats in endpoints]
+
+            lines += [f"# HELP {prefix}_responses_total Responses by status code",
+                      f"# TYPE {prefix}_responses_total counter"]
+            for endpoint, stats in endpoints:
+                lines += [f'{prefix}_responses_total{{endpoint="{endpoint}",status="{status}"}} {n}'
+                          for status, n in sorted(stats['statuses'].items())]
+
+            for name, help_text in (('ttfb', 'Seconds until response headers arrived'),
+                                    ('total', 'Seconds spent sending the request and reading the response')):
+                metric = f"{prefix}_request_{name}_seconds"
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for endpoint, stats in endpoints:
+                    histogram = stats[name]
+                    cumulative = 0
+                    for bound, n in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                        cumulative += n
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{metric}_bucket{{endpoint="{endpoint}",le="{le}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{endpoint="{endpoint}"}} {histogram.sum}')
+                    lines.append(f'{metric}_count{{endpoint="{endpoint}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path, prefix='otterai'):
+        """Atomically write the Prometheus text, e.g. for node_exporter's textfile collector"""
+        tmp_path = path + '.part'
+        with open(tmp_path, 'w') as f:
+            f.write(self.prometheus(prefix))
+        os.replace(tmp_path, path)
+
+class JsonLinesExporter:
+    """Hook that appends every request event to a file as one JSON object per line"""
+
+    def __init__(self, path):
+        self._file = open(path, 'a', buffering=1)
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        line = json.dumps(event, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,134 @@
+import json
+from otterai import jsonlib
+
+def _encode(data):
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode()
+
+class Model:
+    """Compact result object with ``__slots__``
+
+    The fields named in ``FIELDS`` are kept as attributes; every other key
+    is held as compact JSON bytes and only decoded when asked for, so large
+    rarely used values (summaries, speaker lists, transcripts) cost a few
+    bytes per character instead of a tree of Python objects. ``get``,
+    ``[]`` and ``to_dict`` give the same view as the response dict, except
+    that a missing field and a null one are both None.
+    """
+
+    __slots__ = ('_raw',)
+    # Keys decoded up front into slots of the same name
+    FIELDS = ()
+    # Key of the list in a list response, and of the object in a single one
+    LIST_KEY = None
+    ITEM_KEY = None
+
+    def __init__(self, data):
+        for field in self.FIELDS:
+            setattr(self, field, data.get(field))
+        rest = {key: value for key, value in data.items() if key not in self.FIELDS}
+        self._raw = _encode(rest) if rest else None
+
+    def extra(self):
+        """The keys not kept as fields, decoded from the raw bytes"""
+        return jsonlib.loads(self._raw) if self._raw else {}
+
+    def get(self, key, default=None):
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra().get(key, default)
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            return getattr(self, key)
+        return self.extra()[key]
+
+    def __contains__(self, key):
+        if key in self.FIELDS:
+            return getattr(self, key) is not None
+        return key in self.extra()
+
+    def to_dict(self):
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        data.update(self.extra())
+        return data
+
+    def __repr__(self):
+        fields = ', '.join(f'{field}={getattr(self, field)!r}' for field in self.FIELDS[:3])
+        return f'{type(self).__name__}({fields})'
+
+    def __getstate__(self):
+        return {slot: getattr(self, slot) for slot in self.FIELDS + ('_raw',)}
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
+class Speech(Model):
+    """A speech from ``get_speeches``/``iter_speeches`` or ``get_speech``"""
+
+    FIELDS = ('speech_id', 'otid', 'title', 'created_at', 'modified_time', 'duration', 'folder_id')
+    __slots__ = FIELDS
+    LIST_KEY = 'speeches'
+    ITEM_KEY = 'speech'
+
+    @property
+    def id(self):
+        """The id downloads and get_speech take: otid, else speech_id"""
+        return self.otid or self.speech_id
+
+    @property
+    def modified(self):
+        """Last change time as an epoch timestamp"""
+        return self.modified_time or self.created_at or 0
+
+    @property
+    def transcripts(self):
+        # Only present in get_speech responses; decoded on every access
+        return self.extra().get('transcripts', [])
+
+class Speaker(Model):
+    """A speaker from ``get_speakers`` or ``create_speaker``"""
+
+    FIELDS = ('id', 'speaker_name', 'user_id')
+    __slots__ = FIELDS
+    LIST_KEY = 'speakers'
+    ITEM_KEY = 'speaker'
+
+    @property
+    def name(self):
+        return self.speaker_name
+
+class Folder(Model):
+    """A folder from ``get_folders``"""
+
+    FIELDS = ('id', 'folder_name')
+    __slots__ = FIELDS
+    LIST_KEY = 'folders'
+    ITEM_KEY = 'folder'
+
+    @property
+    def name(self):
+        return self.folder_name
+
+class Group(Model):
+    """A group from ``list_groups``"""
+
+    FIELDS = ('id', 'name')
+    __slots__ = FIELDS
+    LIST_KEY = 'groups'
+    ITEM_KEY = 'group'
+
+def from_response(result, model):
+    """Models from a ``{'status', 'data'}`` response
+
+    Returns a list for list responses (``get_speeches``, ``get_speakers``,
+    ``get_folders``, ``list_groups``), a single model for ``get_speech`` and
+    ``create_speaker``, and ``[]`` when the response holds neither (errors).
+    """
+    data = result.get('data') or {}
+    if model.LIST_KEY in data:
+        return [model(item) for item in data[model.LIST_KEY] or []]
+    if data.get(model.ITEM_KEY) is not None:
+        return model(data[model.ITEM_KEY])
+    return []
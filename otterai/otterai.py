@@ -1,74 +1,473 @@
-from requests_toolbelt.multipart.encoder import MultipartEncoder
 import xml.etree.ElementTree as ET
 import requests
+import urllib3
+import tempfile
 import json
+import threading
+import zipfile
+import queue
+import mmap
+import shutil
+import time
+import os
+from otterai.ratelimit import RetryPolicy, TokenBucket, RequestStats
+from otterai.unzip import extract_stream, StreamingZipError, TruncatedZipError, UnstreamableZipError
+from otterai.models import Model, Speech
+from otterai import jsonlib
+from otterai.transcripts import segment_from_api
+
+# Size of the blocks written to disk while streaming an export
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Number of speeches requested per bulk_export call in download_speeches
+DOWNLOAD_BATCH_SIZE = 10
+# The process umask, read on first use by _umask()
+_UMASK = None
+_UMASK_LOCK = threading.Lock()
 
 class OtterAIException(Exception):
     pass
 
+def _speech_otid(speech):
+    # speech is a dict or an otterai.models.Speech
+    return speech.get('otid') or speech.get('speech_id')
+
+def _normalize_name(name):
+    return ''.join(c for c in name.lower() if c.isalnum())
+
+def _split_export_members(infos, speeches):
+    # Assign each member of a combined export to its speech, by otid in the
+    # member path first and by title (file stem or top folder) otherwise
+    members = {_speech_otid(speech): [] for speech in speeches}
+    titles = {}
+    for speech in speeches:
+        title = _normalize_name(speech.get('title') or '')
+        if title:
+            titles.setdefault(title, []).append(_speech_otid(speech))
+    for info in infos:
+        if info.is_dir():
+            continue
+        owner = next((otid for otid in members if otid in info.filename), None)
+        if owner is None:
+            parts = info.filename.split('/')
+            for candidate in (parts[0], os.path.splitext(parts[-1])[0]):
+                owners = titles.get(_normalize_name(candidate), [])
+                if len(owners) == 1:
+                    owner = owners[0]
+                    break
+        if owner is None:
+            raise OtterAIException(f"Could not match export member {info.filename} to a speech")
+        members[owner].append(info)
+    missing = [otid for otid, infos in members.items() if not infos]
+    if missing:
+        raise OtterAIException(f"Export is missing speeches {', '.join(missing)}")
+    return members
+
+def _write_member_zip(archive, infos, filename):
+    # Copy members into a per-speech zip without loading them into memory
+    tmp_path = filename + '.part'
+    with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as out:
+        for info in infos:
+            target = zipfile.ZipInfo(info.filename.split('/')[-1], info.date_time)
+            target.compress_type = info.compress_type
+            with archive.open(info) as src, out.open(target, 'w') as dst:
+                shutil.copyfileobj(src, dst, DOWNLOAD_CHUNK_SIZE)
+    os.replace(tmp_path, filename)
+
+def _umask():
+    # Read the umask from /proc without touching it; os.umask can only read
+    # it by setting it, which briefly changes it for every other thread
+    global _UMASK
+    with _UMASK_LOCK:
+        if _UMASK is None:
+            try:
+                with open('/proc/self/status') as f:
+                    _UMASK = next(int(line.split()[1], 8) for line in f
+                                  if line.startswith('Umask:'))
+            except (OSError, StopIteration, IndexError, ValueError):
+                _UMASK = os.umask(0o022)
+                os.umask(_UMASK)
+        return _UMASK
+
+def _default_mode(path):
+    # mkstemp creates files 0600; give a finished download the mode
+    # open() would have, so other users and services can still read it
+    os.chmod(path, 0o666 & ~_umask())
+
+def _parse_upload_location(text):
+    # S3 PostResponse: Location, Bucket, Key
+    xmlroot = ET.fromstring(text)
+    return xmlroot[1].text, xmlroot[2].text
+
+def _never_sent(error):
+    # True when the connection could not be made, so the server never saw
+    # the request and even a non-idempotent one is safe to send again
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, urllib3.exceptions.ConnectTimeoutError)
+
+def _no_auth(request):
+    return request
+
+class _MmapReader:
+    # MultipartEncoder sizes a part by len(), which for a bare mmap is the
+    # whole mapping rather than the bytes left to read
+    def __init__(self, mapping):
+        self._mapping = mapping
+
+    @property
+    def len(self):
+        return len(self._mapping) - self._mapping.tell()
+
+    def read(self, length=-1):
+        return self._mapping.read(length)
+
+    def seek(self, offset, whence=0):
+        return self._mapping.seek(offset, whence)
+
+    def close(self):
+        self._mapping.close()
+
+def _upload_progress(progress):
+    # Adapt MultipartEncoderMonitor callbacks to (done, total, bytes_per_sec)
+    started = time.monotonic()
+
+    def callback(monitor):
+        elapsed = time.monotonic() - started
+        progress(monitor.bytes_read, monitor.len, monitor.bytes_read / elapsed if elapsed > 0 else 0.0)
+    return callback
+
+def _prefetch(iterable, depth=1):
+    # Run an iterator on a background thread, keeping up to depth items ready
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+
+    def put(entry):
+        # Give up once the consumer has gone away
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except BaseException as e:
+            put((done, e))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
+
 class OtterAI:
     API_BASE_URL = 'https://otter.ai/forward/api/v1/'
     S3_BASE_URL = 'https://s3.us-west-2.amazonaws.com/'
 
-    def __init__(self):
+    def __init__(self, retry_policy=None, rate_limiter=None, cache=None):
         self._session = requests.Session()
         self._userid = None
         self._cookies = None
+        # Shared by every thread using this client; rate_limiter=False disables throttling
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._rate_limiter = TokenBucket() if rate_limiter is None else rate_limiter
+        self._stats = RequestStats()
+        self._hooks = []
+        # Optional otterai.cache.ResponseCache for metadata reads
+        self._cache = cache
+        self._preflight_ok = False
+        # Kept in memory (never saved) so an expired session can log in again
+        self._credentials = None
+        self._session_path = None
+        self._login_lock = threading.Lock()
+        self._login_generation = 0
+
+    def request_stats(self):
+        # Per-endpoint request/retry/throttle/error counters
+        return self._stats.snapshot()
+
+    def cache_stats(self):
+        # Response cache hit/miss counters, empty without a cache
+        return self._cache.stats() if self._cache is not None else {}
+
+    def add_hook(self, hook):
+        # hook(event) is called from the requesting thread for every
+        # request_start, request_end and retry event
+        self._hooks.append(hook)
+        return hook
+
+    def remove_hook(self, hook):
+        self._hooks.remove(hook)
+
+    def _emit(self, event, **fields):
+        if not self._hooks:
+            return
+        fields['event'] = event
+        fields['time'] = time.time()
+        for hook in list(self._hooks):
+            try:
+                hook(fields)
+            except Exception:
+                # Instrumentation must never break a request
+                pass
+
+    def _emit_end(self, endpoint, url, attempt, started, response=None, error=None, received=None):
+        # received is the body bytes actually read, for streamed responses
+        if not self._hooks:
+            return
+        fields = {'endpoint': endpoint, 'url': url, 'attempt': attempt, 'total': time.perf_counter() - started,
+                  'method': None, 'status': None, 'bytes_sent': None, 'bytes_received': None, 'ttfb': None,
+                  'error': f"{type(error).__name__}: {error}" if error is not None else None}
+        if response is not None:
+            sent = response.request.headers.get('Content-Length') if response.request is not None else None
+            if received is None:
+                received = response.headers.get('Content-Length')
+            if received is None and response._content_consumed:
+                # Body already read (not streamed) without a Content-Length
+                received = len(response.content or b'')
+            # requests only exposes the time until the response headers were
+            # parsed; DNS and connect time are folded into it
+            fields.update(method=response.request.method if response.request is not None else None,
+                          status=response.status_code, ttfb=response.elapsed.total_seconds(),
+                          bytes_sent=int(sent) if sent else 0,
+                          bytes_received=int(received) if received is not None else None)
+        self._emit('request_end', **fields)
+
+    def _request(self, method, url, idempotent=True, **kwargs):
+        generation = self._login_generation
+        stream = kwargs.get('stream', False)
+        response = self._retry(url, lambda: self._session.request(method, url, **kwargs), idempotent, stream)
+        if (response.status_code != requests.codes.unauthorized or self._credentials is None or
+                url == self.API_BASE_URL + 'login'):
+            return response
+        # The session expired: log in again (once, however many threads saw
+        # the 401) and resend; a 401 means the request was not acted on
+        response.close()
+        self._relogin(generation)
+        headers = kwargs.get('headers')
+        if headers and 'x-csrftoken' in headers and self._cookies:
+            kwargs['headers'] = dict(headers, **{'x-csrftoken': self._cookies.get('csrftoken')})
+        return self._retry(url, lambda: self._session.request(method, url, **kwargs), idempotent, stream)
+
+    def _relogin(self, generation):
+        with self._login_lock:
+            if self._login_generation != generation:
+                # Another thread already logged in again
+                return
+            response = self.login(*self._credentials)
+            if response['status'] != requests.codes.ok:
+                raise OtterAIException(f"Session expired and login failed with status {response['status']}")
+            if self._session_path:
+                self.save_session(self._session_path)
+
+    def _retry(self, url, send, idempotent=True, stream=False):
+        # Rate limit, send and retry on connection errors, 429 and 5xx
+        endpoint = url.rstrip('/').rsplit('/', 1)[-1]
+        attempt = 0
+        while True:
+            if self._rate_limiter:
+                self._rate_limiter.acquire()
+            self._stats.increment(endpoint, 'requests')
+            self._emit('request_start', endpoint=endpoint, url=url, attempt=attempt)
+            started = time.perf_counter()
+            try:
+                response = send()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._stats.increment(endpoint, 'errors')
+                self._emit_end(endpoint, url, attempt, started, error=e)
+                if not (idempotent or _never_sent(e)) or not self._retry_policy.should_retry(attempt):
+                    raise
+                delay = self._retry_policy.delay(attempt)
+                reason = type(e).__name__
+            else:
+                if stream and response.ok and self._hooks:
+                    # The body is still to come: _iter_body emits request_end
+                    # once it has been read, so total covers the transfer
+                    response._otter_pending = (endpoint, url, attempt, started)
+                else:
+                    self._emit_end(endpoint, url, attempt, started, response=response)
+                if response.status_code == 429:
+                    self._stats.increment(endpoint, 'throttled')
+                    if self._rate_limiter:
+                        self._rate_limiter.on_throttle()
+                elif response.ok and self._rate_limiter:
+                    self._rate_limiter.on_success()
+                if (response.status_code not in self._retry_policy.retry_statuses or
+                        not self._retry_policy.should_retry(attempt, response.status_code, idempotent)):
+                    return response
+                delay = self._retry_policy.delay(attempt, response.headers.get('Retry-After'))
+                reason = response.status_code
+                response.close()
+            self._stats.increment(endpoint, 'retries')
+            self._emit('retry', endpoint=endpoint, url=url, attempt=attempt, delay=delay, reason=reason)
+            time.sleep(delay)
+            attempt += 1
+
+    def _iter_body(self, response, chunk_size):
+        # iter_content of a streamed response, emitting its deferred
+        # request_end with the bytes read once the body is finished, fails
+        # or is abandoned
+        pending = response.__dict__.pop('_otter_pending', None)
+        if pending is None:
+            yield from response.iter_content(chunk_size=chunk_size)
+            return
+        received = 0
+        error = None
+        try:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                received += len(chunk)
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._emit_end(*pending, response=response, error=error, received=received)
+
+    def _cached_get(self, url, params, drop=()):
+        # GET through the response cache: fresh entries are served locally,
+        # stale ones are revalidated with their ETag / Last-Modified. The
+        # cache holds full response bodies; ``drop`` only trims what is returned
+        if self._cache is None:
+            return self._handle_response(self._request('GET', url, params=params), drop=drop)
+        endpoint = url.rstrip('/').rsplit('/', 1)[-1]
+        key = self._cache.key(endpoint, params)
+        entry, fresh = self._cache.lookup(key, drop)
+        if fresh:
+            return {'status': entry['status'], 'data': entry['data']}
+        headers = {}
+        if entry is not None and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry is not None and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        response = self._request('GET', url, params=params, headers=headers)
+        if response.status_code == requests.codes.not_modified and entry is not None:
+            self._cache.touch(key)
+            return {'status': entry['status'], 'data': entry['data']}
+        if response.status_code == requests.codes.ok:
+            self._cache.store(key, endpoint, response.status_code, response.content,
+                              response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return self._handle_response(response, drop=drop)
+
+    def _invalidate(self, endpoint, params=None):
+        if self._cache is not None:
+            self._cache.invalidate(endpoint, params)
 
     def _is_userid_invalid(self):
         if not self._userid:
             return True
         return False
 
-    def _handle_response(self, response, data=None):
+    def _handle_response(self, response, data=None, drop=()):
         if data:
             return {'status': response.status_code, 'data': data}
         try:
-            return {'status': response.status_code, 'data': response.json()}
+            # orjson/ujson when installed, see otterai.jsonlib
+            return {'status': response.status_code, 'data': jsonlib.loads(response.content, drop)}
         except ValueError:
             return {'status': response.status_code, 'data': {}}
 
     def login(self, username, password):
         # API URL
-        auth_url = OtterAI.API_BASE_URL + 'login'
+        auth_url = self.API_BASE_URL + 'login'
         # Query Parameters
         payload = {'username': username}
         # Basic Authentication
         self._session.auth = (username, password)
         # GET
-        response = self._session.get(auth_url, params=payload)
+        response = self._request('GET', auth_url, params=payload)
         # Check
         if response.status_code != requests.codes.ok:
             return self._handle_response(response)
         # Set userid & cookies
         self._userid = response.json()['userid']
         self._cookies = response.cookies.get_dict()
+        self._credentials = (username, password)
+        self._login_generation += 1
 
         return self._handle_response(response)
 
+    def save_session(self, path):
+        """Write the userid and session cookies to ``path`` (never the password)"""
+        cookies = [{'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path,
+                    'expires': c.expires, 'secure': c.secure} for c in self._session.cookies]
+        state = {'userid': self._userid, 'username': self._credentials[0] if self._credentials else None,
+                 'cookies': cookies, 'saved_at': time.time()}
+        tmp_path = path + '.part'
+        # Session cookies are as good as a password: owner-only permissions
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+        self._session_path = path
+
+    def load_session(self, path, username=None, password=None):
+        """Restore a session saved by ``save_session``, returns False if there is none to use
+
+        A session is unusable when the file is missing or unreadable, was
+        saved for another user, or its csrftoken cookie has expired. With
+        credentials, requests that get a 401 log in again and re-save the
+        session.
+        """
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not state.get('userid') or (username and state.get('username') not in (None, username)):
+            return False
+        now = time.time()
+        cookies = [c for c in state.get('cookies', []) if c.get('expires') is None or c['expires'] > now]
+        if not any(c['name'] == 'csrftoken' for c in cookies):
+            return False
+        for c in cookies:
+            self._session.cookies.set(c['name'], c['value'], domain=c.get('domain') or '',
+                                      path=c.get('path') or '/', expires=c.get('expires'),
+                                      secure=bool(c.get('secure')))
+        self._userid = state['userid']
+        self._cookies = {c['name']: c['value'] for c in cookies}
+        if username and password:
+            self._session.auth = (username, password)
+            self._credentials = (username, password)
+        self._session_path = path
+        return True
+
     def get_user(self):
         # API URL
-        user_url = OtterAI.API_BASE_URL + 'user'
+        user_url = self.API_BASE_URL + 'user'
         # GET
-        response = self._session.get(user_url)
+        response = self._request('GET', user_url)
 
         return self._handle_response(response)
 
     def get_speakers(self):
         # API URL
-        speakers_url = OtterAI.API_BASE_URL + 'speakers'
+        speakers_url = self.API_BASE_URL + 'speakers'
         if self._is_userid_invalid():
             raise OtterAIException('userid is invalid')      
         # Query Parameters
         payload = {'userid': self._userid}
         # GET
-        response = self._session.get(speakers_url, params=payload)
-
-        return self._handle_response(response)
+        return self._cached_get(speakers_url, payload)
     
-    def get_speeches(self, folder=0, page_size=45, source="owned"):
+    def get_speeches(self, folder=0, page_size=45, source="owned", last_load_ts=None, modified_after=None,
+                     extra_params=None, headers=None):
+        # extra_params and headers are sent as given, e.g. to match the web
+        # app's query (speech_metadata, funnel) and x-client-version
         # API URL
-        speeches_url = OtterAI.API_BASE_URL + 'speeches'
+        speeches_url = self.API_BASE_URL + 'speeches'
         if self._is_userid_invalid():
             raise OtterAIException('userid is invalid')
         # Query Parameters 
@@ -76,97 +475,199 @@ class OtterAI:
                 'folder': folder, 
                 'page_size': page_size, 
                 'source': source}
+        # Pagination cursor from the previous page
+        if last_load_ts is not None:
+            payload['last_load_ts'] = last_load_ts
+        # Only speeches changed since this epoch timestamp
+        if modified_after is not None:
+            payload['modified_after'] = modified_after
+        payload.update(extra_params or {})
         # GET
-        response = self._session.get(speeches_url, params=payload)
+        response = self._request('GET', speeches_url, params=payload, headers=headers)
 
         return self._handle_response(response)
 
-    def get_speech(self, speech_id):
+    def iter_speech_pages(self, folder=0, page_size=45, source="owned", last_load_ts=None, modified_after=None,
+                          extra_params=None, headers=None):
+        # Follow the last_load_ts cursor until end_of_list
+        while True:
+            response = self.get_speeches(folder=folder, page_size=page_size, source=source,
+                                         last_load_ts=last_load_ts, modified_after=modified_after,
+                                         extra_params=extra_params, headers=headers)
+            if response['status'] != requests.codes.ok:
+                raise OtterAIException(f"Got response status {response['status']} when listing speeches")
+            data = response['data']
+            yield data
+            last_load_ts = data.get('last_load_ts')
+            if not data.get('speeches') or not last_load_ts or data.get('end_of_list', True):
+                return
+
+    def iter_speeches(self, folder=0, page_size=45, source="owned", last_load_ts=None, modified_after=None,
+                      prefetch=True, models=False, extra_params=None, headers=None):
+        # Yield unique speeches page by page, optionally fetching the next
+        # page in the background while the current one is consumed; with
+        # models, each speech is a compact otterai.models.Speech
+        pages = self.iter_speech_pages(folder=folder, page_size=page_size, source=source,
+                                       last_load_ts=last_load_ts, modified_after=modified_after,
+                                       extra_params=extra_params, headers=headers)
+        if prefetch:
+            pages = _prefetch(pages)
+        seen_ids = set()
+        for data in pages:
+            for speech in data.get('speeches', []):
+                speech_id = speech.get('speech_id')
+                if speech_id in seen_ids:
+                    continue
+                seen_ids.add(speech_id)
+                yield Speech(speech) if models else speech
+
+    def get_speech(self, speech_id, drop=None):
         # API URL
-        speech_url = OtterAI.API_BASE_URL + 'speech'
+        speech_url = self.API_BASE_URL + 'speech'
         if self._is_userid_invalid():
             raise OtterAIException('userid is invalid')
         # Query Params
         payload = {'userid': self._userid, 'otid': speech_id}
-        # GET
-        response = self._session.get(speech_url, params=payload)
-
-        return self._handle_response(response)
+        # GET; keys in drop (e.g. ('transcripts',) for metadata only) are
+        # pruned from the decoded response at any depth. The full response
+        # is still parsed: iter_transcript bounds memory, this does not
+        return self._cached_get(speech_url, payload, drop=tuple(drop or ()))
+
+    def iter_transcript(self, speech_id, chunk_size=64 * 1024):
+        # Yield transcript segments ({transcript, start_offset, end_offset,
+        # speaker, speaker_id}) as get_speech's response arrives, holding
+        # one chunk and one segment at a time rather than the whole speech
+        speech_url = self.API_BASE_URL + 'speech'
+        if self._is_userid_invalid():
+            raise OtterAIException('userid is invalid')
+        payload = {'userid': self._userid, 'otid': speech_id}
+        response = self._request('GET', speech_url, params=payload, stream=True)
+        try:
+            if response.status_code != requests.codes.ok:
+                raise OtterAIException(f"Got response status {response.status_code} when reading {speech_id}")
+            for item in jsonlib.iter_items(self._iter_body(response, chunk_size), ('speech', 'transcripts')):
+                yield segment_from_api(item)
+        except ValueError as e:
+            raise OtterAIException(f"Malformed transcript for {speech_id}: {e}")
+        finally:
+            response.close()
 
     def query_speech(self, query, speech_id, size=500):
         # API URL
-        query_speech_url = OtterAI.API_BASE_URL + 'advanced_search'
+        query_speech_url = self.API_BASE_URL + 'advanced_search'
         # Query Params
         payload = {'query': query, "size": size, "otid": speech_id}
         # GET
-        response = self._session.get(query_speech_url, params=payload)
+        response = self._request('GET', query_speech_url, params=payload)
 
         return self._handle_response(response)
 
-    def upload_speech(self, file_name, content_type='audio/mp4'):
-        # API URL
-        speech_upload_params_url = OtterAI.API_BASE_URL + 'speech_upload_params'
-        speech_upload_prod_url = OtterAI.S3_BASE_URL + 'speech-upload-prod'
-        finish_speech_upload = OtterAI.API_BASE_URL + 'finish_speech_upload'
-
+    def upload_speech(self, file_name, content_type='audio/mp4', progress=None, use_mmap=False):
         if self._is_userid_invalid():
             raise OtterAIException('userid is invalid')
 
         # First grab upload params (aws data)
-        payload = {'userid': self._userid}
-        response = self._session.get(speech_upload_params_url, params=payload)
+        response = self._get_upload_params()
 
         if response.status_code != requests.codes.ok:
             return self._handle_response(response)
 
-        response_json = response.json()
-        params_data = response_json['data']
+        params_data = response.json()['data']
 
-        # Send options (precondition) request
-        prep_req = requests.Request('OPTIONS', speech_upload_prod_url).prepare()
-        prep_req.headers['Accept'] = '*/*'
-        prep_req.headers['Connection'] = 'keep-alive'
-        prep_req.headers['Origin'] = 'https://otter.ai'
-        prep_req.headers['Referer'] = 'https://otter.ai/'
-        prep_req.headers['Access-Control-Request-Method'] = 'POST'
-        # POST
-        response = self._session.send(prep_req)
+        # Send options (precondition) request, once per session
+        response = self._upload_preflight()
 
-        if response.status_code != requests.codes.ok:
+        if response is not None and response.status_code != requests.codes.ok:
             return self._handle_response(response)
         
         # Post file to bucket
-        # TODO: test for large files (this should stream)
-        fields = {}
-        params_data['success_action_status'] = str(params_data['success_action_status'])
-        del params_data['form_action']
-        fields.update(params_data)
-        fields['file'] = (file_name, open(file_name, mode='rb'), content_type)
-        multipart_data = MultipartEncoder(fields=fields)
-        # POST
-        response = requests.post(speech_upload_prod_url, data=multipart_data,
-            headers={'Content-Type': multipart_data.content_type})
+        response = self._upload_to_s3(self.S3_BASE_URL + 'speech-upload-prod', file_name, params_data,
+                                      content_type, progress, use_mmap)
 
         if response.status_code != 201:
             return self._handle_response(response)
 
-        # Pase xml response
-        xmltree = ET.ElementTree(ET.fromstring(response.text))
-        xmlroot = xmltree.getroot()
-        # TODO: clean this up
-        location = xmlroot[0].text
-        bucket = xmlroot[1].text
-        key = xmlroot[2].text
-
         # Call finish api
-        payload = {'bucket': bucket, 'key': key, 'language': 'en', 'country': 'us', 'userid': self._userid}
-        response = self._session.get(finish_speech_upload, params=payload)
+        bucket, key = _parse_upload_location(response.text)
+        response = self._finish_upload(bucket, key)
 
         return self._handle_response(response)
 
-    def download_speech(self, speech_id, name=None, fileformat="txt,pdf,mp3,docx,srt"):
+    def _get_upload_params(self):
         # API URL
-        download_speech_url = OtterAI.API_BASE_URL + 'bulk_export'
+        speech_upload_params_url = self.API_BASE_URL + 'speech_upload_params'
+        # Query Params
+        payload = {'userid': self._userid}
+        # GET
+        return self._request('GET', speech_upload_params_url, params=payload)
+
+    def _upload_preflight(self):
+        # The CORS preflight only needs to succeed once per session,
+        # returns None when it already has
+        if self._preflight_ok:
+            return None
+        # API URL
+        speech_upload_prod_url = self.S3_BASE_URL + 'speech-upload-prod'
+        prep_req = requests.Request('OPTIONS', speech_upload_prod_url).prepare()
+        prep_req.headers['Accept'] = '*/*'
+        prep_req.headers['Connection'] = 'keep-alive'
+        prep_req.headers['Origin'] = 'https://otter.ai'
+        prep_req.headers['Referer'] = 'https://otter.ai/'
+        prep_req.headers['Access-Control-Request-Method'] = 'POST'
+        # OPTIONS
+        response = self._retry(speech_upload_prod_url, lambda: self._session.send(prep_req))
+        self._preflight_ok = response.status_code == requests.codes.ok
+        return response
+
+    def _finish_upload(self, bucket, key):
+        # API URL
+        finish_speech_upload = self.API_BASE_URL + 'finish_speech_upload'
+        # Query Params
+        payload = {'bucket': bucket, 'key': key, 'language': 'en', 'country': 'us', 'userid': self._userid}
+        # GET, but it creates the speech: only retried if it was never received
+        return self._request('GET', finish_speech_upload, idempotent=False, params=payload)
+
+    def _upload_to_s3(self, url, file_name, params_data, content_type, progress=None, use_mmap=False):
+        # Stream the file as multipart form data with bounded memory; every
+        # retry rewinds the same file (or mapping) rather than buffering it
+        fields = dict(params_data)
+        fields['success_action_status'] = str(fields['success_action_status'])
+        fields.pop('form_action', None)
+        with open(file_name, mode='rb') as f:
+            reader = f
+            if use_mmap and os.fstat(f.fileno()).st_size > 0:
+                reader = _MmapReader(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            try:
+                # Imported here so that starting the client stays fast
+                from requests_toolbelt.multipart.encoder import MultipartEncoder, MultipartEncoderMonitor
+
+                def send():
+                    reader.seek(0)
+                    multipart_data = MultipartEncoder(fields=dict(fields, file=(file_name, reader, content_type)))
+                    if progress:
+                        multipart_data = MultipartEncoderMonitor(multipart_data, _upload_progress(progress))
+                    # POST, without the otter.ai basic auth
+                    return self._session.post(url, data=multipart_data, auth=_no_auth,
+                                              headers={'Content-Type': multipart_data.content_type})
+                return self._retry(url, send)
+            finally:
+                if reader is not f:
+                    reader.close()
+
+    def upload_speeches(self, file_names, concurrency=4, content_type='audio/mp4', progress=None, use_mmap=False,
+                        prefetch=2):
+        # Upload several files through the pipelined uploader, data is the
+        # list of results in input order; progress gets (file_name, done,
+        # total, bytes_per_sec)
+        from otterai.uploader import PipelinedUploader
+        uploader = PipelinedUploader(self, concurrency=concurrency, prefetch=prefetch)
+        results = uploader.upload(list(file_names), content_type=content_type, progress=progress, use_mmap=use_mmap)
+        return {'status': requests.codes.ok, 'data': results}
+
+    def download_speech(self, speech_id, name=None, fileformat="txt,pdf,mp3,docx,srt",
+                        chunk_size=DOWNLOAD_CHUNK_SIZE, progress=None, extract=False):
+        # API URL
+        download_speech_url = self.API_BASE_URL + 'bulk_export'
         if self._is_userid_invalid():
             raise OtterAIException('userid is invalid')
         # Query Params
@@ -174,19 +675,208 @@ class OtterAI:
         # POST
         data = {'formats': fileformat, "speech_otid_list": [speech_id]}
         headers = {'x-csrftoken': self._cookies['csrftoken'], "referer": "https://otter.ai/"}
-        response = self._session.post(download_speech_url, params=payload, headers=headers, data=data)
         #filename 
         filename = (name if not name==None else speech_id) + "." + ("zip" if "," in fileformat else fileformat)
-        if response.ok:
-            with open(filename, "wb") as f:
-                f.write(response.content)
-        else:
-            raise OtterAIException(f"Got response status {response.status_code} when attempting to download {speech_id}")
+        # Unpack a multi-format export as it arrives, as <name>.<format>
+        extract = extract and "," in fileformat
+        streamable = True
+        attempt = 0
+        while True:
+            response = self._request('POST', download_speech_url, params=payload, headers=headers, data=data, stream=True)
+            try:
+                with response:
+                    if not response.ok:
+                        raise OtterAIException(f"Got response status {response.status_code} when attempting to download {speech_id}")
+                    if extract and streamable:
+                        try:
+                            files = self._stream_extract(response, filename[:-len('.zip')], chunk_size, progress)
+                        except UnstreamableZipError:
+                            # e.g. a stored mp3 with a trailing data descriptor:
+                            # request it again and extract it from a file
+                            streamable = False
+                            continue
+                    elif extract:
+                        files = self._extract_export(response, filename[:-len('.zip')], chunk_size, progress)
+                    else:
+                        self._stream_to_file(response, filename, chunk_size, progress)
+                break
+            except (requests.exceptions.ChunkedEncodingError, requests.ConnectionError, TruncatedZipError) as e:
+                # Connection dropped mid-body, start the export over
+                if not self._retry_policy.should_retry(attempt):
+                    if isinstance(e, StreamingZipError):
+                        raise OtterAIException(f"Could not extract export of {speech_id}: {e}")
+                    raise
+                delay = self._retry_policy.delay(attempt)
+                self._stats.increment('bulk_export', 'retries')
+                self._emit('retry', endpoint='bulk_export', url=download_speech_url, attempt=attempt,
+                           delay=delay, reason=type(e).__name__)
+                time.sleep(delay)
+                attempt += 1
+        if extract:
+            return self._handle_response(response, data={"files": files})
         return self._handle_response(response, data={"filename": filename})
 
+    def _stream_extract(self, response, base_name, chunk_size, progress=None):
+        # Extract members straight from the response; each is CRC-checked
+        # before it is renamed into place
+        total = int(response.headers.get('Content-Length') or 0) or None
+        started = time.monotonic()
+
+        def chunks():
+            done = 0
+            for chunk in self._iter_body(response, chunk_size):
+                if not chunk:
+                    continue
+                done += len(chunk)
+                if progress:
+                    elapsed = time.monotonic() - started
+                    progress(done, total, done / elapsed if elapsed > 0 else 0.0)
+                yield chunk
+
+        def target_for(member):
+            extension = os.path.splitext(member)[1].lower()
+            return base_name + extension if extension else None
+
+        try:
+            return extract_stream(chunks(), target_for)
+        except (TruncatedZipError, UnstreamableZipError):
+            raise
+        except StreamingZipError as e:
+            raise OtterAIException(f"Could not extract export: {e}")
+
+    def _extract_export(self, response, base_name, chunk_size, progress=None):
+        # Download the export to a temp file and extract it with zipfile,
+        # for archives that cannot be read as a stream
+        directory = os.path.dirname(os.path.abspath(base_name))
+        fd, archive_path = tempfile.mkstemp(prefix='.' + os.path.basename(base_name) + '.', suffix='.zip', dir=directory)
+        os.close(fd)
+        written = []
+        try:
+            self._stream_to_file(response, archive_path, chunk_size, progress)
+            with zipfile.ZipFile(archive_path) as archive:
+                for info in archive.infolist():
+                    extension = os.path.splitext(info.filename)[1].lower()
+                    if info.is_dir() or not extension:
+                        continue
+                    target = base_name + extension
+                    tmp_path = target + '.part'
+                    try:
+                        with archive.open(info) as src, open(tmp_path, 'wb') as dst:
+                            shutil.copyfileobj(src, dst, DOWNLOAD_CHUNK_SIZE)
+                        os.replace(tmp_path, target)
+                    except BaseException:
+                        if os.path.exists(tmp_path):
+                            os.remove(tmp_path)
+                        raise
+                    written.append(target)
+        except (zipfile.BadZipFile, NotImplementedError) as e:
+            raise OtterAIException(f"Could not extract export: {e}")
+        finally:
+            if os.path.exists(archive_path):
+                os.remove(archive_path)
+        return written
+
+    def _stream_to_file(self, response, filename, chunk_size, progress=None):
+        # Write chunks to a temp file next to the target, then rename it into
+        # place so readers never see a partially written export
+        total = int(response.headers.get('Content-Length') or 0) or None
+        directory = os.path.dirname(os.path.abspath(filename))
+        fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(filename) + '.', suffix='.part', dir=directory)
+        started = time.monotonic()
+        done = 0
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in self._iter_body(response, chunk_size):
+                    if not chunk:
+                        continue
+                    f.write(chunk)
+                    done += len(chunk)
+                    if progress:
+                        elapsed = time.monotonic() - started
+                        progress(done, total, done / elapsed if elapsed > 0 else 0.0)
+            _default_mode(tmp_path)
+            os.replace(tmp_path, filename)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return done
+
+    def download_speeches(self, speeches, base_dir='.', batch_size=DOWNLOAD_BATCH_SIZE,
+                          fileformat="txt,pdf,mp3,docx,srt", speech_dir=None,
+                          chunk_size=DOWNLOAD_CHUNK_SIZE, progress=None):
+        # speeches are otids, speech dicts or otterai.models.Speech objects,
+        # speech_dir(speech) returns the directory each <otid>.zip is written to
+        if self._is_userid_invalid():
+            raise OtterAIException('userid is invalid')
+        speeches = [s if isinstance(s, (dict, Model)) else {'otid': s} for s in speeches]
+        if speech_dir is None:
+            speech_dir = lambda speech: os.path.join(base_dir, _speech_otid(speech))
+        result = {'downloaded': {}, 'failed': {}}
+        batch_size = max(1, int(batch_size))
+        for i in range(0, len(speeches), batch_size):
+            self._download_batch(speeches[i:i + batch_size], base_dir, fileformat, speech_dir,
+                                 chunk_size, progress, result)
+        return {'status': requests.codes.ok, 'data': result}
+
+    def _download_batch(self, batch, base_dir, fileformat, speech_dir, chunk_size, progress, result):
+        if len(batch) == 1:
+            speech = batch[0]
+            otid = _speech_otid(speech)
+            try:
+                directory = speech_dir(speech)
+                os.makedirs(directory, exist_ok=True)
+                response = self.download_speech(otid, name=os.path.join(directory, otid), fileformat=fileformat,
+                                                chunk_size=chunk_size, progress=progress)
+                result['downloaded'][otid] = response['data']['filename']
+            except Exception as e:
+                result['failed'][otid] = str(e)
+            return
+
+        try:
+            self._download_combined(batch, base_dir, fileformat, speech_dir, chunk_size, progress, result)
+        except (OtterAIException, requests.RequestException, zipfile.BadZipFile, OSError):
+            # Oversized or unsplittable export, retry as two smaller batches
+            middle = len(batch) // 2
+            self._download_batch(batch[:middle], base_dir, fileformat, speech_dir, chunk_size, progress, result)
+            self._download_batch(batch[middle:], base_dir, fileformat, speech_dir, chunk_size, progress, result)
+
+    def _download_combined(self, batch, base_dir, fileformat, speech_dir, chunk_size, progress, result):
+        # API URL
+        download_speech_url = self.API_BASE_URL + 'bulk_export'
+        # Query Params
+        payload = {'userid': self._userid}
+        # POST
+        otids = [_speech_otid(speech) for speech in batch]
+        data = {'formats': fileformat, "speech_otid_list": otids}
+        headers = {'x-csrftoken': self._cookies['csrftoken'], "referer": "https://otter.ai/"}
+        os.makedirs(base_dir, exist_ok=True)
+        fd, combined = tempfile.mkstemp(prefix='.bulk_export.', suffix='.zip', dir=base_dir)
+        os.close(fd)
+        try:
+            response = self._request('POST', download_speech_url, params=payload, headers=headers, data=data, stream=True)
+            with response:
+                if not response.ok:
+                    raise OtterAIException(f"Got response status {response.status_code} when attempting to download {len(otids)} speeches")
+                self._stream_to_file(response, combined, chunk_size, progress)
+            with zipfile.ZipFile(combined) as archive:
+                members = _split_export_members(archive.infolist(), batch)
+                written = {}
+                for speech in batch:
+                    otid = _speech_otid(speech)
+                    directory = speech_dir(speech)
+                    os.makedirs(directory, exist_ok=True)
+                    filename = os.path.join(directory, otid + ".zip")
+                    _write_member_zip(archive, members[otid], filename)
+                    written[otid] = filename
+            result['downloaded'].update(written)
+        finally:
+            if os.path.exists(combined):
+                os.remove(combined)
+
     def move_to_trash_bin(self, speech_id):
         # API URL
-        move_to_trash_bin_url = OtterAI.API_BASE_URL + 'move_to_trash_bin'
+        move_to_trash_bin_url = self.API_BASE_URL + 'move_to_trash_bin'
         if self._is_userid_invalid():
             raise OtterAIException('userid is invalid')
         # Query Params
@@ -194,13 +884,16 @@ class OtterAI:
         # POST
         data = {'otid': speech_id}
         headers = {'x-csrftoken': self._cookies['csrftoken']}
-        response = self._session.post(move_to_trash_bin_url, params=payload, headers=headers, data=data)
+        response = self._request('POST', move_to_trash_bin_url, params=payload, headers=headers, data=data)
+        # The speech is gone and folder counts changed
+        self._invalidate('speech', {'userid': self._userid, 'otid': speech_id})
+        self._invalidate('folders')
 
         return self._handle_response(response)
 
     def create_speaker(self, speaker_name):
         # API URL
-        create_speaker_url = OtterAI.API_BASE_URL + 'create_speaker'
+        create_speaker_url = self.API_BASE_URL + 'create_speaker'
         if self._is_userid_invalid():
             raise OtterAIException('userid is invalid')
         # Query Parameters
@@ -208,44 +901,41 @@ class OtterAI:
         # POST
         data = {'speaker_name': speaker_name}
         headers = {'x-csrftoken': self._cookies['csrftoken']}
-        response = self._session.post(create_speaker_url, params=payload, headers=headers, data=data)
+        response = self._request('POST', create_speaker_url, idempotent=False, params=payload, headers=headers, data=data)
+        self._invalidate('speakers')
 
         return self._handle_response(response)
 
     def get_notification_settings(self):
         # API URL
-        notification_settings_url = OtterAI.API_BASE_URL + 'get_notification_settings'
-        response = self._session.get(notification_settings_url)
+        notification_settings_url = self.API_BASE_URL + 'get_notification_settings'
+        response = self._request('GET', notification_settings_url)
         
         return self._handle_response(response)
 
     def list_groups(self):
         # API URL
-        list_groups_url = OtterAI.API_BASE_URL + 'list_groups'
+        list_groups_url = self.API_BASE_URL + 'list_groups'
         if self._is_userid_invalid():
             raise OtterAIException('userid is invalid')
         # Query Parameters
         payload = {'userid': self._userid}
         # GET
-        response = self._session.get(list_groups_url, params=payload)
-
-        return self._handle_response(response)
+        return self._cached_get(list_groups_url, payload)
 
     def get_folders(self):
         # API URL
-        folders_url = OtterAI.API_BASE_URL + 'folders'
+        folders_url = self.API_BASE_URL + 'folders'
         if self._is_userid_invalid():
             raise OtterAIException('userid is invalid')
         # Query Parameters
         payload = {'userid': self._userid}
         # GET
-        response = self._session.get(folders_url, params=payload)
-
-        return self._handle_response(response)
+        return self._cached_get(folders_url, payload)
 
     def speech_start(self):
         # API URL
-        speech_start_uel = OtterAI.API_BASE_URL + 'speech_start'
+        speech_start_uel = self.API_BASE_URL + 'speech_start'
         ### TODO
         # In the browser a websocket session is opened
         # wss://ws.aisense.com/api/v2/client/speech?token=ey...
@@ -253,4 +943,4 @@ class OtterAI:
 
     def stop_speech(self):
         # API URL
-        speech_finish_url = OtterAI.API_BASE_URL + 'speech_finish'
+        speech_finish_url = self.API_BASE_URL + 'speech_finish'
@@ -0,0 +1,111 @@
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import threading
+import random
+import time
+
+# Statuses worth retrying: throttled or a transient server error
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+class RetryPolicy:
+    """Jittered exponential backoff that honors Retry-After"""
+
+    def __init__(self, max_retries=5, backoff_base=0.5, backoff_max=60.0, retry_statuses=RETRY_STATUSES):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = frozenset(retry_statuses)
+
+    def should_retry(self, attempt, status=None, idempotent=True):
+        if attempt >= self.max_retries:
+            return False
+        if status is None:
+            return True
+        # A 429 was rejected before processing, so it is safe to repeat anything
+        return status == 429 or (idempotent and status in self.retry_statuses)
+
+    def delay(self, attempt, retry_after=None):
+        # Full jitter: uniform over [0, base * 2^attempt], capped
+        backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        wait = parse_retry_after(retry_after)
+        if wait is not None:
+            return min(self.backoff_max, max(wait, backoff))
+        return backoff
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+class TokenBucket:
+    """Adaptive token bucket shared by every thread using a client
+
+    The refill rate drops multiplicatively when the server throttles and
+    creeps back up additively on success, so bulk runs settle near the
+    highest rate the server accepts.
+    """
+
+    def __init__(self, rate=10.0, burst=None, min_rate=0.5, max_rate=100.0,
+                 decrease_factor=0.5, increase_step=0.1):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a token is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttle(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            # Drain the bucket so waiting threads back off as well
+            self._tokens = min(self._tokens, 0.0)
+
+class RequestStats:
+    """Thread-safe per-endpoint request, retry and throttle counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def increment(self, endpoint, counter):
+        with self._lock:
+            counters = self._counters.setdefault(endpoint, {'requests': 0, 'retries': 0, 'throttled': 0, 'errors': 0})
+            counters[counter] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {endpoint: dict(counters) for endpoint, counters in self._counters.items()}
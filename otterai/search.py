@@ -0,0 +1,229 @@
+import zipfile
+import sqlite3
+import time
+import zlib
+import os
+from otterai.otterai import OtterAIException
+from otterai.manifest import DownloadIndex
+from otterai.transcripts import parse_srt, parse_txt
+from otterai.db import SQLiteStore
+
+# Default location of the search index inside the downloads tree
+SEARCH_FILENAME = '.search.db'
+# Transcript formats in order of preference; srt carries end times
+TRANSCRIPT_FORMATS = ('srt', 'txt')
+# Word count of a segment, for rows indexed before it was stored
+_SQL_WORDS = ("CASE WHEN trim(transcript) = '' THEN 0 "
+              "ELSE length(trim(transcript)) - length(replace(trim(transcript), ' ', '')) + 1 END")
+
+class TranscriptIndex(SQLiteStore):
+    """Offline full-text index over downloaded transcripts (SQLite FTS5)
+
+    ``refresh`` reads the srt (or txt) out of every speech's zip, or a loose
+    srt/txt file, and only re-reads sources whose size or mtime changed.
+    ``search`` returns hits shaped like ``OtterAI.query_speech`` across
+    every speech, or one speech when given its id.
+    """
+
+    def __init__(self, base_dir='downloads', path=None, index=None):
+        self.base_dir = base_dir
+        self.path = path or os.path.join(base_dir, SEARCH_FILENAME)
+        self.index = index or DownloadIndex(base_dir)
+        try:
+            super().__init__(self.path, '''
+                CREATE TABLE IF NOT EXISTS sources (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT UNIQUE NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    speech_id TEXT,
+                    otid TEXT,
+                    indexed REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS sources_speech_id ON sources (speech_id);
+                CREATE INDEX IF NOT EXISTS sources_otid ON sources (otid);
+                CREATE TABLE IF NOT EXISTS segments (
+                    id INTEGER PRIMARY KEY,
+                    source_id INTEGER NOT NULL,
+                    start_offset INTEGER,
+                    end_offset INTEGER,
+                    speaker TEXT,
+                    transcript TEXT NOT NULL,
+                    words INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS segments_source ON segments (source_id);
+                CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+                    transcript, content='segments', content_rowid='id', tokenize='unicode61'
+                );
+                CREATE TRIGGER IF NOT EXISTS segments_insert AFTER INSERT ON segments BEGIN
+                    INSERT INTO segments_fts (rowid, transcript) VALUES (new.id, new.transcript);
+                END;
+                CREATE TRIGGER IF NOT EXISTS segments_delete AFTER DELETE ON segments BEGIN
+                    INSERT INTO segments_fts (segments_fts, rowid, transcript) VALUES ('delete', old.id, old.transcript);
+                END;
+            ''')
+        except sqlite3.OperationalError as e:
+            raise OtterAIException(f"Transcript search needs SQLite with FTS5: {e}")
+        if 'words' not in [row[1] for row in self._conn.execute('PRAGMA table_info(segments)')]:
+            # Indexes built before word counts were kept
+            self._conn.execute('ALTER TABLE segments ADD COLUMN words INTEGER')
+            self._conn.execute(f'UPDATE segments SET words = {_SQL_WORDS}')
+        # Lets segment_table read the numbers without touching the text
+        self._conn.execute('CREATE INDEX IF NOT EXISTS segments_numbers '
+                           'ON segments (source_id, speaker, start_offset, end_offset, words)')
+
+    def refresh(self):
+        """Index new and changed transcripts, returns the number of sources (re)read"""
+        self.index.refresh()
+        with self._lock:
+            known = {row[0]: row[1:] for row in self._conn.execute('SELECT path, size, mtime_ns FROM sources')}
+        present = set()
+        changed = 0
+        for directory, speech_id, otid, files in self.index.directories():
+            path = _transcript_source(directory, files)
+            if path is None:
+                continue
+            present.add(path)
+            if known.get(path) == files[os.path.basename(path)]:
+                continue
+            # Exports from download_from_list are named <otid>.zip
+            stem = os.path.splitext(os.path.basename(path))[0]
+            self._index_source(path, files[os.path.basename(path)], speech_id,
+                               otid or (stem if stem != 'content' else None))
+            changed += 1
+        with self._lock:
+            self._conn.execute('BEGIN')
+            for path in set(known) - present:
+                self._delete_source(path)
+            self._conn.execute('COMMIT')
+        return changed
+
+    def _index_source(self, path, stat, speech_id, otid):
+        try:
+            segments = _read_segments(path)
+        except (zipfile.BadZipFile, zlib.error, EOFError, OSError) as e:
+            print(f"✗ Could not index {path}: {e}")
+            segments = []
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._delete_source(path)
+            source_id = self._conn.execute(
+                'INSERT INTO sources (path, size, mtime_ns, speech_id, otid, indexed) VALUES (?, ?, ?, ?, ?, ?)',
+                (path, stat[0], stat[1], speech_id, otid, time.time())).lastrowid
+            self._conn.executemany(
+                'INSERT INTO segments (source_id, start_offset, end_offset, speaker, transcript, words) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(source_id, s['start_offset'], s['end_offset'], s['speaker'], s['transcript'],
+                  len(s['transcript'].split())) for s in segments])
+            self._conn.execute('COMMIT')
+
+    def _delete_source(self, path):
+        row = self._conn.execute('SELECT id FROM sources WHERE path = ?', (path,)).fetchone()
+        if row is not None:
+            self._conn.execute('DELETE FROM segments WHERE source_id = ?', (row[0],))
+            self._conn.execute('DELETE FROM sources WHERE id = ?', (row[0],))
+
+    def search(self, query, speech_id=None, size=500, phrase=True):
+        """Search transcripts, results shaped like ``OtterAI.query_speech``
+
+        With ``phrase`` the query is matched as an exact phrase, otherwise it
+        is passed to FTS5 as is (``budget AND launch``, ``plan*``). Each hit
+        also carries the speech's ``otid`` and ``speech_id``.
+        """
+        match = '"' + query.replace('"', '""') + '"' if phrase else query
+        sql = '''
+            SELECT segments.transcript, segments.start_offset, segments.end_offset, segments.speaker,
+                   sources.otid, sources.speech_id
+            FROM segments_fts
+            JOIN segments ON segments.id = segments_fts.rowid
+            JOIN sources ON sources.id = segments.source_id
+            WHERE segments_fts MATCH ?
+        '''
+        params = [match]
+        if speech_id is not None:
+            sql += ' AND (sources.speech_id = ? OR sources.otid = ?)'
+            params += [speech_id, speech_id]
+        sql += ' ORDER BY segments_fts.rank LIMIT ?'
+        params.append(size)
+        try:
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            return {'status': 400, 'data': {'status': 'error', 'error': str(e), 'hits': []}}
+        hits = [{'transcript': transcript, 'start_offset': start, 'end_offset': end, 'speaker': speaker,
+                 'otid': otid, 'speech_id': speech}
+                for transcript, start, end, speaker, otid, speech in rows]
+        return {'status': 200, 'data': {'status': 'OK', 'hits': hits}}
+
+    def sources(self):
+        """``(source id, path, speech_id, otid)`` of every indexed transcript, by id"""
+        with self._lock:
+            return self._conn.execute('SELECT id, path, speech_id, otid FROM sources ORDER BY id').fetchall()
+
+    def segment_table(self, fetch_size=10000):
+        """All segments as numbers: ``(speakers, rows)``
+
+        ``speakers`` is the sorted list of distinct speaker names and
+        ``rows`` yields ``(source id, speaker index or -1, start_offset,
+        end_offset, words)``. A missing end offset is the start offset.
+        """
+        with self._lock:
+            speakers = [row[0] for row in self._conn.execute(
+                'SELECT DISTINCT speaker FROM segments WHERE speaker IS NOT NULL ORDER BY speaker')]
+            cursor = self._conn.execute('''
+                WITH names AS (
+                    SELECT speaker, ROW_NUMBER() OVER (ORDER BY speaker) - 1 AS idx
+                    FROM (SELECT DISTINCT speaker FROM segments WHERE speaker IS NOT NULL)
+                )
+                SELECT segments.source_id, COALESCE(names.idx, -1), COALESCE(segments.start_offset, 0),
+                       COALESCE(segments.end_offset, segments.start_offset, 0), COALESCE(segments.words, 0)
+                FROM segments INDEXED BY segments_numbers
+                LEFT JOIN names ON names.speaker = segments.speaker
+            ''')
+
+        def rows():
+            while True:
+                with self._lock:
+                    batch = cursor.fetchmany(fetch_size)
+                if not batch:
+                    return
+                yield from batch
+        return speakers, rows()
+
+    def version(self):
+        """Changes whenever a transcript is indexed, re-indexed or removed"""
+        with self._lock:
+            return tuple(self._conn.execute(
+                'SELECT COUNT(*), COALESCE(MAX(id), 0), COALESCE(SUM(indexed), 0) FROM sources').fetchone())
+
+    def stats(self):
+        with self._lock:
+            sources = self._conn.execute('SELECT COUNT(*) FROM sources').fetchone()[0]
+            segments = self._conn.execute('SELECT COUNT(*) FROM segments').fetchone()[0]
+        return {'sources': sources, 'segments': segments}
+
+def _transcript_source(directory, files):
+    # The speech's export zip, else a loose srt/txt file
+    zips = sorted(name for name in files if name.endswith('.zip'))
+    if zips:
+        return os.path.join(directory, zips[0])
+    for fmt in TRANSCRIPT_FORMATS:
+        loose = sorted(name for name in files if name.endswith('.' + fmt))
+        if loose:
+            return os.path.join(directory, loose[0])
+    return None
+
+def _parse(fmt, data):
+    text = data.decode('utf-8-sig', errors='replace')
+    return parse_srt(text) if fmt == 'srt' else parse_txt(text)
+
+def _read_segments(path):
+    if not path.endswith('.zip'):
+        with open(path, 'rb') as f:
+            return _parse(os.path.splitext(path)[1].lstrip('.').lower(), f.read())
+    with zipfile.ZipFile(path) as archive:
+        members = {os.path.splitext(name)[1].lstrip('.').lower(): name for name in archive.namelist()}
+        for fmt in TRANSCRIPT_FORMATS:
+            if fmt in members:
+                return _parse(fmt, archive.read(members[fmt]))
+    return []
@@ -0,0 +1,133 @@
+import sqlite3
+import json
+import time
+import os
+from otterai.db import SQLiteStore
+
+DOWNLOADED = 'downloaded'
+FAILED = 'failed'
+
+class StateStore(SQLiteStore):
+    """Per-speech download state in SQLite (WAL mode), keyed by speech_id
+
+    Each row holds status, attempts, size, checksum, the speech's last
+    modified timestamp and first/last update times. Lookups are indexed and
+    every record is its own small transaction, so cost per speech does not
+    grow with the archive. A single connection is shared across threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        super().__init__(path, '''
+            CREATE TABLE IF NOT EXISTS speeches (
+                speech_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                size INTEGER,
+                checksum TEXT,
+                modified REAL,
+                created REAL NOT NULL,
+                updated REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS speeches_status ON speeches (status);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS formats (
+                speech_id TEXT NOT NULL,
+                format TEXT NOT NULL,
+                version TEXT,
+                checksum TEXT,
+                size INTEGER,
+                updated REAL NOT NULL,
+                PRIMARY KEY (speech_id, format)
+            );
+        ''')
+        self._conn.row_factory = sqlite3.Row
+
+    @classmethod
+    def open(cls, path, legacy_json=None):
+        """Open a store, importing a legacy JSON tracker the first time"""
+        is_new = not os.path.exists(path)
+        store = cls(path)
+        if is_new and legacy_json and os.path.exists(legacy_json):
+            store.import_json(legacy_json)
+        return store
+
+    def get(self, speech_id):
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM speeches WHERE speech_id = ?', (speech_id,)).fetchone()
+        return dict(row) if row else None
+
+    def status(self, speech_id):
+        with self._lock:
+            row = self._conn.execute('SELECT status FROM speeches WHERE speech_id = ?', (speech_id,)).fetchone()
+        return row[0] if row else None
+
+    def record(self, speech_id, status, size=None, checksum=None, modified=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute('''
+                INSERT INTO speeches (speech_id, status, attempts, size, checksum, modified, created, updated)
+                VALUES (?, ?, 1, ?, ?, ?, ?, ?)
+                ON CONFLICT (speech_id) DO UPDATE SET
+                    status = excluded.status,
+                    attempts = attempts + 1,
+                    size = COALESCE(excluded.size, size),
+                    checksum = COALESCE(excluded.checksum, checksum),
+                    modified = COALESCE(excluded.modified, modified),
+                    updated = excluded.updated
+            ''', (speech_id, status, size, checksum, modified, now, now))
+
+    def ids(self, status):
+        with self._lock:
+            rows = self._conn.execute('SELECT speech_id FROM speeches WHERE status = ?', (status,)).fetchall()
+        return [row[0] for row in rows]
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM speeches GROUP BY status').fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def formats(self, speech_id):
+        """``{format: {version, checksum, size}}`` stored locally for a speech"""
+        with self._lock:
+            rows = self._conn.execute('SELECT format, version, checksum, size FROM formats WHERE speech_id = ?',
+                                      (speech_id,)).fetchall()
+        return {row[0]: {'version': row[1], 'checksum': row[2], 'size': row[3]} for row in rows}
+
+    def record_format(self, speech_id, fmt, version, checksum, size):
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO formats (speech_id, format, version, checksum, size, updated) '
+                               'VALUES (?, ?, ?, ?, ?, ?)', (speech_id, fmt, str(version), checksum, size, time.time()))
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, json.dumps(value)))
+
+    def import_json(self, path):
+        """Import a {'downloaded': [...], 'failed': [...]} tracker file"""
+        with open(path) as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError:
+                print(f"Warning: Corrupt tracker file {path}, not importing")
+                return 0
+        now = time.time()
+        rows = [(speech_id, FAILED, now, now) for speech_id in data.get(FAILED, [])]
+        # downloaded wins over failed, matching retry_failed's bookkeeping
+        rows += [(speech_id, DOWNLOADED, now, now) for speech_id in data.get(DOWNLOADED, [])]
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.executemany('''
+                INSERT INTO speeches (speech_id, status, attempts, created, updated) VALUES (?, ?, 1, ?, ?)
+                ON CONFLICT (speech_id) DO UPDATE SET status = excluded.status
+            ''', rows)
+            self._conn.execute('COMMIT')
+        return len(rows)
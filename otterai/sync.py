@@ -0,0 +1,66 @@
+from otterai.state import DOWNLOADED
+
+def speech_modified_ts(speech):
+    """Last change time of a speech as an epoch timestamp"""
+    return speech.get('modified_time') or speech.get('created_at') or 0
+
+class IncrementalSync:
+    """Lists only speeches changed since the last sync of an account
+
+    The high-water mark (largest modified/created timestamp synced so far)
+    is kept per account in the StateStore's meta table. The store also holds
+    the timestamp each speech was downloaded at, so unchanged speeches are
+    skipped even when the server returns them again.
+    """
+
+    def __init__(self, otter, store, account=None):
+        self.otter = otter
+        self.store = store
+        self.account = str(account or otter._userid)
+        self._seen_max = None
+        self._pending = {}
+
+    @property
+    def _meta_key(self):
+        return f'high_water_mark:{self.account}'
+
+    @property
+    def high_water_mark(self):
+        return self.store.get_meta(self._meta_key)
+
+    def is_changed(self, speech):
+        row = self.store.get(speech.get('speech_id'))
+        if row is None or row['status'] != DOWNLOADED:
+            return True
+        return speech_modified_ts(speech) > (row['modified'] or 0)
+
+    def changed_speeches(self, folder=0, page_size=45, source="all", prefetch=True):
+        """Yield speeches modified after the high-water mark that still need syncing"""
+        high_water_mark = self.high_water_mark
+        self._seen_max = high_water_mark
+        self._pending = {}
+        for speech in self.otter.iter_speeches(folder=folder, page_size=page_size, source=source,
+                                               modified_after=high_water_mark, prefetch=prefetch):
+            modified = speech_modified_ts(speech)
+            if self._seen_max is None or modified > self._seen_max:
+                self._seen_max = modified
+            if self.is_changed(speech):
+                self._pending[speech['speech_id']] = speech
+                yield speech
+
+    def finish(self):
+        """Advance the high-water mark past everything synced in this run
+
+        Speeches that were listed but are still not downloaded hold the mark
+        just below their timestamp so the next run lists them again.
+        """
+        unsynced = [speech_modified_ts(speech) for speech in self._pending.values() if self.is_changed(speech)]
+        mark = self._seen_max
+        if unsynced:
+            mark = min(mark, min(unsynced) - 1)
+        high_water_mark = self.high_water_mark
+        if mark is not None and (high_water_mark is None or mark > high_water_mark):
+            self.store.set_meta(self._meta_key, mark)
+            high_water_mark = mark
+        self._pending = {}
+        return high_water_mark
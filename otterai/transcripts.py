@@ -0,0 +1,66 @@
+import re
+
+# "00:01:02,345 --> 00:01:05,000"
+_SRT_TIMING = re.compile(r'(\d+):(\d{2}):(\d{2})[,.](\d{3})\s*-->\s*(\d+):(\d{2}):(\d{2})[,.](\d{3})')
+# "Speaker 1: text" at the start of an srt cue
+_SRT_SPEAKER = re.compile(r"^([A-Z][\w .'-]{0,40}):\s+")
+# "Speaker 1  1:02" or "Jane Doe  1:02:03" heading a txt paragraph
+_TXT_HEADING = re.compile(r'^(.*?)\s+(\d+):(\d{2})(?::(\d{2}))?$')
+
+def _ms(hours, minutes, seconds, millis=0):
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(millis)
+
+def parse_srt(text):
+    """Segments of an srt export as ``{transcript, start_offset, end_offset, speaker}``
+
+    Offsets are milliseconds like the API's transcripts; ``speaker`` is None
+    unless the cue starts with a ``Name:`` label.
+    """
+    segments = []
+    for block in re.split(r'\r?\n\s*\r?\n', text.strip()):
+        lines = block.strip().splitlines()
+        timing_line = next((i for i, line in enumerate(lines[:2]) if _SRT_TIMING.search(line)), None)
+        if timing_line is None:
+            continue
+        timing = _SRT_TIMING.search(lines[timing_line]).groups()
+        body = ' '.join(line.strip() for line in lines[timing_line + 1:]).strip()
+        if not body:
+            continue
+        speaker = None
+        match = _SRT_SPEAKER.match(body)
+        if match:
+            speaker, body = match.group(1), body[match.end():]
+        segments.append({'transcript': body, 'start_offset': _ms(*timing[:4]), 'end_offset': _ms(*timing[4:]),
+                         'speaker': speaker})
+    return segments
+
+def parse_txt(text):
+    """Segments of a txt export; each paragraph ends where the next one starts"""
+    segments = []
+    for block in re.split(r'\r?\n\s*\r?\n', text.strip()):
+        lines = block.strip().splitlines()
+        if not lines:
+            continue
+        match = _TXT_HEADING.match(lines[0].strip())
+        if match is None:
+            if segments:
+                # Paragraph without a heading continues the previous speaker
+                segments[-1]['transcript'] += ' ' + ' '.join(line.strip() for line in lines)
+            continue
+        speaker, first, second, third = match.groups()
+        start = _ms(first, second, third) if third is not None else _ms(0, first, second)
+        if segments:
+            segments[-1]['end_offset'] = start
+        segments.append({'transcript': ' '.join(line.strip() for line in lines[1:]).strip(),
+                         'start_offset': start, 'end_offset': None, 'speaker': speaker.strip() or None})
+    return [segment for segment in segments if segment['transcript']]
+
+def segment_from_api(item):
+    """Segment from one entry of a ``get_speech`` transcripts list
+
+    Also carries ``speaker_id``; ``speaker`` is the entry's speaker label
+    when it has one.
+    """
+    return {'transcript': item.get('transcript') or '', 'start_offset': item.get('start_offset'),
+            'end_offset': item.get('end_offset'), 'speaker': item.get('speaker_model_label') or None,
+            'speaker_id': item.get('speaker_id')}
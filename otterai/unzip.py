@@ -0,0 +1,169 @@
+import struct
+import zlib
+import os
+
+# Local file header, data descriptor and central directory signatures
+LOCAL_HEADER = b'PK\x03\x04'
+DATA_DESCRIPTOR = b'PK\x07\x08'
+CENTRAL_DIRECTORY = (b'PK\x01\x02', b'PK\x05\x06', b'PK\x06\x06')
+_LOCAL_HEADER = struct.Struct('<4sHHHHHIIIHH')
+# General purpose flag: sizes and CRC follow the data in a descriptor
+_FLAG_DESCRIPTOR = 0x08
+_FLAG_ENCRYPTED = 0x01
+_STORED = 0
+_DEFLATED = 8
+# Block size used when decompressing
+_BLOCK_SIZE = 1024 * 1024
+
+class StreamingZipError(Exception):
+    pass
+
+class TruncatedZipError(StreamingZipError):
+    # The stream stopped before the archive was complete
+    pass
+
+class UnstreamableZipError(StreamingZipError):
+    # A valid archive that can only be read with its central directory
+    pass
+
+class _ChunkReader:
+    # Byte reader over an iterator of chunks, with push-back
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = b''
+
+    def read(self, size):
+        """Up to ``size`` bytes, fewer only at the end of the stream"""
+        while len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def read_exact(self, size):
+        data = self.read(size)
+        if len(data) != size:
+            raise TruncatedZipError("Export ended in the middle of a zip member")
+        return data
+
+    def read_some(self, size):
+        if not self._buffer:
+            self._buffer = next(self._chunks, b'')
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def unread(self, data):
+        self._buffer = data + self._buffer
+
+def _zip64_sizes(extra, uncompressed, compressed):
+    # The zip64 extra field only holds the sizes whose header value is
+    # 0xFFFFFFFF; its presence also means a data descriptor uses 8-byte sizes
+    offset = 0
+    while offset + 4 <= len(extra):
+        tag, length = struct.unpack_from('<HH', extra, offset)
+        if tag == 0x0001:
+            values = list(struct.unpack_from('<' + 'Q' * (length // 8), extra, offset + 4))
+            if uncompressed == 0xFFFFFFFF and values:
+                uncompressed = values.pop(0)
+            if compressed == 0xFFFFFFFF and values:
+                compressed = values.pop(0)
+            return uncompressed, compressed, True
+        offset += 4 + length
+    return uncompressed, compressed, False
+
+def iter_members(chunks):
+    """Yield ``(name, data_chunks)`` for each member of a zip arriving as chunks
+
+    Members are read from their local headers in stream order, so nothing
+    has to be buffered or written before extraction. ``data_chunks`` yields
+    the uncompressed bytes and raises StreamingZipError on a CRC or size
+    mismatch; it must be consumed before the next member is requested.
+    Members that cannot be read without the central directory (stored with
+    a data descriptor, or compressed other than deflate) raise
+    UnstreamableZipError.
+    """
+    reader = _ChunkReader(chunks)
+    while True:
+        signature = reader.read(4)
+        if not signature or signature in CENTRAL_DIRECTORY:
+            return
+        if signature != LOCAL_HEADER:
+            raise StreamingZipError(f"Unexpected zip record {signature!r}")
+        (_, _, flags, method, _, _, crc, compressed, uncompressed,
+         name_length, extra_length) = _LOCAL_HEADER.unpack(signature + reader.read_exact(_LOCAL_HEADER.size - 4))
+        name = reader.read_exact(name_length).decode('utf-8' if flags & 0x800 else 'cp437')
+        extra = reader.read_exact(extra_length)
+        uncompressed, compressed, zip64 = _zip64_sizes(extra, uncompressed, compressed)
+        if flags & _FLAG_ENCRYPTED:
+            raise StreamingZipError(f"{name} is encrypted")
+        if method not in (_STORED, _DEFLATED):
+            raise UnstreamableZipError(f"{name} uses unsupported compression method {method}")
+        has_descriptor = bool(flags & _FLAG_DESCRIPTOR)
+        if has_descriptor and method == _STORED:
+            # Without a size there is no way to find the end of stored data
+            raise UnstreamableZipError(f"{name} is stored with a trailing data descriptor")
+        yield name, _member_data(reader, name, method, has_descriptor, zip64, crc, compressed, uncompressed)
+
+def _member_data(reader, name, method, has_descriptor, zip64, crc, compressed, uncompressed):
+    decompressor = zlib.decompressobj(-zlib.MAX_WBITS) if method == _DEFLATED else None
+    actual_crc = 0
+    size = 0
+    remaining = None if has_descriptor else compressed
+    while remaining is None or remaining > 0:
+        block = reader.read_some(_BLOCK_SIZE if remaining is None else min(remaining, _BLOCK_SIZE))
+        if not block:
+            raise TruncatedZipError(f"Export ended in the middle of {name}")
+        if remaining is not None:
+            remaining -= len(block)
+        data = decompressor.decompress(block) if decompressor else block
+        if decompressor is not None and decompressor.eof:
+            # Deflate marks its own end; anything after it is the next record
+            reader.unread(decompressor.unused_data)
+            remaining = 0
+        if data:
+            actual_crc = zlib.crc32(data, actual_crc)
+            size += len(data)
+            yield data
+
+    if has_descriptor:
+        descriptor = reader.read_exact(4)
+        if descriptor == DATA_DESCRIPTOR:
+            descriptor = reader.read_exact(4)
+        crc = struct.unpack('<I', descriptor)[0]
+        if zip64:
+            uncompressed = struct.unpack('<QQ', reader.read_exact(16))[1]
+        else:
+            uncompressed = struct.unpack('<II', reader.read_exact(8))[1]
+    if actual_crc != crc:
+        raise StreamingZipError(f"CRC mismatch in {name}")
+    if size != uncompressed:
+        raise StreamingZipError(f"Size mismatch in {name}: expected {uncompressed} bytes, got {size}")
+
+def extract_stream(chunks, target_for):
+    """Extract a zip arriving as chunks, returns the paths written
+
+    ``target_for(member_name)`` gives the path for a member, or None to skip
+    it. Each member is written to a temp file next to its target and only
+    renamed into place once its CRC has been checked.
+    """
+    written = []
+    for name, data in iter_members(chunks):
+        target = None if name.endswith('/') else target_for(name)
+        if target is None:
+            for _ in data:
+                pass
+            continue
+        tmp_path = target + '.part'
+        try:
+            with open(tmp_path, 'wb') as f:
+                for block in data:
+                    f.write(block)
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        written.append(target)
+    return written
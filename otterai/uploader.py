@@ -0,0 +1,75 @@
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from otterai.otterai import OtterAIException, _parse_upload_location
+
+class PipelinedUploader:
+    """Uploads many files with the upload round trips overlapped
+
+    Upload params for upcoming files are fetched while earlier files are
+    still transferring (up to ``prefetch`` ahead), the CORS preflight runs
+    once per session, and ``finish_speech_upload`` calls complete on their
+    own pool so the next transfer can start right away.
+    """
+
+    def __init__(self, otter, concurrency=4, prefetch=2, finish_workers=2):
+        self.otter = otter
+        self.concurrency = max(1, concurrency)
+        self.prefetch = max(1, prefetch)
+        self.finish_workers = max(1, finish_workers)
+
+    def upload(self, file_names, content_type='audio/mp4', progress=None, use_mmap=False):
+        """Upload files, returns their upload_speech-style results in input order
+
+        A file listed twice is uploaded twice and has two results.
+        """
+        otter = self.otter
+        if otter._is_userid_invalid():
+            raise OtterAIException('userid is invalid')
+
+        response = otter._upload_preflight()
+        if response is not None and response.status_code != requests.codes.ok:
+            raise OtterAIException(f"Got response status {response.status_code} from upload preflight")
+
+        # Bounds how far params fetching runs ahead of the transfers
+        window = threading.BoundedSemaphore(self.concurrency + self.prefetch)
+        upload_url = otter.S3_BASE_URL + 'speech-upload-prod'
+        pending = []
+
+        with ThreadPoolExecutor(max_workers=self.prefetch) as params_pool, \
+                ThreadPoolExecutor(max_workers=self.concurrency) as transfer_pool, \
+                ThreadPoolExecutor(max_workers=self.finish_workers) as finish_pool:
+
+            def transfer(file_name, params_future):
+                try:
+                    response = params_future.result()
+                    if response.status_code != requests.codes.ok:
+                        return otter._handle_response(response)
+                    file_progress = (lambda *args: progress(file_name, *args)) if progress else None
+                    response = otter._upload_to_s3(upload_url, file_name, response.json()['data'],
+                                                   content_type, file_progress, use_mmap)
+                    if response.status_code != 201:
+                        return otter._handle_response(response)
+                    bucket, key = _parse_upload_location(response.text)
+                    return finish_pool.submit(lambda: otter._handle_response(otter._finish_upload(bucket, key)))
+                except Exception as e:
+                    return {'status': None, 'data': {'error': str(e)}}
+                finally:
+                    window.release()
+
+            for file_name in file_names:
+                window.acquire()
+                params_future = params_pool.submit(otter._get_upload_params)
+                pending.append(transfer_pool.submit(transfer, file_name, params_future))
+
+            results = []
+            for future in pending:
+                result = future.result()
+                if isinstance(result, Future):
+                    try:
+                        result = result.result()
+                    except Exception as e:
+                        result = {'status': None, 'data': {'error': str(e)}}
+                results.append(result)
+        return results
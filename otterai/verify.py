@@ -0,0 +1,76 @@
+import hashlib
+import zipfile
+import zlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Formats an export is expected to contain by default
+EXPECTED_FORMATS = ('txt', 'pdf', 'mp3', 'docx', 'srt')
+# Block size used when hashing files
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def verify_zip(path, formats=EXPECTED_FORMATS):
+    """Hash a zip, CRC-check every member and check the expected formats are present
+
+    Returns a dict with ``path``, ``ok``, ``error``, ``missing`` (formats not
+    found), ``checksum``, ``size`` and ``mtime_ns``.
+    """
+    result = {'path': path, 'ok': False, 'error': None, 'missing': [], 'checksum': None}
+    try:
+        stat = os.stat(path)
+        result['size'], result['mtime_ns'] = stat.st_size, stat.st_mtime_ns
+        result['checksum'] = file_checksum(path)
+        with zipfile.ZipFile(path) as archive:
+            bad_member = archive.testzip()
+            if bad_member is not None:
+                result['error'] = f"CRC mismatch in {bad_member}"
+                return result
+            extensions = {os.path.splitext(name)[1].lstrip('.').lower() for name in archive.namelist()}
+        result['missing'] = [fmt for fmt in formats if fmt not in extensions]
+        if result['missing']:
+            result['error'] = f"Missing formats: {', '.join(result['missing'])}"
+            return result
+        result['ok'] = True
+    except (zipfile.BadZipFile, zlib.error, EOFError, OSError) as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+def verify_downloads(paths, index=None, formats=EXPECTED_FORMATS, workers=None):
+    """Verify zips across a process pool, returns ``{path: result}``
+
+    With an index, files whose size and mtime match their last recorded
+    verification are not opened again, and new results and checksums are
+    recorded in it.
+    """
+    results = {}
+    to_check = []
+    for path in paths:
+        cached = index.verification(path) if index is not None else None
+        if cached is not None and cached[3] is not None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+            if stat is not None and (stat.st_size, stat.st_mtime_ns) == tuple(cached[:2]):
+                results[path] = {'path': path, 'ok': bool(cached[3]), 'checksum': cached[2], 'cached': True,
+                                 'error': None if cached[3] else "Failed previous verification",
+                                 'size': cached[0], 'mtime_ns': cached[1], 'missing': []}
+                continue
+        to_check.append(path)
+
+    if to_check:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(to_check) // ((workers or os.cpu_count() or 1) * 4))
+            for result in pool.map(verify_zip, to_check, [formats] * len(to_check), chunksize=chunksize):
+                results[result['path']] = result
+                if index is not None and 'size' in result:
+                    index.record_verification(result['path'], result['size'], result['mtime_ns'],
+                                              result['checksum'], result['ok'])
+    return results
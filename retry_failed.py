@@ -1,32 +1,37 @@
 #!/usr/bin/env python3
 
-import json
 import os
-from download_from_list import download_speech, create_speech_dir
+from download_from_list import download_speech, create_speech_dir, PROGRESS_DB, PROGRESS_JSON
 from login_script import main as login
+from otterai.downloader import BulkDownloader, DownloadTracker, DEFAULT_WORKERS
+from otterai.state import FAILED
+from otterai.manifest import DownloadIndex
+from otterai.catalog import SpeechCatalog, CATALOG_FILENAME, LEGACY_JSON
 from tqdm import tqdm
 
 def main():
     # Load progress and report files
     try:
-        with open('download_progress.json') as f:
-            progress = json.load(f)
-        with open('speeches_list.json') as f:
-            data = json.load(f)
-            speeches = {s['speech_id']: s for s in data['speeches']}
+        if not os.path.exists(PROGRESS_DB) and not os.path.exists(PROGRESS_JSON):
+            raise FileNotFoundError(PROGRESS_DB)
+        if not os.path.exists(CATALOG_FILENAME) and not os.path.exists(LEGACY_JSON):
+            raise FileNotFoundError(CATALOG_FILENAME)
+        tracker = DownloadTracker.load(PROGRESS_DB, legacy_json=PROGRESS_JSON)
+        catalog = SpeechCatalog.open(CATALOG_FILENAME, legacy_json=LEGACY_JSON)
     except FileNotFoundError as e:
         print(f"Error: Required file not found - {e}")
         return
 
-    failed_ids = progress.get('failed', [])
+    failed_ids = tracker.store.ids(FAILED)
     if not failed_ids:
-        print("No failed downloads found in download_progress.json")
+        print(f"No failed downloads found in {PROGRESS_DB}")
         return
 
     print(f"\nFound {len(failed_ids)} failed downloads to retry")
     
     # Get failed speeches
-    to_retry = [speeches[speech_id] for speech_id in failed_ids if speech_id in speeches]
+    to_retry = list(catalog.speeches(ids=failed_ids))
+    speeches = {s['speech_id']: s for s in to_retry}
     
     if not to_retry:
         print("No matching speeches found for failed IDs")
@@ -39,31 +44,22 @@ def main():
     
     # Track new results
     new_results = {'succeeded': [], 'failed': []}
+    workers = int(os.getenv('OTTER_DOWNLOAD_WORKERS', DEFAULT_WORKERS))
+    downloader = BulkDownloader(otter, workers=workers)
+    
+    index = DownloadIndex("downloads")
+    
+    def task(speech):
+        # Create fresh directory for retry
+        directory = create_speech_dir(speech)
+        ok = download_speech(otter, speech, directory)
+        index.update(directory)
+        new_results['succeeded' if ok else 'failed'].append(speech['speech_id'])
+        return ok
     
     with tqdm(total=len(to_retry), desc="Retrying") as pbar:
-        for speech in to_retry:
-            speech_id = speech['speech_id']
-            
-            # Create fresh directory for retry
-            directory = create_speech_dir(speech)
-            pbar.set_description(f"Retrying {speech_id}")
-            
-            if download_speech(otter, speech, directory):
-                new_results['succeeded'].append(speech_id)
-                # Remove from failed list if successful
-                if speech_id in progress['failed']:
-                    progress['failed'].remove(speech_id)
-                progress['downloaded'].append(speech_id)
-            else:
-                new_results['failed'].append(speech_id)
-                
-            # Update progress file after each attempt
-            with open('download_progress.json', 'w') as f:
-                json.dump(progress, f, indent=2)
-                
-            pbar.set_postfix(success=len(new_results['succeeded']), 
-                           still_failed=len(new_results['failed']))
-            pbar.update(1)
+        tracker.pbar = pbar
+        downloader.run(to_retry, task, tracker)
     
     print("\nRetry complete!")
     print(f"Successfully downloaded: {len(new_results['succeeded'])}")
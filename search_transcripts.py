@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import sys
+import time
+from otterai.search import TranscriptIndex
+
+def format_offset(ms):
+    if ms is None:
+        return '?'
+    seconds = ms // 1000
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: search_transcripts.py QUERY [--raw] [--limit N]")
+        print("  QUERY is matched as a phrase; --raw passes FTS5 syntax through (budget AND launch, plan*)")
+        sys.exit(1)
+
+    args = sys.argv[1:]
+    raw = '--raw' in args
+    limit = 50
+    if '--limit' in args:
+        limit = int(args[args.index('--limit') + 1])
+    query = ' '.join(a for i, a in enumerate(args)
+                     if a != '--raw' and a != '--limit' and (i == 0 or args[i - 1] != '--limit'))
+
+    with TranscriptIndex('downloads') as index:
+        started = time.perf_counter()
+        changed = index.refresh()
+        if changed:
+            print(f"Indexed {changed} new or changed transcripts in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        result = index.search(query, size=limit, phrase=not raw)
+        elapsed = (time.perf_counter() - started) * 1000
+
+    if result['status'] != 200:
+        print(f"Invalid query: {result['data']['error']}")
+        sys.exit(1)
+
+    hits = result['data']['hits']
+    for hit in hits:
+        speaker = f"{hit['speaker']}: " if hit['speaker'] else ''
+        print(f"{hit['otid'] or hit['speech_id']}  {format_offset(hit['start_offset'])}"
+              f"-{format_offset(hit['end_offset'])}  {speaker}{hit['transcript']}")
+    print(f"\n{len(hits)} hits in {elapsed:.1f}ms")
+
+if __name__ == "__main__":
+    main()
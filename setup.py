@@ -14,5 +14,10 @@ setup(
             'requests_toolbelt',
             'tqdm'
         ],
+        extras_require={
+            'async': ['aiohttp'],
+            'fast': ['orjson'],
+            'analytics': ['numpy']
+        },
         keywords=['python', 'otterai', 'api']
 )
\ No newline at end of file
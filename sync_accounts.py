@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+from dotenv import load_dotenv
+from tqdm import tqdm
+from download_all_speeches import create_speech_directory
+from sync_speeches import sync_speech
+from otterai.accounts import AccountOrchestrator, load_accounts, DEFAULT_PER_ACCOUNT
+from otterai.downloader import DEFAULT_WORKERS
+from otterai.formats import BlobStore, FormatDownloader, BLOBS_DIRNAME, formats_from_env
+
+def main():
+    load_dotenv()
+    accounts_file = os.getenv('OTTER_ACCOUNTS_FILE', 'accounts.json')
+    if not os.path.exists(accounts_file):
+        print(f"{accounts_file} not found!")
+        print('Create it with [{"username": "...", "password": "..."}, ...] or set OTTER_ACCOUNTS_FILE')
+        sys.exit(1)
+    credentials = load_accounts(accounts_file)
+    
+    base_dir = "downloads"
+    workers = int(os.getenv('OTTER_DOWNLOAD_WORKERS', DEFAULT_WORKERS))
+    per_account = int(os.getenv('OTTER_PER_ACCOUNT_WORKERS', DEFAULT_PER_ACCOUNT))
+    rate = float(os.getenv('OTTER_ACCOUNT_RATE', 0)) or None
+    orchestrator = AccountOrchestrator(base_dir, workers=workers, per_account=per_account, rate=rate)
+    
+    print(f"Logging in to {len(credentials)} accounts...")
+    failed = orchestrator.login(credentials)
+    for name, error in failed.items():
+        print(f"✗ {name}: {error}")
+    if not orchestrator.accounts:
+        print("No accounts logged in")
+        sys.exit(1)
+    
+    # Identical files are shared across accounts through one blob store
+    blobs = BlobStore(os.path.join(base_dir, BLOBS_DIRNAME))
+    formats = formats_from_env()
+    downloaders = {account.name: FormatDownloader(account.otter, account.tracker.store, blobs, formats)
+                   for account in orchestrator.accounts}
+    
+    def task(account, speech):
+        speech_dir = create_speech_directory(speech, account.directory)
+        return sync_speech(downloaders[account.name], speech, speech_dir)
+    
+    with tqdm(total=0, desc="Syncing accounts") as pbar:
+        results = orchestrator.run(task, pbar=pbar)
+    
+    print("\nSync complete!")
+    for name, result in results.items():
+        print(f"{name}: {result['downloaded']} downloaded, {result['failed']} failed, "
+              f"high-water mark {result['high_water_mark']}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nOperation cancelled by user")
+        sys.exit(130)
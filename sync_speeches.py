@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+from tqdm import tqdm
+from login_script import main as login
+from download_all_speeches import create_speech_directory
+from otterai.downloader import BulkDownloader, DownloadTracker, DEFAULT_WORKERS
+from otterai.sync import IncrementalSync
+from otterai.formats import BlobStore, FormatDownloader, BLOBS_DIRNAME, AUDIO_FORMATS, format_version, formats_from_env
+
+def sync_speech(formats, speech, speech_dir):
+    """Save metadata and fetch only the formats that are missing or stale"""
+    speech_id = speech['speech_id']
+    try:
+        with open(os.path.join(speech_dir, "metadata.json"), 'w') as f:
+            json.dump(speech, f, indent=2)
+        
+        # Speeches fetched as a whole zip before formats were tracked: take
+        # their formats from the zip rather than downloading them again
+        row = formats.store.get(speech_id)
+        zip_path = os.path.join(speech_dir, "content.zip")
+        if row and row['modified'] and not formats.store.formats(speech_id) and os.path.exists(zip_path):
+            formats.import_zip(speech, speech_dir, zip_path, version_of=lambda fmt: (
+                format_version(speech, fmt) if fmt in AUDIO_FORMATS else str(row['modified'])))
+        
+        fetched = formats.download(speech, speech_dir)
+        if fetched:
+            print(f"✓ {speech.get('title')}: downloaded {', '.join(fetched)}")
+        return True
+    except Exception as e:
+        print(f"✗ {speech.get('title')}: {e}")
+        return False
+
+def main():
+    try:
+        print("Logging in to OtterAI...")
+        otter = login()
+        
+        base_dir = "downloads"
+        os.makedirs(base_dir, exist_ok=True)
+        
+        tracker = DownloadTracker.load(os.path.join(base_dir, ".download_state.db"),
+                                       legacy_json=os.path.join(base_dir, ".download_tracker.json"))
+        sync = IncrementalSync(otter, tracker.store)
+        print(f"\nFetching speeches changed since {sync.high_water_mark or 'the beginning'}...")
+        speeches = list(sync.changed_speeches())
+        
+        print(f"Changed speeches to download: {len(speeches)}")
+        if not speeches:
+            sync.finish()
+            print("Everything is up to date!")
+            return
+        
+        workers = int(os.getenv('OTTER_DOWNLOAD_WORKERS', DEFAULT_WORKERS))
+        downloader = BulkDownloader(otter, workers=workers)
+        formats = FormatDownloader(otter, tracker.store, BlobStore(os.path.join(base_dir, BLOBS_DIRNAME)),
+                                   formats_from_env())
+        
+        def task(speech):
+            speech_dir = create_speech_directory(speech, base_dir)
+            return sync_speech(formats, speech, speech_dir)
+        
+        with tqdm(total=len(speeches), desc="Syncing speeches") as pbar:
+            tracker.pbar = pbar
+            downloader.run(speeches, task, tracker)
+        
+        high_water_mark = sync.finish()
+        print(f"\nSync complete! High-water mark: {high_water_mark}")
+        
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
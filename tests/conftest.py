@@ -0,0 +1,21 @@
+import pytest
+from benchmarks.fake_server import FakeOtterServer
+from otterai.otterai import OtterAI
+from otterai.ratelimit import RetryPolicy
+
+def make_client(server, **options):
+    """An OtterAI pointed at the fake server, retrying without waiting"""
+    options.setdefault('retry_policy', RetryPolicy(max_retries=3, backoff_base=0.0))
+    options.setdefault('rate_limiter', False)
+    return server.configure(OtterAI(**options))
+
+@pytest.fixture
+def server():
+    with FakeOtterServer(speeches=12, segments=5, export_size=4096) as srv:
+        yield srv
+
+@pytest.fixture
+def otter(server):
+    client = make_client(server)
+    assert client.login('user', 'pass')['status'] == 200
+    return client
@@ -0,0 +1,39 @@
+from otterai.cache import ResponseCache
+from tests.conftest import make_client
+
+def cached_client(server, cache):
+    client = make_client(server, cache=cache)
+    assert client.login('user', 'pass')['status'] == 200
+    return client
+
+def test_fresh_entries_skip_the_server(server):
+    otter = cached_client(server, ResponseCache(ttl=300))
+    first = otter.get_speakers()
+    before = server.otter.requests
+    assert otter.get_speakers() == first
+    assert server.otter.requests == before
+    assert otter.cache_stats()['hits'] == 1
+
+def test_stale_entries_revalidate_by_etag(server):
+    otter = cached_client(server, ResponseCache(ttl=0))
+    first = otter.get_speakers()
+    assert otter.get_speakers() == first
+    assert otter.cache_stats()['revalidated'] == 1
+
+def test_create_speaker_invalidates_speakers(server):
+    otter = cached_client(server, ResponseCache(ttl=300))
+    count = len(otter.get_speakers()['data']['speakers'])
+    otter.create_speaker('New Speaker')
+    speakers = otter.get_speakers()['data']['speakers']
+    assert len(speakers) == count + 1
+    assert otter.cache_stats()['invalidations'] == 1
+
+def test_cache_survives_restart(server, tmp_path):
+    path = str(tmp_path / 'cache.db')
+    with ResponseCache(ttl=300, path=path) as cache:
+        first = cached_client(server, cache).get_speakers()
+    with ResponseCache(ttl=300, path=path) as cache:
+        otter = cached_client(server, cache)
+        before = server.otter.requests
+        assert otter.get_speakers() == first
+        assert server.otter.requests == before
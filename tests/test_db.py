@@ -0,0 +1,24 @@
+import pytest
+from otterai.cache import ResponseCache
+from otterai.catalog import SpeechCatalog
+from otterai.manifest import DownloadIndex
+from otterai.search import TranscriptIndex
+from otterai.state import StateStore
+
+@pytest.mark.parametrize('open_store', [
+    lambda tmp: ResponseCache(path=str(tmp / 'cache.db')),
+    lambda tmp: SpeechCatalog(str(tmp / 'catalog.db')),
+    lambda tmp: DownloadIndex(str(tmp)),
+    lambda tmp: TranscriptIndex(str(tmp)),
+    lambda tmp: StateStore(str(tmp / 'state.db')),
+])
+def test_stores_share_connection_setup(tmp_path, open_store):
+    with open_store(tmp_path) as store:
+        assert store._conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert store._conn.isolation_level is None
+    assert store._conn is None
+    store.close()
+
+def test_cache_without_path_has_no_connection():
+    with ResponseCache() as cache:
+        assert cache._conn is None
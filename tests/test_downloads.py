@@ -0,0 +1,65 @@
+import io
+import os
+import zipfile
+
+def test_download_speeches_accepts_models(otter, tmp_path):
+    speeches = list(otter.iter_speeches(models=True))[:5]
+    result = otter.download_speeches(speeches, base_dir=str(tmp_path), batch_size=3)['data']
+    assert result['failed'] == {}
+    assert sorted(result['downloaded']) == sorted(speech.otid for speech in speeches)
+    for otid, filename in result['downloaded'].items():
+        assert filename == os.path.join(str(tmp_path), otid, otid + '.zip')
+        assert os.path.getsize(filename) > 0
+
+def test_download_speech_batch_stages_under_base_dir(otter, tmp_path, monkeypatch):
+    import download_from_list
+    workdir = tmp_path / 'cwd'
+    workdir.mkdir()
+    monkeypatch.chdir(workdir)
+    base_dir = str(tmp_path / 'downloads')
+    speeches = otter.get_speeches(page_size=4)['data']['speeches']
+    results = download_from_list.download_speech_batch(otter, speeches, base_dir=base_dir)
+    assert results == {speech['speech_id']: True for speech in speeches}
+    assert os.listdir(str(workdir)) == []
+    assert not [name for name in os.listdir(base_dir) if name.startswith('.bulk_export.')]
+
+def test_download_speech_mode_follows_umask(otter, tmp_path, monkeypatch):
+    from otterai import otterai
+    monkeypatch.setattr(otterai, '_UMASK', None)
+    previous = os.umask(0o027)
+    try:
+        speech = otter.get_speeches(page_size=1)['data']['speeches'][0]
+        result = otter.download_speech(speech['otid'], name=str(tmp_path / 'speech'))
+        assert otterai._umask() == 0o027
+        assert os.stat(result['data']['filename']).st_mode & 0o777 == 0o640
+    finally:
+        os.umask(previous)
+
+def test_download_speeches_combines_batches(server, otter, tmp_path):
+    speeches = otter.get_speeches(page_size=5)['data']['speeches']
+    before = server.otter.requests
+    result = otter.download_speeches(speeches, base_dir=str(tmp_path), batch_size=2)['data']
+    assert result['failed'] == {}
+    assert len(result['downloaded']) == 5
+    # Batches of 2, 2 and 1
+    assert server.otter.requests - before == 3
+
+def test_download_speeches_splits_unmatched_exports(server, otter, tmp_path, monkeypatch):
+    export = server.otter.export
+    def export_with_stray(otids, formats):
+        # A member no speech claims makes a combined export unsplittable
+        if len(otids) == 1:
+            return export(otids, formats)
+        buffer = io.BytesIO(export(otids, formats))
+        with zipfile.ZipFile(buffer, 'a') as archive:
+            archive.writestr('stray.txt', b'')
+        return buffer.getvalue()
+    monkeypatch.setattr(server.otter, 'export', export_with_stray)
+    speeches = otter.get_speeches(page_size=4)['data']['speeches']
+    before = server.otter.requests
+    result = otter.download_speeches(speeches, base_dir=str(tmp_path), batch_size=4)['data']
+    assert result['failed'] == {}
+    assert len(result['downloaded']) == 4
+    # 4 fails, both halves of 2 fail, then each speech on its own
+    assert server.otter.requests - before == 1 + 2 + 4
+    assert not [name for name in os.listdir(str(tmp_path)) if name.startswith('.bulk_export.')]
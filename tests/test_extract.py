@@ -0,0 +1,38 @@
+import os
+import pytest
+from benchmarks.fake_server import FakeOtter
+from otterai.otterai import OtterAIException
+
+FORMATS = ('txt', 'pdf', 'mp3', 'docx', 'srt')
+
+def _download(otter, tmp_path):
+    base = os.path.join(str(tmp_path), 'otid00000000')
+    return otter.download_speech('otid00000000', name=base, extract=True)['data']['files'], base
+
+def test_extract_streams_members(otter, tmp_path):
+    files, base = _download(otter, tmp_path)
+    assert sorted(files) == sorted(f'{base}.{fmt}' for fmt in FORMATS)
+    assert not os.path.exists(base + '.zip')
+
+def test_extract_falls_back_for_stored_members_with_descriptors(server, otter, tmp_path):
+    server.otter.descriptors = True
+    requests = server.otter.requests
+    files, base = _download(otter, tmp_path)
+    assert sorted(files) == sorted(f'{base}.{fmt}' for fmt in FORMATS)
+    with open(base + '.mp3', 'rb') as f:
+        assert f.read() == server.otter.audio_bytes()
+    # The export was requested a second time, to a file
+    assert server.otter.requests - requests == 2
+    assert [name for name in os.listdir(str(tmp_path)) if name.startswith('.')] == []
+
+def test_extract_rejects_a_crc_mismatch(server, otter, tmp_path, monkeypatch):
+    export = FakeOtter.export
+
+    def corrupt(self, otids, formats):
+        data = bytearray(export(self, otids, formats))
+        data[data.index(self.audio[:64]) + 10] ^= 0xFF
+        return bytes(data)
+    monkeypatch.setattr(FakeOtter, 'export', corrupt)
+    with pytest.raises(OtterAIException, match='CRC mismatch'):
+        _download(otter, tmp_path)
+    assert not os.path.exists(os.path.join(str(tmp_path), 'otid00000000.mp3'))
@@ -0,0 +1,21 @@
+import os
+import subprocess
+import sys
+from otterai import jsonlib
+
+def test_loads_prunes_keys_at_any_depth():
+    data = jsonlib.loads(b'{"a": 1, "words": [1], "b": [{"words": 2, "c": 3}]}', drop=('words',))
+    assert data == {'a': 1, 'b': [{'c': 3}]}
+
+def test_get_speech_drop(otter):
+    speech = otter.get_speech('otid00000001', drop=('transcripts',))['data']['speech']
+    assert 'transcripts' not in speech and speech['otid'] == 'otid00000001'
+    assert len(otter.get_speech('otid00000001')['data']['speech']['transcripts']) == 5
+
+def test_unsupported_backend_env_falls_back():
+    env = dict(os.environ, OTTER_JSON='simplejson')
+    result = subprocess.run([sys.executable, '-c', 'from otterai import jsonlib; print(jsonlib.backend())'],
+                            env=env, capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+    assert result.returncode == 0
+    assert result.stdout.strip() in jsonlib.BACKENDS
+    assert 'Ignoring OTTER_JSON' in result.stderr
@@ -0,0 +1,38 @@
+import asyncio
+import pytest
+from benchmarks.fake_server import FakeOtter
+from otterai import AsyncOtterAI
+
+def test_iter_speeches_follows_pages(server, otter):
+    ids = [speech['speech_id'] for speech in otter.iter_speeches(page_size=5)]
+    assert ids == [speech['speech_id'] for speech in server.otter.speeches]
+
+def test_iter_speeches_drops_duplicates_across_pages(server, otter, monkeypatch):
+    # Pages that overlap by one speech, as an inclusive cursor would return
+    page = FakeOtter.page
+    monkeypatch.setattr(FakeOtter, 'page', lambda self, size, last_load_ts=None, modified_after=None:
+                        page(self, size, last_load_ts + 1 if last_load_ts else None, modified_after))
+    ids = [speech['speech_id'] for speech in otter.iter_speeches(page_size=5, prefetch=False)]
+    assert len(ids) == len(set(ids)) == len(server.otter.speeches)
+
+def test_iter_speeches_modified_after(server, otter):
+    cutoff = server.otter.speeches[3]['modified_time']
+    ids = [speech['speech_id'] for speech in otter.iter_speeches(page_size=2, modified_after=cutoff)]
+    assert ids == [speech['speech_id'] for speech in server.otter.speeches[:3]]
+
+def test_async_iter_speeches_follows_pages(server):
+    pytest.importorskip('aiohttp')
+
+    async def listing():
+        async with AsyncOtterAI() as otter:
+            server.configure(otter)
+            await otter.login('user', 'pass')
+            return [speech['speech_id'] async for speech in otter.iter_speeches(page_size=5)]
+    assert asyncio.run(listing()) == [speech['speech_id'] for speech in server.otter.speeches]
+
+def test_list_all_speeches_goes_through_the_client(otter):
+    import list_all_speeches
+    ends = []
+    otter.add_hook(lambda event: ends.append(event['endpoint']) if event['event'] == 'request_end' else None)
+    data = list_all_speeches.inspect_api_call(otter)
+    assert data['speeches'] and ends == ['speeches']
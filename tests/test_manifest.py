@@ -0,0 +1,49 @@
+import json
+import os
+import time
+import zipfile
+from benchmarks.fake_server import make_speech, make_transcripts, export_files
+from otterai.accounts import STATE_FILENAME
+from otterai.manifest import DownloadIndex
+from otterai.search import TranscriptIndex
+
+def _speech_dir(parent, i):
+    speech = make_speech(i, int(time.time()))
+    directory = os.path.join(parent, speech['otid'])
+    os.makedirs(directory)
+    with open(os.path.join(directory, 'metadata.json'), 'w') as f:
+        json.dump(speech, f)
+    files = export_files(speech, make_transcripts(speech, 3), ('txt', 'srt'), b'')
+    with zipfile.ZipFile(os.path.join(directory, speech['otid'] + '.zip'), 'w') as archive:
+        for fmt, data in files.items():
+            archive.writestr(f"{speech['title']}.{fmt}", data)
+    return speech, directory
+
+def test_refresh_scans_account_directories(tmp_path):
+    base = str(tmp_path)
+    _speech_dir(base, 0)
+    for n, account in enumerate(('alice', 'bob')):
+        root = os.path.join(base, account)
+        os.makedirs(root)
+        open(os.path.join(root, STATE_FILENAME), 'w').close()
+        _speech_dir(root, n + 1)
+    with DownloadIndex(base) as index:
+        assert index.refresh() == 3
+        assert set(index.speeches()) == {'speech00000000', 'speech00000001', 'speech00000002'}
+        assert index.lookup('otid00000002')['directory'] == os.path.join(base, 'bob', 'otid00000002')
+    with TranscriptIndex(base) as search:
+        search.refresh()
+        hits = search.search('meeting', phrase=False, size=100)['data']['hits']
+        assert {hit['speech_id'] for hit in hits} <= {'speech00000000', 'speech00000001', 'speech00000002'}
+        assert search.stats()['sources'] == 3
+
+def test_refresh_notices_files_rewritten_in_place(tmp_path):
+    speech, directory = _speech_dir(str(tmp_path), 0)
+    with DownloadIndex(str(tmp_path)) as index:
+        index.refresh()
+        mtime = os.stat(directory).st_mtime_ns
+        with open(os.path.join(directory, 'metadata.json'), 'w') as f:
+            json.dump(dict(speech, speech_id='renamed'), f)
+        assert os.stat(directory).st_mtime_ns == mtime
+        assert index.refresh() == 1
+        assert index.lookup('renamed')['directory'] == directory
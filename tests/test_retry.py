@@ -0,0 +1,33 @@
+import socket
+import pytest
+import requests
+from conftest import make_client
+
+def _retries(client):
+    events = []
+    client.add_hook(lambda event: events.append(event) if event['event'] == 'retry' else None)
+    return events
+
+def test_idempotent_get_is_retried_on_5xx(server, otter):
+    retries = _retries(otter)
+    server.otter.error_rate = 1.0
+    assert otter.get_user()['status'] == 503
+    assert len(retries) == 3
+
+def test_finish_upload_is_not_retried_on_5xx(server, otter):
+    retries = _retries(otter)
+    server.otter.error_rate = 1.0
+    assert otter._finish_upload('bucket', 'key').status_code == 503
+    assert retries == []
+
+def test_finish_upload_is_retried_when_never_sent(server):
+    # Nothing listens on this port, so the request cannot have been received
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    client = make_client(server)
+    client.API_BASE_URL = f'http://127.0.0.1:{port}/forward/api/v1/'
+    retries = _retries(client)
+    with pytest.raises(requests.ConnectionError):
+        client._finish_upload('bucket', 'key')
+    assert len(retries) == 3
@@ -0,0 +1,21 @@
+def expire(otter):
+    # Forget the session cookie and basic auth, like a restored session
+    # whose cookie the server no longer accepts
+    otter._session.cookies.clear()
+    otter._session.auth = None
+
+def test_expired_session_logs_in_again(server, otter):
+    generation = otter._login_generation
+    expire(otter)
+    response = otter.get_speeches(page_size=2)
+    assert response['status'] == 200
+    assert len(response['data']['speeches']) == 2
+    assert otter._login_generation == generation + 1
+
+def test_expired_session_refreshes_csrf_header(server, otter, tmp_path):
+    speech = otter.get_speeches(page_size=1)['data']['speeches'][0]
+    generation = otter._login_generation
+    expire(otter)
+    result = otter.download_speech(speech['otid'], name=str(tmp_path / 'speech'))
+    assert result['status'] == 200
+    assert otter._login_generation == generation + 1
@@ -0,0 +1,27 @@
+from otterai.state import StateStore, DOWNLOADED
+from otterai.sync import IncrementalSync, speech_modified_ts
+
+def test_high_water_mark_lists_only_changes(server, otter, tmp_path):
+    with StateStore(str(tmp_path / 'state.db')) as store:
+        sync = IncrementalSync(otter, store)
+        speeches = list(sync.changed_speeches(page_size=5))
+        assert len(speeches) == len(server.otter.speeches)
+        for speech in speeches:
+            store.record(speech['speech_id'], DOWNLOADED, modified=speech_modified_ts(speech))
+        mark = sync.finish()
+        assert mark == max(speech_modified_ts(speech) for speech in speeches)
+
+        assert list(sync.changed_speeches(page_size=5)) == []
+        changed = server.otter.speeches[3]
+        changed['modified_time'] = mark + 10
+        assert [speech['speech_id'] for speech in sync.changed_speeches(page_size=5)] == [changed['speech_id']]
+
+def test_unsynced_speeches_hold_the_mark(server, otter, tmp_path):
+    with StateStore(str(tmp_path / 'state.db')) as store:
+        sync = IncrementalSync(otter, store)
+        speeches = list(sync.changed_speeches(page_size=5))
+        missed = speeches[0]
+        for speech in speeches[1:]:
+            store.record(speech['speech_id'], DOWNLOADED, modified=speech_modified_ts(speech))
+        assert sync.finish() == speech_modified_ts(missed) - 1
+        assert [speech['speech_id'] for speech in sync.changed_speeches(page_size=5)] == [missed['speech_id']]
@@ -0,0 +1,11 @@
+def test_upload_speeches_reports_every_file_in_order(server, otter, tmp_path):
+    paths = []
+    for n in range(3):
+        path = tmp_path / f'recording{n}.m4a'
+        path.write_bytes(bytes([n]) * 1024)
+        paths.append(str(path))
+    paths.append(paths[0])
+    results = otter.upload_speeches(paths, concurrency=2)['data']
+    assert [result['status'] for result in results] == [200] * 4
+    assert len({result['data']['otid'] for result in results}) == 4
+    assert server.otter.uploads == 4
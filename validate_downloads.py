@@ -4,20 +4,29 @@ import os
 import json
 from datetime import datetime
 from tabulate import tabulate
+from otterai.state import StateStore, DOWNLOADED, FAILED
+from otterai.manifest import DownloadIndex
+from otterai.verify import verify_downloads, EXPECTED_FORMATS
+from otterai.catalog import SpeechCatalog, CATALOG_FILENAME, LEGACY_JSON
 
-def check_download_integrity(directory, speech_id):
-    """Check if a downloaded speech has all expected files"""
+def check_download_integrity(directory, speech_id, files=None):
+    """Check if a downloaded speech has all expected files
+    
+    files is an optional {filename: (size, mtime_ns)} listing from the
+    download index, used instead of listing the directory again
+    """
     required_files = {
         'metadata.json': False,
         f'{speech_id}.zip': False
     }
     
     try:
-        for filename in os.listdir(directory):
+        if files is None:
+            files = {name: (os.path.getsize(os.path.join(directory, name)), None) for name in os.listdir(directory)}
+        for filename, (file_size, _) in files.items():
             for req_file in required_files:
                 if filename.endswith(req_file):
                     required_files[req_file] = True
-                    file_size = os.path.getsize(os.path.join(directory, filename))
                     if file_size == 0:
                         print(f"Warning: {filename} is empty (0 bytes)")
                         required_files[req_file] = False
@@ -27,14 +36,23 @@ def check_download_integrity(directory, speech_id):
         print(f"Error checking directory {directory}: {e}")
         return False
 
+def is_extracted(speech_id, files):
+    """Check for a download unpacked with OTTER_EXTRACT, one file per format
+
+    Members are CRC-checked while they are extracted, so there is no zip to
+    verify afterwards.
+    """
+    return 'metadata.json' in files and all(files.get(f'{speech_id}.{fmt}', (0,))[0] > 0 for fmt in EXPECTED_FORMATS)
+
 def main():
     # Load progress data
     try:
-        with open('download_progress.json') as f:
-            progress = json.load(f)
-        with open('speeches_list.json') as f:
-            data = json.load(f)
-            speeches = {s['speech_id']: s for s in data['speeches']}
+        if not os.path.exists('download_progress.db') and not os.path.exists('download_progress.json'):
+            raise FileNotFoundError('download_progress.db')
+        if not os.path.exists(CATALOG_FILENAME) and not os.path.exists(LEGACY_JSON):
+            raise FileNotFoundError(CATALOG_FILENAME)
+        store = StateStore.open('download_progress.db', legacy_json='download_progress.json')
+        catalog = SpeechCatalog.open(CATALOG_FILENAME, legacy_json=LEGACY_JSON)
     except FileNotFoundError as e:
         print(f"Error: Required file not found - {e}")
         return
@@ -46,39 +64,58 @@ def main():
         'verified': [],
         'missing_files': [],
         'not_found': [],
-        'empty_files': []
+        'empty_files': [],
+        'corrupt': []
     }
 
     # Check all supposedly downloaded speeches
-    downloaded_ids = progress.get('downloaded', [])
-    failed_ids = progress.get('failed', [])
+    downloaded_ids = store.ids(DOWNLOADED)
+    failed_ids = store.ids(FAILED)
+    # Only the typed columns of tracked speeches are loaded
+    speeches = {row['speech_id']: row for row in catalog.rows(ids=downloaded_ids + failed_ids)}
     
     # Build table of results
     results = []
+    index = DownloadIndex('downloads')
+    index.refresh()
+    zips = {}
     
     for speech_id in downloaded_ids:
         speech = speeches.get(speech_id, {})
-        title = speech.get('title', 'Unknown')
-        date = datetime.fromtimestamp(speech.get('created_at', 0)).strftime('%Y-%m-%d')
+        title = speech.get('title') or 'Unknown'
+        date = datetime.fromtimestamp(speech.get('created_at') or 0).strftime('%Y-%m-%d')
         
         # Look for speech directory
-        found = False
-        for root, dirs, files in os.walk('downloads'):
-            if speech_id in root:
-                found = True
-                if check_download_integrity(root, speech_id):
-                    validation['verified'].append(speech_id)
-                    status = "✓ Verified"
-                else:
-                    validation['missing_files'].append(speech_id)
-                    status = "✗ Missing files"
-                break
-                
-        if not found:
+        entry = index.lookup(speech_id) or index.lookup(speech.get('otid'))
+        if entry:
+            # Zips are named by otid when one is known
+            zip_id = speech.get('otid') or speech_id
+            if check_download_integrity(entry['directory'], zip_id, entry['files']):
+                # Zip contents are checked below, all at once
+                zip_name = next(name for name in entry['files'] if name.endswith(f'{zip_id}.zip'))
+                zips[os.path.join(entry['directory'], zip_name)] = (len(results), speech_id)
+                status = None
+            elif is_extracted(zip_id, entry['files']):
+                validation['verified'].append(speech_id)
+                status = "✓ Verified (extracted)"
+            else:
+                validation['missing_files'].append(speech_id)
+                status = "✗ Missing files"
+        else:
             validation['not_found'].append(speech_id)
             status = "✗ Directory not found"
             
         results.append([speech_id, title, date, status])
+    
+    # CRC-check zips and their formats in parallel, skipping unchanged files
+    for path, result in verify_downloads(list(zips), index=index).items():
+        row, speech_id = zips[path]
+        if result['ok']:
+            validation['verified'].append(speech_id)
+            results[row][3] = "✓ Verified"
+        else:
+            validation['corrupt'].append(speech_id)
+            results[row][3] = f"✗ Corrupt: {result['error']}"
 
     # Print summary table
     print("\nDownload Status:")
@@ -88,11 +125,12 @@ def main():
     
     # Print summary
     print("\nSummary:")
-    print(f"Total speeches: {len(speeches)}")
+    print(f"Total speeches: {len(catalog)}")
     print(f"Marked as downloaded: {len(downloaded_ids)}")
     print(f"Marked as failed: {len(failed_ids)}")
     print(f"Verified complete: {len(validation['verified'])}")
     print(f"Missing files: {len(validation['missing_files'])}")
+    print(f"Corrupt: {len(validation['corrupt'])}")
     print(f"Not found: {len(validation['not_found'])}")
     
     # Look at remaining failed download
@@ -102,7 +140,7 @@ def main():
         print(f"\nFailed Speech Details:")
         print(f"ID: {speech_id}")
         print(f"Title: {speech.get('title')}")
-        print(f"Created: {datetime.fromtimestamp(speech.get('created_at', 0))}")
+        print(f"Created: {datetime.fromtimestamp(speech.get('created_at') or 0)}")
         print(f"OTID: {speech.get('otid')}")
         print(f"Download URL: {speech.get('download_url')}")
         
@@ -110,7 +148,7 @@ def main():
     report = {
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'validation_results': validation,
-        'failed_details': [speeches[id] for id in failed_ids if id in speeches]
+        'failed_details': list(catalog.speeches(ids=failed_ids))
     }
     
     with open('validation_report.json', 'w') as f: